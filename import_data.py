@@ -1,10 +1,14 @@
 import sqlite3
+import argparse
 import pandas as pd
 import os
+from src.database.index_advisor import IndexAdvisor, QueryLog, DEFAULT_WORKLOAD, format_report
+from src.database.rollups import RollupManager, format_refresh
 
 DB_NAME = 'Database/iris.db'
 SCHEMA_FILE = 'Database/schema.sql'
 RAW_DATA_DIR = 'Sales Dataset/Raw_data'
+QUERY_LOG = 'Database/query_log.jsonl'
 
 def init_db():
     conn = sqlite3.connect(DB_NAME)
@@ -13,9 +17,9 @@ def init_db():
     conn.commit()
     return conn
 
-def load_product_master(conn):
+def load_product_master(conn, file_path=None, if_exists='replace'):
     print("Loading Product Master...")
-    file_path = os.path.join(RAW_DATA_DIR, 'May-2022.csv')
+    file_path = file_path or os.path.join(RAW_DATA_DIR, 'May-2022.csv')
     try:
         df = pd.read_csv(file_path, encoding='utf-8')
     except UnicodeDecodeError:
@@ -36,12 +40,12 @@ def load_product_master(conn):
     schema_cols = list(column_map.values())
     df = df[schema_cols]
     
-    df.to_sql('product_master', conn, if_exists='replace', index=False)
+    df.to_sql('product_master', conn, if_exists=if_exists, index=False)
     print(f"Loaded {len(df)} rows into product_master")
 
-def load_amazon_sales(conn):
+def load_amazon_sales(conn, file_path=None, if_exists='replace'):
     print("Loading Amazon Sales...")
-    file_path = os.path.join(RAW_DATA_DIR, 'Amazon Sale Report.csv')
+    file_path = file_path or os.path.join(RAW_DATA_DIR, 'Amazon Sale Report.csv')
     try:
         df = pd.read_csv(file_path, encoding='utf-8')
     except UnicodeDecodeError:
@@ -66,12 +70,12 @@ def load_amazon_sales(conn):
     # Filter columns
     df = df[[c for c in column_map.values() if c in df.columns]]
     
-    df.to_sql('amazon_sales', conn, if_exists='replace', index=False)
+    df.to_sql('amazon_sales', conn, if_exists=if_exists, index=False)
     print(f"Loaded {len(df)} rows into amazon_sales")
 
-def load_international_sales(conn):
+def load_international_sales(conn, file_path=None, if_exists='replace'):
     print("Loading International Sales...")
-    file_path = os.path.join(RAW_DATA_DIR, 'International sale Report.csv')
+    file_path = file_path or os.path.join(RAW_DATA_DIR, 'International sale Report.csv')
     try:
         df = pd.read_csv(file_path, encoding='utf-8')
     except UnicodeDecodeError:
@@ -88,12 +92,12 @@ def load_international_sales(conn):
     df = df.rename(columns=column_map)
     df = df[[c for c in column_map.values() if c in df.columns]]
     
-    df.to_sql('international_sales', conn, if_exists='replace', index=False)
+    df.to_sql('international_sales', conn, if_exists=if_exists, index=False)
     print(f"Loaded {len(df)} rows into international_sales")
 
-def load_inventory(conn):
+def load_inventory(conn, file_path=None, if_exists='replace'):
     print("Loading Inventory...")
-    file_path = os.path.join(RAW_DATA_DIR, 'Sale Report.csv')
+    file_path = file_path or os.path.join(RAW_DATA_DIR, 'Sale Report.csv')
     try:
         df = pd.read_csv(file_path, encoding='utf-8')
     except UnicodeDecodeError:
@@ -108,10 +112,61 @@ def load_inventory(conn):
     df = df.rename(columns=column_map)
     df = df[[c for c in column_map.values() if c in df.columns]]
     
-    df.to_sql('inventory', conn, if_exists='replace', index=False)
+    df.to_sql('inventory', conn, if_exists=if_exists, index=False)
     print(f"Loaded {len(df)} rows into inventory")
 
+LOADERS = {
+    'product_master': load_product_master,
+    'amazon_sales': load_amazon_sales,
+    'international_sales': load_international_sales,
+    'inventory': load_inventory,
+}
+
+def build_rollups(db_path=DB_NAME):
+    # Aggregate tables for the usual dashboard questions; a refresh only aggregates rows
+    # added since the last one (the tables are rebuilt when a source table was reloaded)
+    print("Building rollups...")
+    report = RollupManager(db_path).refresh()
+    print(format_refresh(report))
+    return report
+
+def append_data(table, file_path, db_path=DB_NAME):
+    # Keeps the database, its indexes and rollups: the new rows get rowids above the rollup
+    # watermarks, so the refresh aggregates only them
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database file not found at: {db_path} (run a full import first)")
+    conn = sqlite3.connect(db_path)
+    try:
+        LOADERS[table](conn, file_path=file_path, if_exists='append')
+        conn.commit()
+    finally:
+        conn.close()
+    return build_rollups(db_path)
+
+def build_indexes():
+    # to_sql(if_exists='replace') recreates the tables without the schema's keys (Amazon order_id
+    # repeats once per order line, so it can't be a primary key anyway): index for the workload instead
+    print("Building indexes...")
+    workload = QueryLog(QUERY_LOG).workload() or DEFAULT_WORKLOAD
+    report = IndexAdvisor(DB_NAME).advise(workload)
+    print(format_report(report))
+
 def main():
+    parser = argparse.ArgumentParser(description="Load the raw CSVs into SQLite, then build rollups and indexes.")
+    parser.add_argument("--append", nargs=2, metavar=("TABLE", "CSV"),
+                        help=f"Append the rows of CSV to TABLE ({', '.join(LOADERS)}) and refresh the rollups incrementally")
+    args = parser.parse_args()
+
+    if args.append:
+        table, file_path = args.append
+        if table not in LOADERS:
+            parser.error(f"unknown table '{table}' (expected one of {', '.join(LOADERS)})")
+        try:
+            append_data(table, file_path)
+        except (OSError, sqlite3.Error, ValueError) as e:
+            print(f"Error appending data: {e}")
+        return
+
     if os.path.exists(DB_NAME):
         os.remove(DB_NAME)
         
@@ -125,8 +180,15 @@ def main():
         print("Data import completed successfully.")
     except Exception as e:
         print(f"Error importing data: {e}")
+        return
     finally:
         conn.close()
 
+    try:
+        build_rollups()
+        build_indexes()
+    except sqlite3.Error as e:
+        print(f"Error building rollups/indexes: {e}")
+
 if __name__ == "__main__":
     main()
@@ -1,94 +1,85 @@
 import os
 import glob
 import re
-from src.embeddings.gemini import GeminiEmbedding
+import time
+import argparse
+from typing import Any, Dict, List, Tuple
+from src.agents.base_agent import BaseAgentWrapper
+from src.embeddings.batching import BatchEmbedder
 from src.vector_store.faiss_store import FaissStore
+from src.vector_store.column_index import UNIFIED_COLUMN_INDEX, ColumnTableMap
+from src.vector_store.manifest import IngestionManifest
+from src.database.rollups import built_rollups, rollup_documents
 
 # Configuration
 PROCESSED_DATA_DIR = 'Sales Dataset/Processed_data'
+DB_PATH = 'Database/iris.db'
 TABLE_COLLECTION_NAME = 'table_descriptions'
 
 def sanitize_collection_name(name: str) -> str:
     """Sanitizes string to be a valid collection name (safe for filenames)."""
     return re.sub(r'[^a-zA-Z0-9]', '_', name).lower()
 
-def ingest_all_data():
-    print(f"--- Starting Full Ingestion (FAISS) ---")
-    
-    # Initialize Services
-    embedding_service = GeminiEmbedding()
-    
-    # Table Description Store
-    # We use one index for all table descriptions
-    table_store = FaissStore(
-        index_name=TABLE_COLLECTION_NAME, 
-        embedding_function=embedding_service,
-        folder_path="faiss_db" 
-    )
-    
-    if not os.path.exists(PROCESSED_DATA_DIR):
-        print(f"Directory not found: {PROCESSED_DATA_DIR}")
-        return
+def get_embedding_service(backend: str = "gemini", dim: int = None):
+    """
+    Returns the embedding backend ('gemini' or the offline 'fake').
+    :param dim: Requested vector width (Gemini output_dimensionality); None keeps the model default.
+    """
+    if backend == "fake":
+        from src.embeddings.fake import FakeEmbedding
+        return FakeEmbedding(dim=dim or 768)
+    from src.embeddings.gemini import GeminiEmbedding
+    return GeminiEmbedding(output_dimensionality=dim)
+
+def collect_documents(processed_dir: str = PROCESSED_DATA_DIR) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    """
+    Stage 1: Reads every table and column description from disk, plus the generated
+    descriptions of the rollup tables in the database.
+    Returns (table documents, column documents per table).
+    """
+    table_docs = []
+    column_docs = {}
 
-    subdirs = [d for d in os.listdir(PROCESSED_DATA_DIR) if os.path.isdir(os.path.join(PROCESSED_DATA_DIR, d))]
-    
+    subdirs = [d for d in os.listdir(processed_dir) if os.path.isdir(os.path.join(processed_dir, d))]
     print(f"Found {len(subdirs)} tables to process: {subdirs}")
-    
+
     for table_name in subdirs:
-        print(f"\n--- Processing Table: {table_name} ---")
-        table_dir = os.path.join(PROCESSED_DATA_DIR, table_name)
-        
-        # 1. Process Table Description
+        table_dir = os.path.join(processed_dir, table_name)
+
+        # 1. Table Description
         table_desc_file = os.path.join(table_dir, f"{table_name}_desc.txt")
-        
         if os.path.exists(table_desc_file):
             with open(table_desc_file, 'r', encoding='utf-8') as f:
                 content = f.read()
-                
-            # Add to table_store
-            doc = {
+            table_docs.append({
                 'content': content,
                 'metadata': {
                     "type": "table",
                     "table_name": table_name,
                     "source": table_desc_file
                 }
-            }
-            print(f"Ingesting table description for {table_name}...")
-            table_store.add_documents([doc])
+            })
         else:
             print(f"Warning: Table description file not found: {table_desc_file}")
 
-        # 2. Process Column Descriptions
-        # Create/Load specific FAISS index for this table's columns
-        safe_table_name = sanitize_collection_name(table_name)
-        column_index_name = f"columns_{safe_table_name}"
-        
-        column_store = FaissStore(
-            index_name=column_index_name,
-            embedding_function=embedding_service,
-            folder_path="faiss_db"
-        )
-        
+        # 2. Column Descriptions
         # Get all _desc.txt files except the table description
         all_files = glob.glob(os.path.join(table_dir, "*_desc.txt"))
         column_files = [f for f in all_files if os.path.basename(f) != f"{table_name}_desc.txt"]
-        
+
         if not column_files:
             print(f"No column description files found for {table_name}.")
             continue
-            
-        print(f"Found {len(column_files)} columns.")
-        
-        column_docs = []
-        for file_path in column_files:
+
+        docs = []
+        for file_path in sorted(column_files):
             filename = os.path.basename(file_path)
             column_name = filename.replace('_desc.txt', '')
-            
+
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-                
-            column_docs.append({
+
+            docs.append({
                 'content': content,
                 'metadata': {
                     "type": "column",
@@ -97,14 +88,200 @@ def ingest_all_data():
                     "source": file_path
                 }
             })
-            
-        # Batch add columns
-        if column_docs:
-            print(f"Ingesting {len(column_docs)} columns into '{column_index_name}'...")
-            column_store.add_documents(column_docs)
-            print(f"Completed columns for {table_name}")
+        column_docs[table_name] = docs
+
+    # Rollup tables built by import_data.py, so table selection can pick them for aggregates
+    rollup_tables, rollup_columns = rollup_documents(built_rollups(DB_PATH))
+    if rollup_tables:
+        print(f"Adding {len(rollup_tables)} rollup tables: {[doc['metadata']['table_name'] for doc in rollup_tables]}")
+    table_docs.extend(rollup_tables)
+    column_docs.update(rollup_columns)
+
+    return table_docs, column_docs
+
+def remove_all_indices(folder_path: str = "faiss_db"):
+    """Deletes every index file (and sidecar) in the FAISS folder."""
+    folder = FaissStore.resolve_folder(folder_path)
+    if not os.path.exists(folder):
+        return
+    for pattern in ("*.index", "*.meta.sqlite", "*.faiss", "*.pkl", "*.tables.json"):
+        for path in glob.glob(os.path.join(folder, pattern)):
+            os.remove(path)
+
+def index_settings(index_name: str) -> Dict[str, Any]:
+    """Index layout (factory string + metric) for an index, from the agent config that searches it."""
+    agent_name = "table_selection" if index_name == TABLE_COLLECTION_NAME else "column_selection"
+    config = BaseAgentWrapper._load_config_static(agent_name) or {}
+    return {'index_factory': config.get('index_factory', "Flat"), 'metric': config.get('metric', "l2")}
+
+def report_compression(vectors: List[List[float]], k: int = 10):
+    """Prints memory saved and recall@k against a flat index for the configured and common compact layouts."""
+    from src.vector_store.compression import evaluate_layout
+    if len(vectors) < 2:
+        print("Not enough embedded descriptions for a compression report (use --rebuild).")
+        return
+    settings = index_settings("columns")
+    rerank = (BaseAgentWrapper._load_config_static("column_selection") or {}).get('rerank_k_factor')
+    layouts = list(dict.fromkeys([settings['index_factory'], "SQfp16", "SQ8"]))
+    # PQ needs enough vectors to train its 256-entry codebooks
+    if len(vectors) >= 1000:
+        layouts.append("PQ32,RFlat")
+    dims = [None] + [d for d in (256, 128) if d < len(vectors[0])]
 
-    print("\n--- Ingestion Complete ---")
+    print(f"\n--- Compression report ({len(vectors)} vectors, metric={settings['metric']}) ---")
+    for dim in dims:
+        for layout in layouts:
+            report = evaluate_layout(vectors, layout, metric=settings['metric'], k=k, dim=dim, rerank_k_factor=rerank)
+            print(f"  {layout:<12} dim={report['dim']:<4} "
+                  f"{report['bytes_compressed'] / 1024:8.1f} KiB (flat {report['bytes_flat'] / 1024:.1f} KiB, "
+                  f"saved {report['saved']:6.1%})  recall@{k}={report[f'recall@{k}']:.3f}")
+
+def column_index_name(table_name: str, unified_columns: bool) -> str:
+    return UNIFIED_COLUMN_INDEX if unified_columns else f"columns_{sanitize_collection_name(table_name)}"
+
+def write_changes(upserts: Dict[str, List[Tuple[int, List[float], Dict[str, Any]]]], deletes: Dict[str, List[int]], embedding_service):
+    """
+    Stage 3: Applies deletions and upserts, writing every touched index once.
+    :param upserts: index name -> list of (vector id, vector, document).
+    :param deletes: index name -> vector ids to remove.
+    """
+    for index_name in sorted(set(upserts) | set(deletes)):
+        store = FaissStore(
+            index_name=index_name,
+            embedding_function=embedding_service,
+            folder_path="faiss_db",
+            **index_settings(index_name)
+        )
+        removed = deletes.get(index_name, [])
+        items = upserts.get(index_name, [])
+        print(f"Updating '{index_name}': {len(items)} upserted, {len(removed)} removed...")
+        store.delete_vectors(removed, persist=False)
+        if items:
+            store.upsert_vectors(
+                [vector for _, vector, _ in items],
+                [doc['metadata'] for _, _, doc in items],
+                ids=[vector_id for vector_id, _, _ in items],
+                contents=[doc['content'] for _, _, doc in items],
+                persist=False
+            )
+        store.save_local()
+
+def ingest_all_data(unified_columns: bool = False, backend: str = "gemini", max_workers: int = 4,
+                    requests_per_minute: float = None, batch_size: int = 100, rebuild: bool = False,
+                    dim: int = None, compression_report: bool = False):
+    """
+    Ingests table and column descriptions into FAISS as a three-stage pipeline:
+    gather all descriptions, embed them in parallel batches (rate limited, with retry),
+    then write all indices in one final pass.
+    A content-hash manifest makes re-runs incremental and idempotent: only new or
+    changed descriptions are embedded and upserted, and deleted files are removed.
+    :param unified_columns: Put every column into one index ('columns_all') instead of one index per table.
+    :param backend: Embedding backend: 'gemini' or 'fake' (offline, deterministic).
+    :param max_workers: Number of embedding batches in flight.
+    :param requests_per_minute: Embedding API request budget (None = unlimited).
+    :param batch_size: Texts per embedding request.
+    :param rebuild: Ignore the manifest and rebuild every index from scratch.
+    :param dim: Embedding width (defaults to `output_dimensionality` in the table_selection config).
+    :param compression_report: Print memory saved / recall@k of compact layouts for the vectors embedded in this run.
+    """
+    print(f"--- Starting Ingestion (FAISS) ---")
+    start_time = time.time()
+
+    if not os.path.exists(PROCESSED_DATA_DIR):
+        print(f"Directory not found: {PROCESSED_DATA_DIR}")
+        return
+
+    if dim is None:
+        dim = (BaseAgentWrapper._load_config_static("table_selection") or {}).get('output_dimensionality')
+    embedding_service = get_embedding_service(backend, dim)
+    embedding = {'model': embedding_service.model_name, 'dim': dim}
+
+    manifest = IngestionManifest.load("faiss_db")
+    if manifest.exists and manifest.embedding and manifest.embedding != embedding:
+        # Vectors of another model/width cannot share an index with the new ones
+        print(f"Embedding changed ({manifest.embedding} -> {embedding}).")
+        rebuild = True
+    if rebuild or not manifest.exists:
+        # Indices written without a manifest cannot be reconciled: start from scratch
+        print("No manifest found (or rebuild requested): rebuilding all indices.")
+        remove_all_indices("faiss_db")
+        manifest = IngestionManifest(manifest.path)
+    manifest.embedding = embedding
+
+    # 1. Gather
+    table_docs, column_docs = collect_documents(PROCESSED_DATA_DIR)
+    targets = [(TABLE_COLLECTION_NAME, doc) for doc in table_docs]
+    for table_name, docs in column_docs.items():
+        targets.extend((column_index_name(table_name, unified_columns), doc) for doc in docs)
+
+    plan = manifest.plan({doc['metadata']['source']: (index_name, doc['content']) for index_name, doc in targets})
+    to_upsert = set(plan['upsert'])
+    pending = [(index_name, doc) for index_name, doc in targets if doc['metadata']['source'] in to_upsert]
+    print(f"{len(pending)} new/changed, {len(plan['unchanged'])} unchanged, {len(plan['removed'])} removed.")
+
+    # 2. Embed (only what changed)
+    embedder = BatchEmbedder(
+        embedding_service,
+        batch_size=batch_size,
+        max_workers=max_workers,
+        requests_per_minute=requests_per_minute
+    )
+    texts = [doc['content'] for _, doc in pending]
+    print(f"Embedding {len(texts)} descriptions (batch_size={batch_size}, workers={max_workers}, rpm={requests_per_minute})...")
+    vectors = embedder.embed(texts)
+
+    # Stable ids: reuse the manifest id when a document stays in the same index
+    table_map = ColumnTableMap.load(folder_path="faiss_db")
+    upserts: Dict[str, List[Tuple[int, List[float], Dict[str, Any]]]] = {}
+    for (index_name, doc), vector in zip(pending, vectors):
+        source = doc['metadata']['source']
+        entry = manifest.files.get(source)
+        if index_name == UNIFIED_COLUMN_INDEX:
+            table_id = table_map.table_id_for(doc['metadata']['table_name'])
+            doc['metadata']['table_id'] = table_id
+        if entry is not None and entry['index'] == index_name:
+            vector_id = entry['id']
+        elif index_name == UNIFIED_COLUMN_INDEX:
+            vector_id = ColumnTableMap.column_id(table_id, manifest.allocate_id(f"{index_name}:{table_id}"))
+        else:
+            vector_id = manifest.allocate_id(index_name)
+        upserts.setdefault(index_name, []).append((vector_id, vector, doc))
+        manifest.record(source, index_name, vector_id, doc['content'])
+
+    # 3. Write
+    write_changes(upserts, plan['delete'], embedding_service)
+    if unified_columns:
+        table_map.save(folder_path="faiss_db")
+    manifest.forget(plan['removed'])
+    manifest.save()
+
+    if compression_report:
+        report_compression(vectors)
+
+    print(f"\n--- Ingestion Complete ({len(texts)} descriptions embedded in {time.time() - start_time:.1f}s) ---")
 
 if __name__ == "__main__":
-    ingest_all_data()
+    parser = argparse.ArgumentParser(description="Ingest table/column descriptions into FAISS.")
+    parser.add_argument("--unified-columns", action="store_true",
+                        help=f"Store all columns in a single '{UNIFIED_COLUMN_INDEX}' index with per-table id ranges.")
+    parser.add_argument("--backend", choices=["gemini", "fake"], default="gemini",
+                        help="Embedding backend ('fake' is offline and deterministic).")
+    parser.add_argument("--workers", type=int, default=4, help="Embedding batches in flight.")
+    parser.add_argument("--rpm", type=float, default=None, help="Max embedding requests per minute.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Texts per embedding request.")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the manifest and rebuild all indices.")
+    parser.add_argument("--dim", type=int, default=None,
+                        help="Embedding width (e.g. 256). Changing it rebuilds all indices.")
+    parser.add_argument("--report-compression", action="store_true",
+                        help="Report memory saved and recall@k of compact index layouts vs a flat index.")
+    args = parser.parse_args()
+    ingest_all_data(
+        unified_columns=args.unified_columns,
+        backend=args.backend,
+        max_workers=args.workers,
+        requests_per_minute=args.rpm,
+        batch_size=args.batch_size,
+        rebuild=args.rebuild,
+        dim=args.dim,
+        compression_report=args.report_compression
+    )
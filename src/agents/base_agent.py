@@ -1,4 +1,5 @@
 import os
+import asyncio
 import yaml
 from google import genai
 from google.genai import types
@@ -8,6 +9,7 @@ from pydantic import ConfigDict
 
 # Import ADK classes
 from google.adk.agents import LlmAgent, BaseAgent as AdkBaseAgent
+from src.cache.llm_cache import get_llm_cache
 
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(__file__), '../../secrets/.env'))
@@ -45,8 +47,22 @@ class BaseAgentWrapper:
             self._model_name = self._config.get('llm_model', 'gemini-1.5-flash-latest') # Updated model name format often preferred in v2? or just use full resource name.
             # Using standard model names.
 
-    def get_llm_response(self, prompt: str, temperature: float = 0.0) -> str:
-        """Generates a response from the LLM (v2)."""
+        # Per-agent response cache: `llm_cache: {enabled: true, ttl_seconds: ...}` in config.yaml
+        cache_config = self._config.get('llm_cache') or {}
+        self._llm_cache = get_llm_cache() if cache_config.get('enabled', False) else None
+        self._llm_cache_ttl = cache_config.get('ttl_seconds')
+
+    def get_llm_response(self, prompt: str, temperature: float = 0.0, use_cache: bool = True) -> str:
+        """
+        Generates a response from the LLM (v2).
+        Identical (model, temperature, prompt) calls are answered from the response cache if enabled.
+        """
+        cache = self._llm_cache if use_cache else None
+        if cache is not None:
+            cached = cache.get(self._model_name, temperature, prompt, ttl_seconds=self._llm_cache_ttl)
+            if cached is not None:
+                return cached
+        
         response = self._client.models.generate_content(
             model=self._model_name,
             contents=prompt,
@@ -54,8 +70,44 @@ class BaseAgentWrapper:
                 temperature=temperature
             )
         )
+        if cache is not None and response.text:
+            cache.put(self._model_name, temperature, prompt, response.text)
         return response.text
 
+    async def get_llm_response_async(self, prompt: str, temperature: float = 0.0, use_cache: bool = True) -> str:
+        """
+        Async variant of get_llm_response using the genai async client.
+        Response cache reads/writes (SQLite) run in the default executor.
+        """
+        loop = asyncio.get_running_loop()
+        cache = self._llm_cache if use_cache else None
+        if cache is not None:
+            cached = await loop.run_in_executor(
+                None, lambda: cache.get(self._model_name, temperature, prompt, ttl_seconds=self._llm_cache_ttl)
+            )
+            if cached is not None:
+                return cached
+        
+        response = await self._client.aio.models.generate_content(
+            model=self._model_name,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                temperature=temperature
+            )
+        )
+        if cache is not None and response.text:
+            await loop.run_in_executor(None, cache.put, self._model_name, temperature, prompt, response.text)
+        return response.text
+
+    def invalidate_llm_response(self, prompt: str, temperature: float = 0.0) -> bool:
+        """
+        Drops the cached response for a prompt, e.g. when the answer turned out to be wrong,
+        so the next identical call goes to the model again.
+        """
+        if self._llm_cache is None:
+            return False
+        return self._llm_cache.invalidate(self._model_name, temperature, prompt)
+
 class CustomLlmAgent(LlmAgent, BaseAgentWrapper):
     model_config = ConfigDict(extra='allow')
     
@@ -1,7 +1,11 @@
 import sys
 import os
+import asyncio
 import re
-from typing import List, Dict, Any
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, List, Dict, Any, Optional
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
@@ -9,53 +13,246 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../.
 # CustomBaseAgent for logic
 from src.agents.base_agent import CustomBaseAgent
 from src.embeddings.gemini import GeminiEmbedding
-from src.vector_store.faiss_store import FaissStore
+from src.embeddings.cache import CachedEmbedding
+from src.vector_store.registry import get_store
+from src.vector_store.column_index import UNIFIED_COLUMN_INDEX, ColumnTableMap
+from src.vector_store.manifest import IngestionManifest
 
 class ColumnSelectionAgent(CustomBaseAgent):
     def __init__(self):
         super().__init__(agent_name="column_selection")
-        self.embedding_service = GeminiEmbedding()
+        # Queries must have the width the indices were built with (recorded by ingestion)
+        dim = IngestionManifest.load("faiss_db").embedding_dim(default=self.config.get('output_dimensionality'))
+        # Cache in front of Gemini: repeated search terms never leave the process
+        self.embedding_service = CachedEmbedding(GeminiEmbedding(output_dimensionality=dim))
+        # Table ownership map of the unified index, tied to the store object it was loaded for
+        self._unified_store = None
+        self._table_map = None
+        self._unified_lock = threading.Lock()
+        # Bounded pool for per-table searches (FAISS releases the GIL while searching)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.config.get('max_workers', 8),
+            thread_name_prefix="column-selection"
+        )
         
     def _sanitize_collection_name(self, name: str) -> str:
         return re.sub(r'[^a-zA-Z0-9]', '_', name).lower()
 
-    def execute(self, tables: List[str], attributes: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    def _unified_snapshot(self):
+        """
+        Returns (unified store, its table map) as one consistent pair. Callers keep using the
+        pair they got, so a reload during a fan-out never mixes the old store with the new map.
+        """
+        with self._unified_lock:
+            store = get_store(UNIFIED_COLUMN_INDEX, self.embedding_service, folder_path="faiss_db")
+            if store is not self._unified_store:
+                # Index was (re)loaded: reload the table ownership map with it
+                self._table_map = ColumnTableMap.load(folder_path="faiss_db")
+                self._unified_store = store
+            return store, self._table_map
+
+    def _store_for(self, table: str):
+        """Store holding the table's columns (the unified store for every table in unified mode)."""
+        if self.config.get('unified_index', False):
+            return self._unified_snapshot()[0]
+        # Shared registry: no disk I/O unless the index changed on disk
+        collection_name = f"columns_{self._sanitize_collection_name(table)}"
+        return get_store(collection_name, self.embedding_service, folder_path="faiss_db")
+
+    def _fan_out(self, tables: List[str], fn: Callable[[str], Any]) -> Dict[str, Any]:
+        """
+        Runs `fn(table)` for every table and returns {table: result}.
+        With `parallel: true` the calls run in the bounded thread pool, so the slowest table sets
+        the latency; a table that raises, or is not done `table_timeout_seconds` after the
+        fan-out started, is dropped with a warning instead of failing the request.
+        A timed-out call still queued in the pool is cancelled; one already running cannot be
+        interrupted (FAISS searches are not cancellable), so it finishes in its worker thread and
+        its result is discarded.
+        """
+        results = {}
+        if not self.config.get('parallel', False) or len(tables) < 2:
+            for table in tables:
+                try:
+                    results[table] = fn(table)
+                except Exception as e:
+                    # Index might not exist
+                    print(f"    Warning: Could not search columns for table '{table}': {e}")
+            return results
+        
+        timeout = self.config.get('table_timeout_seconds')
+        deadline = time.monotonic() + timeout if timeout else None
+        futures = {table: self._pool.submit(fn, table) for table in tables}
+        for table, future in futures.items():
+            try:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                results[table] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                # Only stops calls that have not started yet
+                future.cancel()
+                print(f"    Warning: Column search for table '{table}' timed out after {timeout}s, skipping it")
+            except Exception as e:
+                print(f"    Warning: Could not search columns for table '{table}': {e}")
+        return results
+
+    def lexical_matches(self, tables: List[str], attributes: List[str]) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        """
+        Attributes matching a column name of a selected table lexically (no embedding needed),
+        mapped to {table: matches}.
+        """
+        if not self.config.get('lexical', True) or not attributes:
+            return {}
+        threshold = self.config.get('lexical_threshold', 0.9)
+        top_k = self.config.get('top_k', 5)
+        unified = self.config.get('unified_index', False)
+        
+        def match_table(table: str) -> Dict[str, List[Dict[str, Any]]]:
+            lexical = self._store_for(table).lexical_index()
+            hits = {}
+            for attribute in attributes:
+                found = lexical.match(attribute, threshold=threshold, table_names=[table] if unified else None)[:top_k]
+                if found:
+                    hits[attribute] = found
+            return hits
+        
+        # Per-table indices are opened (and their lexical indices built) concurrently
+        matches: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for table, hits in self._fan_out(tables, match_table).items():
+            for attribute, found in hits.items():
+                matches.setdefault(attribute, {})[table] = found
+        return matches
+
+    def execute(self, tables: List[str], attributes: List[str], attribute_vectors: Optional[List[Optional[List[float]]]] = None,
+                matches: Optional[Dict[str, Dict[str, List[Dict[str, Any]]]]] = None) -> Dict[str, List[Dict[str, Any]]]:
         """
         Selects relevant columns.
+        Attributes matching a column name lexically are answered without embedding; the rest go to FAISS.
+        If `attribute_vectors` are given (one per attribute, None allowed) they are reused instead of re-embedding,
+        and `matches` (from lexical_matches) saves matching the attributes again.
         """
-        selected_columns = {}
+        selected_columns: Dict[str, List[Dict[str, Any]]] = {}
         top_k = self.config.get('top_k', 5)
-        distance_threshold = self.config.get('distance_threshold', 1.2) 
         
         print(f"ColumnSelection: Searching attributes {attributes} in tables {tables}")
         
-        for table in tables:
-            collection_name = f"columns_{self._sanitize_collection_name(table)}"
+        if not attributes:
+            return selected_columns
+        
+        if matches is None:
+            matches = self.lexical_matches(tables, attributes)
+        for attribute, per_table in matches.items():
+            for table, hits in per_table.items():
+                self._collect_columns(selected_columns.setdefault(table, []), hits, store=None)
+        
+        pending = [i for i, attribute in enumerate(attributes) if attribute not in matches]
+        if pending:
+            # Embed every remaining attribute once, not once per (table, attribute) pair
+            terms = [attributes[i] for i in pending]
+            vectors = [attribute_vectors[i] if attribute_vectors is not None else None for i in pending]
+            missing = [j for j, vector in enumerate(vectors) if vector is None]
+            if missing:
+                for j, vector in zip(missing, self.embedding_service.generate_embeddings([terms[j] for j in missing])):
+                    vectors[j] = vector
             
-            try:
-                store = FaissStore(index_name=collection_name, embedding_function=self.embedding_service, folder_path="faiss_db")
-                table_columns = []
+            if self.config.get('unified_index', False):
+                self._execute_unified(tables, terms, vectors, top_k, selected_columns)
+            else:
+                def search_table(table: str) -> List[Dict[str, Any]]:
+                    # Works on its own copy of the table's columns, merged below in table order
+                    store = self._store_for(table)
+                    self._apply_search_params(store)
+                    table_columns = list(selected_columns.get(table, []))
+                    for term, results in zip(terms, store.search_by_vectors(vectors, k=top_k)):
+                        if self.config.get('hybrid', False):
+                            results = store.lexical_index().hybrid(term, results, k=top_k)
+                        self._collect_columns(table_columns, results, store)
+                    return table_columns
                 
-                for attr in attributes:
-                    results = store.search_similarity(attr, k=top_k)
-                    
-                    for res in results:
-                        if res['score'] <= distance_threshold:
-                            col_info = {
-                                "name": res['payload']['column_name'],
-                                "description": res['content'],
-                                "score": res['score']
-                            }
-                            # Check duplicates by name
-                            if not any(c['name'] == col_info['name'] for c in table_columns):
-                                table_columns.append(col_info)
-                                print(f"    - Found column: {col_info['name']} (Distance: {res['score']:.4f})")
-                
-                if table_columns:
-                    selected_columns[table] = table_columns
-                    
-            except Exception as e:
-                # Index might not exist
-                print(f"    Warning: Could not search columns for table '{table}': {e}")
-                
-        return selected_columns
+                selected_columns.update(self._fan_out(tables, search_table))
+        
+        # Keep the caller's table order and drop tables without matches
+        return {t: selected_columns[t] for t in tables if selected_columns.get(t)}
+
+    async def aexecute(self, tables: List[str], attributes: List[str], attribute_vectors: Optional[List[Optional[List[float]]]] = None,
+                       matches: Optional[Dict[str, Dict[str, List[Dict[str, Any]]]]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Async variant of execute: attributes without a lexical match are embedded with the async
+        client, then the (CPU-bound) FAISS searches run in the default executor.
+        """
+        loop = asyncio.get_running_loop()
+        if matches is None:
+            matches = await loop.run_in_executor(None, self.lexical_matches, tables, attributes)
+        vectors = list(attribute_vectors) if attribute_vectors is not None else [None] * len(attributes)
+        missing = [i for i, attribute in enumerate(attributes) if attribute not in matches and vectors[i] is None]
+        if missing:
+            for i, vector in zip(missing, await self.embedding_service.agenerate_embeddings([attributes[i] for i in missing])):
+                vectors[i] = vector
+        return await loop.run_in_executor(None, self.execute, tables, attributes, vectors, matches)
+
+    def _apply_search_params(self, store):
+        store.set_search_params(
+            ef_search=self.config.get('ef_search'),
+            nprobe=self.config.get('nprobe'),
+            rerank_k_factor=self.config.get('rerank_k_factor')
+        )
+
+    def _accepts(self, res: Dict[str, Any], store) -> bool:
+        # L2 index: distance threshold (lower is better). Cosine index: similarity threshold.
+        # Hybrid results found only lexically have no vector score and pass on name confidence.
+        distance_threshold = self.config.get('distance_threshold', 1.2)
+        similarity_threshold = self.config.get('similarity_threshold', 0.60)
+        if res['score'] is not None and store.is_match(res['score'], distance_threshold, similarity_threshold):
+            return True
+        return res.get('lexical_score', 0.0) >= self.config.get('hybrid_lexical_threshold', 0.75)
+
+    def _collect_columns(self, table_columns: List[Dict[str, Any]], results: List[Dict[str, Any]], store):
+        """
+        Appends results passing the threshold to `table_columns`, skipping duplicate names.
+        With `store=None` the results are lexical matches, accepted as they are.
+        """
+        for res in results:
+            if store is None or self._accepts(res, store):
+                col_info = {
+                    "name": res['payload']['column_name'],
+                    "description": res['content'],
+                    "score": res['score']
+                }
+                # Check duplicates by name
+                if not any(c['name'] == col_info['name'] for c in table_columns):
+                    table_columns.append(col_info)
+                    if store is None:
+                        print(f"    - Found column: {col_info['name']} (Lexical: {res['score']:.2f})")
+                    elif res['score'] is None:
+                        print(f"    - Found column: {col_info['name']} (Lexical: {res['lexical_score']:.2f})")
+                    else:
+                        print(f"    - Found column: {col_info['name']} (Score: {res['score']:.4f})")
+
+    def _execute_unified(self, tables: List[str], terms: List[str], vectors: List[List[float]], top_k: int,
+                         selected_columns: Dict[str, List[Dict[str, Any]]]):
+        """
+        Answers every (table, attribute) pair from the unified column index with one search per
+        selected table, restricted to the id range that table owns, so each table gets its own
+        top_k instead of sharing one result list with tables that score higher.
+        """
+        try:
+            if not tables:
+                return
+            store, table_map = self._unified_snapshot()
+            self._apply_search_params(store)
+        except Exception as e:
+            print(f"    Warning: Could not search unified column index: {e}")
+            return
+        
+        missing = [t for t in tables if t not in table_map.tables]
+        if missing:
+            print(f"    Warning: Tables not in '{UNIFIED_COLUMN_INDEX}': {missing}")
+        
+        def search_table(table: str) -> List[Dict[str, Any]]:
+            table_columns = list(selected_columns.get(table, []))
+            all_results = store.search_by_vectors(vectors, k=top_k, id_ranges=table_map.id_ranges([table]))
+            for term, results in zip(terms, all_results):
+                if self.config.get('hybrid', False):
+                    results = store.lexical_index().hybrid(term, results, k=top_k, table_names=[table])
+                self._collect_columns(table_columns, results[:top_k], store)
+            return table_columns
+        
+        selected_columns.update(self._fan_out([t for t in tables if t not in missing], search_table))
@@ -20,7 +20,15 @@ class EntityExtractionAgent(CustomLlmAgent):
         
         # We can use the helper get_llm_response since we are a CustomLlmAgent
         response_text = self.get_llm_response(prompt, temperature=0.0)
-        
+        return self._parse(response_text)
+
+    async def aexecute(self, user_query: str) -> dict:
+        """Async variant of execute."""
+        prompt = self.config['prompt_template'].format(user_query=user_query)
+        response_text = await self.get_llm_response_async(prompt, temperature=0.0)
+        return self._parse(response_text)
+
+    def _parse(self, response_text: str) -> dict:
         cleaned_text = response_text.replace('```json', '').replace('```', '').strip()
         
         try:
@@ -1,29 +1,140 @@
 import sys
 import os
-from typing import List, Dict, Any, Union
+import asyncio
+import functools
+from typing import List, Dict, Any, Optional, Union
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
 
 # CustomBaseAgent (No LLM)
 from src.agents.base_agent import CustomBaseAgent
-from src.database.sqlite_client import SQLiteClient
+from src.database.sqlite_client import SQLiteClient, BoundedStream
+from src.database.query_guard import QueryGuard, QueryLimits
+from src.database.result_cache import ResultCache
+from src.database.index_advisor import QueryLog
 
 class SQLExecutionAgent(CustomBaseAgent):
     def __init__(self):
         super().__init__(agent_name="sql_execution")
         # Initialize DB Client
         db_path = os.path.join(os.path.dirname(__file__), '../../../', self.config.get('db_path', 'Database/iris.db'))
-        self.db_client = SQLiteClient(db_path=os.path.abspath(db_path))
+        # Generated SQL only reads: pooled read-only connections, so concurrent queries run in parallel
+        self.db_client = SQLiteClient(
+            db_path=os.path.abspath(db_path),
+            read_only=self.config.get('read_only', True),
+            pool_options=self.config.get('pool', {}),
+            limits=QueryLimits(**self.config.get('limits', {}))
+        )
         self.db_client.connect()
+        # Different questions often produce the same SQL: reuse its result until the data changes
+        cache_config = self.config.get('result_cache', {})
+        self.result_cache = None
+        if cache_config.get('enabled', True):
+            self.result_cache = ResultCache(
+                self.db_client.db_path,
+                max_bytes=cache_config.get('max_bytes', 64 * 1024 * 1024),
+                max_entry_bytes=cache_config.get('max_entry_bytes', 4 * 1024 * 1024)
+            )
+        # Executed SQL is the workload of the index advisor (python -m src.database.index_advisor)
+        log_config = self.config.get('query_log', {})
+        self.query_log = None
+        if log_config.get('enabled', True):
+            log_path = os.path.join(os.path.dirname(__file__), '../../../', log_config.get('path', 'Database/query_log.jsonl'))
+            self.query_log = QueryLog(os.path.abspath(log_path), max_bytes=log_config.get('max_bytes', 5 * 1024 * 1024))
 
     def execute(self, sql_query: str) -> Union[List[Dict[str, Any]], str]:
         """
         Executes the SQL query.
+        Returns at most the configured row/byte budget of rows (see execute_bounded).
         """
+        result = self.execute_bounded(sql_query)
+        return result if isinstance(result, str) else result['rows']
+
+    def execute_bounded(self, sql_query: str, guard: Optional[QueryGuard] = None) -> Union[Dict[str, Any], str]:
+        """
+        Executes the SQL query within the configured `max_rows` / `max_bytes` budget.
+        Returns the SQLiteClient.execute_bounded dict ('rows', 'truncated', 'time_to_first_row', ...)
+        or an "Error: ..." string. Queries stopped by the configured `limits` give
+        "Error: [timeout|step_budget|cost] ... Hint: ..." for the regeneration stage.
+        Results come from the result cache when the same (normalized) SQL already ran
+        on the current data; 'cached' tells which.
+        """
+        max_rows = self.config.get('max_rows', 1000)
+        max_bytes = self.config.get('max_bytes', 2_000_000)
+        if self.result_cache is not None:
+            cached = self.result_cache.get(sql_query, (max_rows, max_bytes))
+            if cached is not None:
+                print(f"SQLExecution: Result cache hit: {sql_query}")
+                # Logged like an execution: the most frequent queries are the ones served from here
+                self._log(sql_query, cached, cached=True)
+                return dict(cached, cached=True)
+        version = self.result_cache.version() if self.result_cache is not None else None
         print(f"SQLExecution: Executing query: {sql_query}")
         try:
-            results = self.db_client.execute_query(sql_query)
-            return results
+            result = self.db_client.execute_bounded(
+                sql_query,
+                max_rows=max_rows,
+                max_bytes=max_bytes,
+                chunk_size=self.config.get('chunk_size', 500),
+                guard=guard
+            )
         except Exception as e:
             return f"Error: {str(e)}"
+        result['cached'] = False
+        self._log(sql_query, result, cached=False)
+        if self.result_cache is not None:
+            self.result_cache.put(sql_query, result, (max_rows, max_bytes), version=version)
+        if result['truncated']:
+            print(f"SQLExecution: Result truncated at {result['row_count']} rows ({result['bytes']} bytes)")
+        return result
+
+    def _log(self, sql_query: str, result: Dict[str, Any], cached: bool):
+        """Appends the query to the query log (cache hits with the time of the run they reuse)."""
+        if self.query_log is None:
+            return
+        try:
+            self.query_log.record(sql_query, result['elapsed'], result['row_count'], cached=cached)
+        except OSError as e:
+            print(f"SQLExecution: Could not log query: {e}")
+
+    def execute_stream(self, sql_query: str, max_rows: Optional[int] = None, max_bytes: Optional[int] = None) -> BoundedStream:
+        """
+        Streams the rows of the SQL query in chunks of `chunk_size`, within the configured
+        `max_rows` / `max_bytes` budget unless others are given. The stream stops at the budget
+        and then has `truncated` set; `time_to_first_row` is set once the first chunk arrived.
+        Errors are raised, not returned.
+        """
+        print(f"SQLExecution: Streaming query: {sql_query}")
+        return self.db_client.stream_bounded(
+            sql_query,
+            max_rows=max_rows or self.config.get('max_rows', 1000),
+            max_bytes=max_bytes or self.config.get('max_bytes', 2_000_000),
+            chunk_size=self.config.get('chunk_size', 500)
+        )
+
+    async def aexecute(self, sql_query: str) -> Union[List[Dict[str, Any]], str]:
+        """Async variant of execute: the SQLite work runs in the default executor."""
+        result = await self.aexecute_bounded(sql_query)
+        return result if isinstance(result, str) else result['rows']
+
+    async def aexecute_bounded(self, sql_query: str) -> Union[Dict[str, Any], str]:
+        """
+        Async variant of execute_bounded.
+        Cancelling the awaiting task also stops the query in its executor thread.
+        """
+        guard = QueryGuard(self.db_client.limits)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self.execute_bounded, sql_query, guard)
+            )
+        except asyncio.CancelledError:
+            guard.cancel()
+            raise
+
+    def aexecute_stream(self, sql_query: str, max_rows: Optional[int] = None, max_bytes: Optional[int] = None) -> BoundedStream:
+        """
+        Async variant of execute_stream: iterated with `async for`, each chunk is fetched in
+        the default executor. The budget figures are read from the returned stream.
+        """
+        return self.execute_stream(sql_query, max_rows, max_bytes)
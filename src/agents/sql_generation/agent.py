@@ -16,6 +16,42 @@ class SQLGenerationAgent(CustomLlmAgent):
         """
         Generates SQL query based on schema and query.
         """
+        response = self.get_llm_response(self._build_prompt(user_query, schema_info), temperature=0.0)
+        return self._clean(response)
+
+    async def aexecute(self, user_query: str, schema_info: Dict[str, List[Dict[str, Any]]]) -> str:
+        """Async variant of execute."""
+        response = await self.get_llm_response_async(self._build_prompt(user_query, schema_info), temperature=0.0)
+        return self._clean(response)
+
+    def generate_fused(self, user_query: str, compact_schema: str) -> str:
+        """
+        Generates SQL in one call from the compact schema of the whole database
+        (no entity extraction or retrieval).
+        """
+        response = self.get_llm_response(self._build_fused_prompt(user_query, compact_schema), temperature=0.0)
+        return self._clean(response)
+
+    async def agenerate_fused(self, user_query: str, compact_schema: str) -> str:
+        """Async variant of generate_fused."""
+        response = await self.get_llm_response_async(self._build_fused_prompt(user_query, compact_schema), temperature=0.0)
+        return self._clean(response)
+
+    def invalidate(self, user_query: str, schema_info: Dict[str, List[Dict[str, Any]]]) -> bool:
+        """Drops the cached response behind `execute(user_query, schema_info)` (its SQL failed)."""
+        return self.invalidate_llm_response(self._build_prompt(user_query, schema_info), temperature=0.0)
+
+    def invalidate_fused(self, user_query: str, compact_schema: str) -> bool:
+        """Drops the cached response behind `generate_fused(user_query, compact_schema)` (its SQL failed)."""
+        return self.invalidate_llm_response(self._build_fused_prompt(user_query, compact_schema), temperature=0.0)
+
+    def _build_fused_prompt(self, user_query: str, compact_schema: str) -> str:
+        return self.config['fused_prompt_template'].format(
+            user_query=user_query,
+            schema=compact_schema
+        )
+
+    def _build_prompt(self, user_query: str, schema_info: Dict[str, List[Dict[str, Any]]]) -> str:
         schema_context = ""
         for table, columns in schema_info.items():
             col_list = ", ".join([col['name'] for col in columns])
@@ -23,12 +59,11 @@ class SQLGenerationAgent(CustomLlmAgent):
             for col in columns:
                 schema_context += f"  - {col['name']}: {col.get('description', '')[:50]}...\n"
                 
-        prompt = self.config['prompt_template'].format(
+        return self.config['prompt_template'].format(
             user_query=user_query,
             schema_context=schema_context
         )
-        
-        response = self.get_llm_response(prompt, temperature=0.0)
-        
-        sql = response.replace('```sql', '').replace('```', '').strip()
-        return sql
+
+    @staticmethod
+    def _clean(response: str) -> str:
+        return response.replace('```sql', '').replace('```', '').strip()
@@ -1,6 +1,6 @@
 import sys
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
@@ -12,23 +12,42 @@ class SQLRegenerationAgent(CustomLlmAgent):
     def __init__(self):
         super().__init__(agent_name="sql_regeneration")
 
-    def execute(self, user_query: str, old_sql: str, error_message: str, schema_info: Dict[str, List[Dict[str, Any]]]) -> str:
+    def execute(self, user_query: str, old_sql: str, error_message: str, schema_info: Dict[str, List[Dict[str, Any]]],
+                error_history: Optional[List[Dict[str, str]]] = None) -> str:
         """
         Regenerates SQL query based on error.
+        error_history: earlier failed attempts ({'sql', 'error'}), oldest first, so fixes already tried are not repeated.
         """
+        prompt = self._build_prompt(user_query, old_sql, error_message, schema_info, error_history)
+        response = self.get_llm_response(prompt, temperature=0.0)
+        return self._clean(response)
+
+    async def aexecute(self, user_query: str, old_sql: str, error_message: str, schema_info: Dict[str, List[Dict[str, Any]]],
+                       error_history: Optional[List[Dict[str, str]]] = None) -> str:
+        """Async variant of execute."""
+        prompt = self._build_prompt(user_query, old_sql, error_message, schema_info, error_history)
+        response = await self.get_llm_response_async(prompt, temperature=0.0)
+        return self._clean(response)
+
+    def _build_prompt(self, user_query: str, old_sql: str, error_message: str, schema_info: Dict[str, List[Dict[str, Any]]],
+                      error_history: Optional[List[Dict[str, str]]] = None) -> str:
         schema_context = ""
         for table, columns in schema_info.items():
             col_list = ", ".join([col['name'] for col in columns])
             schema_context += f"Table: {table}\nColumns: {col_list}\n\n"
+        
+        history = ""
+        for i, attempt in enumerate(error_history or [], 1):
+            history += f"Attempt {i}: {attempt['sql']}\n  Error: {attempt['error']}\n"
                 
-        prompt = self.config['prompt_template'].format(
+        return self.config['prompt_template'].format(
             user_query=user_query,
             old_sql=old_sql,
             error_message=error_message,
-            schema_context=schema_context
+            schema_context=schema_context,
+            error_history=history or "None"
         )
-        
-        response = self.get_llm_response(prompt, temperature=0.0)
-        
-        sql = response.replace('```sql', '').replace('```', '').strip()
-        return sql
+
+    @staticmethod
+    def _clean(response: str) -> str:
+        return response.replace('```sql', '').replace('```', '').strip()
@@ -1,6 +1,7 @@
 import sys
 import os
-from typing import List
+import asyncio
+from typing import Any, Dict, List, Optional
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
@@ -8,38 +9,139 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../.
 # Use CustomBaseAgent for non-LLM logic agents
 from src.agents.base_agent import CustomBaseAgent
 from src.embeddings.gemini import GeminiEmbedding
-from src.vector_store.faiss_store import FaissStore
+from src.embeddings.cache import CachedEmbedding
+from src.vector_store.registry import get_store
+from src.vector_store.manifest import IngestionManifest
 
 class TableSelectionAgent(CustomBaseAgent):
     def __init__(self):
         super().__init__(agent_name="table_selection")
-        self.embedding_service = GeminiEmbedding()
+        # Queries must have the width the indices were built with (recorded by ingestion)
+        dim = IngestionManifest.load("faiss_db").embedding_dim(default=self.config.get('output_dimensionality'))
+        # Cache in front of Gemini: repeated search terms never leave the process
+        self.embedding_service = CachedEmbedding(GeminiEmbedding(output_dimensionality=dim))
         
-        # FAISS Setup
-        collection_name = self.config.get('table_collection', 'table_descriptions')
-        self.store = FaissStore(index_name=collection_name, embedding_function=self.embedding_service, folder_path="faiss_db")
+        # FAISS Setup (index is loaded once per process by the shared registry)
+        self.collection_name = self.config.get('table_collection', 'table_descriptions')
 
-    def execute(self, entities: List[str]) -> List[str]:
+    @property
+    def store(self):
+        # Registry returns the cached store and reloads it only if the files on disk changed
+        return get_store(self.collection_name, self.embedding_service, folder_path="faiss_db")
+
+    def lexical_matches(self, entities: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Entities whose table is identified by name alone (no embedding needed), mapped to their matches.
+        """
+        if not self.config.get('lexical', True):
+            return {}
+        lexical = self.store.lexical_index()
+        threshold = self.config.get('lexical_threshold', 0.9)
+        top_k = self.config.get('top_k', 3)
+        matches = {}
+        for entity in entities:
+            hits = lexical.match(entity, threshold=threshold)[:top_k]
+            if hits:
+                matches[entity] = hits
+        return matches
+
+    def execute(self, entities: List[str], entity_vectors: Optional[List[Optional[List[float]]]] = None,
+                matches: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> List[str]:
         """
         Selects relevant tables based on extracted entities.
+        Entities matching a table name lexically are answered without embedding; the rest go to FAISS.
+        If `entity_vectors` are given (one per entity, None allowed) they are reused instead of re-embedding,
+        and `matches` (from lexical_matches) saves matching the entities again.
         """
         relevant_tables = set()
         top_k = self.config.get('top_k', 3)
-        # FAISS L2: Lower is better. 0 = identical.
-        # We'll use a distance threshold. Large distance = bad match.
-        distance_threshold = self.config.get('distance_threshold', 1.0) 
         
         print(f"TableSelection: Searching for {entities}")
         
-        for entity in entities:
-            # FAISS Store handles embedding internally via LangChain wrapper
-            results = self.store.search_similarity(entity, k=top_k)
-            
+        store = self.store
+        if matches is None:
+            matches = self.lexical_matches(entities)
+        for entity, hits in matches.items():
+            for res in hits:
+                relevant_tables.add(res['payload']['table_name'])
+                print(f"  - Found table: {res['payload']['table_name']} (Lexical: {res['score']:.2f})")
+        
+        pending = [i for i, entity in enumerate(entities) if entity not in matches]
+        if not pending:
+            return list(relevant_tables)
+        
+        vectors = [entity_vectors[i] if entity_vectors is not None else None for i in pending]
+        missing = [j for j, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # One batched embedding call for the entities without a lexical match
+            for j, vector in zip(missing, self.embedding_service.generate_embeddings([entities[pending[j]] for j in missing])):
+                vectors[j] = vector
+        
+        store.set_search_params(
+            ef_search=self.config.get('ef_search'),
+            nprobe=self.config.get('nprobe'),
+            rerank_k_factor=self.config.get('rerank_k_factor')
+        )
+        
+        # Single index.search over the (n_entities x dim) matrix
+        all_results = store.search_by_vectors(vectors, k=top_k)
+        
+        for i, results in zip(pending, all_results):
+            if self.config.get('hybrid', False):
+                results = store.lexical_index().hybrid(entities[i], results, k=top_k)
             for res in results:
-                # res has 'score' which is L2 distance
-                if res['score'] <= distance_threshold:
+                if self._accepts(res, store):
                     table_name = res['payload']['table_name']
                     relevant_tables.add(table_name)
-                    print(f"  - Found table: {table_name} (Distance: {res['score']:.4f})")
+                    print(f"  - Found table: {table_name} (Score: {self._format_score(res)})")
                     
         return list(relevant_tables)
+
+    def match_vector(self, vector: List[float], query: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Tables accepted for one query vector (best first), e.g. the embedding of the raw user query.
+        With `query` and `hybrid: true` the lexical ranking of the query text is fused in.
+        """
+        store = self.store
+        store.set_search_params(
+            ef_search=self.config.get('ef_search'),
+            nprobe=self.config.get('nprobe'),
+            rerank_k_factor=self.config.get('rerank_k_factor')
+        )
+        top_k = self.config.get('top_k', 3)
+        results = store.search_by_vectors([vector], k=top_k)[0]
+        if query is not None and self.config.get('hybrid', False):
+            results = store.lexical_index().hybrid(query, results, k=top_k)
+        return [res for res in results if self._accepts(res, store)]
+
+    async def aexecute(self, entities: List[str], entity_vectors: Optional[List[Optional[List[float]]]] = None,
+                       matches: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> List[str]:
+        """
+        Async variant of execute: entities without a lexical match are embedded with the async
+        client, then the (CPU-bound) FAISS search runs in the default executor.
+        """
+        loop = asyncio.get_running_loop()
+        if matches is None:
+            matches = await loop.run_in_executor(None, self.lexical_matches, entities)
+        vectors = list(entity_vectors) if entity_vectors is not None else [None] * len(entities)
+        missing = [i for i, entity in enumerate(entities) if entity not in matches and vectors[i] is None]
+        if missing:
+            for i, vector in zip(missing, await self.embedding_service.agenerate_embeddings([entities[i] for i in missing])):
+                vectors[i] = vector
+        return await loop.run_in_executor(None, self.execute, entities, vectors, matches)
+
+    def _accepts(self, res: Dict[str, Any], store) -> bool:
+        # L2 index: lower is better (0 = identical), so we use a distance threshold.
+        # Cosine index: higher is better, so we use the similarity threshold.
+        # Hybrid results found only lexically have no vector score and pass on name confidence.
+        distance_threshold = self.config.get('distance_threshold', 1.0)
+        similarity_threshold = self.config.get('similarity_threshold', 0.65)
+        if res['score'] is not None and store.is_match(res['score'], distance_threshold, similarity_threshold):
+            return True
+        return res.get('lexical_score', 0.0) >= self.config.get('hybrid_lexical_threshold', 0.75)
+
+    @staticmethod
+    def _format_score(res: Dict[str, Any]) -> str:
+        if res['score'] is None:
+            return f"lexical {res['lexical_score']:.2f}"
+        return f"{res['score']:.4f}"
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Optional
+
+class LLMResponseCache:
+    """
+    Persistent cache of LLM responses keyed by (model name, temperature, sha256 of the prompt).
+
+    Responses live in a SQLite file shared by every agent of the process (and across
+    restarts). The total stored size is bounded: the least recently used responses are
+    evicted once `max_bytes` is exceeded. Expiry is checked at read time with the TTL of
+    the calling agent, so agents can keep responses for different lengths of time.
+    """
+
+    def __init__(self, cache_dir: str = "llm_cache", max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            cache_dir (str): Folder (relative to project root) holding the SQLite store.
+            max_bytes (int): Upper bound on the total size of the stored responses.
+        """
+        self.max_bytes = max_bytes
+        self.cache_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../', cache_dir))
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self.db_path = os.path.join(self.cache_dir, "responses.sqlite")
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, temperature REAL, response TEXT, "
+            "size INTEGER, created_at REAL, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(model: str, temperature: float, prompt: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        return f"{model}|{float(temperature)}|{prompt_hash}"
+
+    def get(self, model: str, temperature: float, prompt: str, ttl_seconds: Optional[float] = None) -> Optional[str]:
+        """Returns the cached response, or None if missing or older than `ttl_seconds`."""
+        key = self.key(model, temperature, prompt)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            if ttl_seconds is not None and now - row[1] > ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._stats["hits"] += 1
+            return row[0]
+
+    def put(self, model: str, temperature: float, prompt: str, response: str):
+        """Stores a response, evicting least recently used ones beyond `max_bytes`."""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.key(model, temperature, prompt), model, float(temperature), response, size, now, now)
+            )
+            self._stats["stores"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def invalidate(self, model: str, temperature: float, prompt: str) -> bool:
+        """Drops one response (e.g. generated SQL that failed); returns whether it was cached."""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM responses WHERE key = ?", (self.key(model, temperature, prompt),)
+            ).rowcount
+            self._conn.commit()
+            if deleted:
+                self._stats["invalidations"] += 1
+        return bool(deleted)
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters, hit rate, number of stored responses and their total size."""
+        with self._lock:
+            stats = dict(self._stats)
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        stats["entries"] = count
+        stats["bytes"] = total
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+_default_cache: Optional[LLMResponseCache] = None
+_default_lock = threading.Lock()
+
+def get_llm_cache() -> LLMResponseCache:
+    """Process-wide cache shared by every agent."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache()
+        return _default_cache
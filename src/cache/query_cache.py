@@ -0,0 +1,169 @@
+import os
+import re
+import glob
+import time
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from src.database.sql_text import STRING_LITERAL
+
+def data_version(db_path: str, index_folder: str) -> Tuple:
+    """
+    Cheap version token of the data answers depend on: (mtime, size) of the SQLite database
+    (and its WAL) and of every FAISS index / metadata file. Changes whenever either is rewritten.
+    """
+    paths = [db_path, f"{db_path}-wal"]
+    for pattern in ("*.index", "*.meta.sqlite", "*.tables.json"):
+        paths.extend(sorted(glob.glob(os.path.join(index_folder, pattern))))
+    token = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            token.append((os.path.basename(path), stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            continue
+    return tuple(token)
+
+class SemanticQueryCache:
+    """
+    Cache of user query -> validated SQL in front of the Text-to-SQL pipeline.
+
+    Lookups try the normalized query text first and then the most similar previously
+    answered query (cosine similarity of embeddings). Queries containing different numbers
+    ("top 5" vs "top 10") never match semantically, and neither do queries missing a word of
+    the string literals in the cached SQL ("... in Delhi" never reuses `LIKE '%Mumbai%'`).
+    Entries expire after `ttl_seconds`, the least recently used are evicted beyond
+    `max_entries`, and everything is dropped when the version token (database + FAISS
+    files) changes.
+    """
+
+    def __init__(self, embedding_service: Any, db_path: str, index_folder: str, max_entries: int = 1000,
+                 ttl_seconds: float = 3600.0, similarity_threshold: float = 0.95):
+        """
+        Args:
+            embedding_service: Service used to embed queries (generate_embedding).
+            db_path (str): SQLite database the SQL runs against.
+            index_folder (str): Folder of the FAISS indices used for retrieval.
+            max_entries (int): Maximum number of cached queries.
+            ttl_seconds (float): Lifetime of an entry (None = no expiry).
+            similarity_threshold (float): Minimum cosine similarity for a semantic hit.
+        """
+        self.embedding_service = embedding_service
+        self.db_path = db_path
+        self.index_folder = index_folder
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = data_version(db_path, index_folder)
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "invalidations": 0, "latency_saved": 0.0}
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Lower-cases, drops punctuation and collapses whitespace."""
+        return " ".join(re.sub(r"[^\w\s.]|(?<!\d)\.|\.(?!\d)", " ", query.lower()).split())
+
+    @staticmethod
+    def _numbers(normalized: str) -> List[str]:
+        return re.findall(r"\d+(?:\.\d+)?", normalized)
+
+    @classmethod
+    def _literal_words(cls, sql: str) -> frozenset:
+        """Words of the SQL's string literals and LIKE patterns ('%Mumbai%' -> {'mumbai'})."""
+        words = set()
+        for literal in STRING_LITERAL.findall(sql):
+            words.update(cls.normalize(literal[1:-1].replace("''", "'").replace("%", " ")).split())
+        return frozenset(words)
+
+    def _reusable(self, normalized: str, key: str, entry: Dict[str, Any]) -> bool:
+        """A semantic hit needs the same numbers and every literal word of the cached SQL in the query."""
+        return self._numbers(key) == self._numbers(normalized) and entry['literals'] <= set(normalized.split())
+
+    def _check_version(self):
+        """Drops every entry if the database or the indices changed on disk."""
+        version = data_version(self.db_path, self.index_folder)
+        if version != self._version:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._version = version
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl_seconds is not None and time.time() - entry['created_at'] > self.ttl_seconds
+
+    def _evict_expired(self):
+        for key in [k for k, e in self._entries.items() if self._expired(e)]:
+            del self._entries[key]
+
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached entry ('sql', 'query', 'latency', 'match': 'exact' | 'semantic',
+        'similarity') for a query, or None on a miss.
+        """
+        key = self.normalize(query)
+        with self._lock:
+            self._check_version()
+            self._evict_expired()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                self._stats["latency_saved"] += entry['latency']
+                return dict(entry, match="exact", similarity=1.0)
+            candidates = [(k, e) for k, e in self._entries.items() if self._reusable(key, k, e)]
+
+        best_key, best_similarity = None, -1.0
+        if candidates:
+            vector = np.asarray(self.embedding_service.generate_embedding(query), dtype='float32')
+            vector /= np.linalg.norm(vector) or 1.0
+            matrix = np.stack([e['vector'] for _, e in candidates])
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            best_key, best_similarity = candidates[best][0], float(similarities[best])
+
+        with self._lock:
+            entry = self._entries.get(best_key) if best_key is not None else None
+            if entry is None or best_similarity < self.similarity_threshold:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self._stats["semantic_hits"] += 1
+            self._stats["latency_saved"] += entry['latency']
+            return dict(entry, match="semantic", similarity=best_similarity)
+
+    def store(self, query: str, sql: str, latency: float):
+        """
+        Caches the validated SQL of a successfully answered query.
+        :param latency: Time the full pipeline took (reported as saved on later hits).
+        """
+        vector = np.asarray(self.embedding_service.generate_embedding(query), dtype='float32')
+        vector /= np.linalg.norm(vector) or 1.0
+        key = self.normalize(query)
+        with self._lock:
+            self._check_version()
+            self._entries[key] = {'query': query, 'sql': sql, 'latency': latency, 'vector': vector,
+                                  'literals': self._literal_words(sql), 'created_at': time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, query: Optional[str] = None):
+        """Drops one query (e.g. its SQL stopped working) or, without argument, everything."""
+        with self._lock:
+            if query is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self.normalize(query), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters, hit rate and total pipeline latency saved (seconds)."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,87 @@
+import math
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+from .sqlite_client import SQLiteClient
+from .result_cache import db_version
+
+# Maps the table names of the dataset / vector store descriptions to SQLite table names
+# (Manual Fix for now). Also used to repair generated SQL that uses the description names.
+TABLE_MAPPING = {
+    "Amazon Sale Report": "amazon_sales",
+    "International Sale Report": "international_sales",
+    "May-2022": "may_2022",
+    "P L March 2021": "p_l_march_2021",
+    "Sale Report": "inventory",
+    "Cloud Warehouse Compariosn Chart": "product_master"
+}
+
+class SchemaCatalog:
+    """
+    Compact, cached view of the tables and columns of the SQLite database.
+
+    The compact schema ("table(column TYPE, ...)", one line per table) is what fused
+    generation sends to the LLM instead of retrieved schema snippets. It is rebuilt
+    only when the database file (or its WAL) changes.
+    """
+
+    def __init__(self, db_client: SQLiteClient):
+        """
+        Initialize the catalog.
+
+        Args:
+            db_client (SQLiteClient): Client of the database to describe.
+        """
+        self.db_client = db_client
+        self._lock = threading.Lock()
+        self._version: Optional[Tuple] = None
+        self._tables: Dict[str, List[Tuple[str, str]]] = {}
+        self._compact = ""
+
+    def _current_version(self) -> Tuple:
+        # Includes the -wal file: in WAL mode schema changes stay there until a checkpoint
+        return db_version(self.db_client.db_path)
+
+    def _refresh(self):
+        with self._lock:
+            version = self._current_version()
+            if version == self._version:
+                return
+            tables = {}
+            rows = self.db_client.execute_query(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            )
+            for row in rows:
+                columns = self.db_client.execute_query(
+                    "SELECT name, type FROM pragma_table_info(?) ORDER BY cid", (row['name'],)
+                )
+                tables[row['name']] = [(col['name'], col['type'] or '') for col in columns]
+            self._tables = tables
+            self._compact = "\n".join(
+                f"{table}({', '.join(f'{name} {col_type}'.strip() for name, col_type in columns)})"
+                for table, columns in tables.items()
+            )
+            self._version = version
+
+    def tables(self) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        Returns:
+            Dict[str, List[Tuple[str, str]]]: Table name -> [(column name, declared type)].
+        """
+        self._refresh()
+        return self._tables
+
+    def compact_schema(self) -> str:
+        """Returns the whole catalog as one 'table(column TYPE, ...)' line per table."""
+        self._refresh()
+        return self._compact
+
+    def schema_info(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Returns the catalog in the schema_info shape used by the SQL generation/regeneration agents."""
+        return {
+            table: [{'name': name, 'description': col_type} for name, col_type in columns]
+            for table, columns in self.tables().items()
+        }
+
+    def token_estimate(self) -> int:
+        """Approximate LLM token count of the compact schema (~4 characters per token)."""
+        return math.ceil(len(self.compact_schema()) / 4)
@@ -0,0 +1,166 @@
+import re
+import time
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+_NARROW = ("Add selective WHERE filters, aggregate before joining, and join on key columns "
+           "(e.g. ON a.sku = p.sku) instead of producing a cross product.")
+
+HINTS = {
+    "timeout": _NARROW,
+    "step_budget": _NARROW,
+    "cost": "Join the tables on a key column (e.g. ON a.sku = p.sku) or filter them before joining; "
+            "every join needs a join condition.",
+    "cancelled": "The request was cancelled or ran out of time; no change to the SQL is needed.",
+}
+
+class QueryAbortedError(sqlite3.OperationalError):
+    """
+    A query stopped by a guard rather than by SQLite itself.
+
+    `code` is 'timeout', 'step_budget', 'cost' or 'cancelled'; `hint` tells the
+    regeneration stage how to rewrite the query. str() includes both.
+    """
+
+    def __init__(self, code: str, message: str, hint: Optional[str] = None):
+        self.code = code
+        self.message = message
+        self.hint = HINTS.get(code, "") if hint is None else hint
+        super().__init__(f"[{code}] {message}. Hint: {self.hint}")
+
+class QueryLimits:
+    """
+    Per-query limits of a SQLiteClient. None disables a limit.
+    """
+
+    def __init__(self, timeout_seconds: Optional[float] = None, max_vm_steps: Optional[int] = None,
+                 max_join_scan_rows: Optional[int] = None, progress_interval: int = 10000):
+        """
+        Args:
+            timeout_seconds (float, optional): Wall-clock deadline of one query (including fetching all its rows).
+            max_vm_steps (int, optional): Budget of SQLite VM instructions per query.
+            max_join_scan_rows (int, optional): Largest allowed product of row counts of tables joined
+                by full scans (EXPLAIN QUERY PLAN), checked before the query runs.
+            progress_interval (int): VM instructions between two progress-handler checks.
+        """
+        self.timeout_seconds = timeout_seconds
+        self.max_vm_steps = max_vm_steps
+        self.max_join_scan_rows = max_join_scan_rows
+        self.progress_interval = progress_interval
+
+class QueryGuard:
+    """
+    Enforces the time/step limits of one query through a SQLite progress handler.
+    `cancel()` may be called from any thread; the query then stops at the next check.
+    """
+
+    def __init__(self, limits: Optional[QueryLimits] = None):
+        self.limits = limits or QueryLimits()
+        self.reason: Optional[str] = None
+        self.steps = 0
+        self._deadline: Optional[float] = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _progress(self) -> int:
+        self.steps += self.limits.progress_interval
+        if self._cancelled.is_set():
+            self.reason = "cancelled"
+        elif self._deadline is not None and time.monotonic() > self._deadline:
+            self.reason = "timeout"
+        elif self.limits.max_vm_steps is not None and self.steps > self.limits.max_vm_steps:
+            self.reason = "step_budget"
+        # Non-zero aborts the running statement with 'interrupted'
+        return 1 if self.reason else 0
+
+    def install(self, conn: sqlite3.Connection):
+        if self._cancelled.is_set():
+            raise self.error()
+        if self.limits.timeout_seconds is not None:
+            self._deadline = time.monotonic() + self.limits.timeout_seconds
+        conn.set_progress_handler(self._progress, self.limits.progress_interval)
+
+    @staticmethod
+    def uninstall(conn: sqlite3.Connection):
+        conn.set_progress_handler(None, 0)
+
+    def error(self) -> QueryAbortedError:
+        reason = self.reason or "cancelled"
+        if reason == "timeout":
+            return QueryAbortedError(reason, f"Query exceeded the {self.limits.timeout_seconds}s time limit")
+        if reason == "step_budget":
+            return QueryAbortedError(reason, f"Query exceeded the budget of {self.limits.max_vm_steps} VM steps")
+        return QueryAbortedError(reason, "Query was cancelled")
+
+def is_full_scan(detail: str) -> bool:
+    """Whether an EXPLAIN QUERY PLAN line reads a whole table ('SEARCH x' without 'USING ...' has no index either)."""
+    return (detail.startswith('SCAN ') and not detail.startswith('SCAN CONSTANT ROW')) or \
+        (detail.startswith('SEARCH ') and ' USING ' not in detail)
+
+def plan_table(detail: str, query: str, tables: Iterable[str]) -> Optional[str]:
+    """Table of a 'SCAN x' / 'SEARCH x' plan line (x may be a table or an alias from the query)."""
+    match = re.match(r'(?:SCAN|SEARCH) (?:TABLE )?(\w+)', detail)
+    if match is None:
+        return None
+    name = match.group(1)
+    by_name = {t.lower(): t for t in tables}
+    if name.lower() in by_name:
+        return by_name[name.lower()]
+    for table in by_name.values():
+        if re.search(rf'["`\[]?\b{re.escape(table)}\b["`\]]?\s+(?:AS\s+)?{re.escape(name)}\b', query, re.IGNORECASE):
+            return table
+    return None
+
+def _scanned_table(detail: str, query: str, table_rows: Dict[str, int]) -> Optional[str]:
+    """Table behind a full-scan plan line."""
+    return plan_table(detail, query, table_rows) if is_full_scan(detail) else None
+
+def full_scan_join_cost(plan: List[Tuple[int, int, int, str]], query: str,
+                        table_rows: Dict[str, int]) -> Tuple[int, List[str]]:
+    """
+    Worst nested-loop product of full table scans in an EXPLAIN QUERY PLAN.
+
+    Loops listed under the same parent nest in order; correlated subqueries run once per
+    row of the loops before them, other subqueries once. Index lookups (SEARCH ... USING) count as 1.
+    Returns (row combinations, scanned tables) of the worst chain with at least two scans,
+    or (0, []) if no two full scans are joined.
+    """
+    children = defaultdict(list)
+    for node_id, parent, _, detail in plan:
+        children[parent].append((node_id, detail))
+    worst: Tuple[int, List[str]] = (0, [])
+
+    def walk(parent: int, rows: int, scans: List[str]):
+        nonlocal worst
+        scans = list(scans)
+        for node_id, detail in children.get(parent, []):
+            table = _scanned_table(detail, query, table_rows)
+            if table is not None:
+                rows *= max(table_rows[table], 1)
+                scans.append(table)
+                if len(scans) >= 2 and rows > worst[0]:
+                    worst = (rows, list(scans))
+            if detail.startswith('CORRELATED'):
+                walk(node_id, rows, scans)
+            else:
+                walk(node_id, 1, [])
+
+    walk(0, 1, [])
+    return worst
+
+def check_join_cost(conn: sqlite3.Connection, query: str, params: Optional[tuple], limit: int,
+                    table_rows: Callable[[], Dict[str, int]]):
+    """Raises QueryAbortedError('cost') if the plan joins full scans over more than `limit` row combinations."""
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ()).fetchall()
+    if sum(1 for row in plan if is_full_scan(str(row[3]))) < 2:
+        return
+    rows, tables = full_scan_join_cost([tuple(row) for row in plan], query, table_rows())
+    if rows > limit:
+        counts = " x ".join(f"{t} ({table_rows()[t]} rows)" for t in tables)
+        raise QueryAbortedError(
+            "cost", f"Query plan joins full scans of {counts} = {rows:.2e} row combinations (limit {limit:.0e})"
+        )
@@ -0,0 +1,129 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from .sql_text import QUOTED, code_segments
+
+_WHITESPACE = re.compile(r"\s+")
+_PUNCTUATION = re.compile(r" ?([(),=<>]) ?")
+# Results of these change without the database changing
+_NON_DETERMINISTIC = re.compile(r"\brandom(blob)?\s*\(|'now'|\bcurrent_(date|time|timestamp)\b|\bchanges\s*\(|\blast_insert_rowid\s*\(")
+
+def normalize_sql(sql: str) -> str:
+    """Collapses whitespace and lower-cases everything outside quotes ('...' and "..."); drops a trailing ';'."""
+    def code(text: str) -> str:
+        # One space per whitespace run, none around punctuation: 'a = b' and 'a=b' share a key
+        return _PUNCTUATION.sub(r"\1", _WHITESPACE.sub(" ", text.lower()))
+
+    parts = [code(text) if is_code else text for is_code, text in code_segments(sql, QUOTED)]
+    return "".join(parts).strip().rstrip(";").rstrip()
+
+def db_version(db_path: str) -> Tuple:
+    """
+    (mtime, size) of the database file and its WAL: changes whenever the data is rewritten.
+    An empty WAL counts as none: readers create and delete it without changing any data.
+    """
+    token = []
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            token.append(None)
+            continue
+        token.append((stat.st_mtime_ns, stat.st_size) if stat.st_size or path == db_path else None)
+    return tuple(token)
+
+class ResultCache:
+    """
+    LRU cache of query results keyed by normalized SQL (+ row/byte budget) and database version.
+
+    Memory is bounded by the estimated size of the cached rows (`max_bytes`); results larger
+    than `max_entry_bytes` and queries using non-deterministic functions are never cached.
+    Every entry becomes stale as soon as the database (or its WAL) changes.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = 64 * 1024 * 1024, max_entry_bytes: int = 4 * 1024 * 1024):
+        """
+        Args:
+            db_path (str): SQLite database the queries run against.
+            max_bytes (int): Budget of all cached results (estimated size of their rows).
+            max_entry_bytes (int): Largest single result that is cached.
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        # key -> (result, estimated size)
+        self._entries: "OrderedDict[Tuple, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+        self._version = db_version(db_path)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "too_large": 0, "invalidations": 0, "time_saved": 0.0}
+
+    @staticmethod
+    def cacheable(sql: str) -> bool:
+        return _NON_DETERMINISTIC.search(sql.lower()) is None
+
+    def _check_version(self):
+        version = db_version(self.db_path)
+        if version != self._version:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def get(self, sql: str, budget: Tuple = ()) -> Optional[Dict[str, Any]]:
+        """Cached execute_bounded-style result for the SQL under the same budget, or None."""
+        key = (normalize_sql(sql), budget)
+        with self._lock:
+            self._check_version()
+            if key not in self._entries:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            result, _ = self._entries[key]
+            self._stats["hits"] += 1
+            self._stats["time_saved"] += result.get("elapsed") or 0.0
+            # Row dicts are shared between hits; the list itself is a copy
+            return dict(result, rows=list(result["rows"]))
+
+    def version(self) -> Tuple:
+        """Current database version; pass it to put() when taken before running the query."""
+        return db_version(self.db_path)
+
+    def put(self, sql: str, result: Dict[str, Any], budget: Tuple = (), version: Optional[Tuple] = None) -> bool:
+        """
+        Caches a result ('rows' + 'bytes' as returned by execute_bounded). Returns False if it was not cached.
+        A result whose `version` (taken before the query ran) is no longer current is dropped: it may predate a load.
+        """
+        size = result.get("bytes", 0) + 64 * len(result["rows"])
+        if not self.cacheable(sql):
+            return False
+        with self._lock:
+            if size > self.max_entry_bytes or size > self.max_bytes:
+                self._stats["too_large"] += 1
+                return False
+            self._check_version()
+            if version is not None and version != self._version:
+                return False
+            key = (normalize_sql(sql), budget)
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (dict(result, rows=list(result["rows"])), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._stats["evictions"] += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits/misses, evictions, results too large to cache, version invalidations and current usage."""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
@@ -0,0 +1,471 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .sqlite_client import SQLiteClient
+from .result_cache import db_version
+from .sql_text import STRING_LITERAL
+
+# Month of an ISO date ('2022-04-30' -> '2022-04'), the grain of the monthly rollups
+MONTH = "strftime('%Y-%m', date)"
+
+class Rollup:
+    """
+    Definition of one aggregate table over a fact table.
+
+    Rows are grouped by `dimensions` (name -> SQL expression over the source). For every measure
+    column the rollup keeps sum_<m>, count_<m> (non-NULL values), min_<m> and max_<m>, plus the
+    group's row_count, so SUM / COUNT / AVG / MIN / MAX over the source can be answered from it.
+    """
+
+    def __init__(self, name: str, source: str, dimensions: Dict[str, str], measures: List[str], description: str):
+        self.name = name
+        self.source = source
+        self.dimensions = dimensions
+        self.measures = measures
+        self.description = description
+
+    @property
+    def measure_columns(self) -> List[str]:
+        return ["row_count"] + [f"{agg}_{m}" for m in self.measures for agg in ("sum", "count", "min", "max")]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.dimensions) + self.measure_columns
+
+    def create_sql(self) -> str:
+        dims = ", ".join(f'"{d}"' for d in self.dimensions)
+        measures = ", ".join(f'"{c}" {"INTEGER" if c.startswith(("row_count", "count_")) else "REAL"}'
+                             for c in self.measure_columns)
+        # NULL dimension values never conflict, so such groups may be split over several rows;
+        # every aggregate the rewriter produces is still exact across them
+        return f'CREATE TABLE IF NOT EXISTS "{self.name}" ({dims}, {measures}, PRIMARY KEY ({dims}))'
+
+    def select_sql(self) -> str:
+        """Aggregates the source rows after a rowid watermark (one '?' parameter)."""
+        dims = ", ".join(f'{expr} AS "{d}"' for d, expr in self.dimensions.items())
+        measures = ", ".join(f'{agg.upper()}("{m}")' for m in self.measures for agg in ("sum", "count", "min", "max"))
+        group_by = ", ".join(str(i + 1) for i in range(len(self.dimensions)))
+        return f'SELECT {dims}, COUNT(*), {measures} FROM "{self.source}" WHERE rowid > ? GROUP BY {group_by}'
+
+    def upsert_sql(self) -> str:
+        columns = ", ".join(f'"{c}"' for c in self.columns)
+        dims = ", ".join(f'"{d}"' for d in self.dimensions)
+        merge = []
+        for c in self.measure_columns:
+            if c.startswith("min_") or c.startswith("max_"):
+                agg = c[:3].upper()
+                merge.append(f'"{c}" = COALESCE({agg}("{c}", excluded."{c}"), "{c}", excluded."{c}")')
+            else:
+                merge.append(f'"{c}" = COALESCE("{c}" + excluded."{c}", "{c}", excluded."{c}")')
+        return f'INSERT INTO "{self.name}" ({columns}) {self.select_sql()} ON CONFLICT ({dims}) DO UPDATE SET {", ".join(merge)}'
+
+    def fingerprint(self) -> str:
+        return hashlib.sha256((self.create_sql() + self.select_sql()).encode("utf-8")).hexdigest()[:16]
+
+# Sales by city/state/category/month/channel and quantity by SKU: the usual dashboard questions
+ROLLUPS = [
+    Rollup(
+        "rollup_amazon_daily", "amazon_sales",
+        {"date": "date", "month": MONTH, "category": "category", "status": "status",
+         "sales_channel": "sales_channel", "fulfilment": "fulfilment", "b2b": "b2b"},
+        ["amount", "qty"],
+        "Daily summary of Amazon sales (amazon_sales): order lines, total and average amount and quantity "
+        "per date, month, product category, order status, sales channel, fulfilment and B2B flag."
+    ),
+    Rollup(
+        "rollup_amazon_state", "amazon_sales",
+        {"month": MONTH, "ship_state": "ship_state", "category": "category", "status": "status",
+         "sales_channel": "sales_channel"},
+        ["amount", "qty"],
+        "Monthly summary of Amazon sales (amazon_sales) per shipping state, product category, order status "
+        "and sales channel: order lines, total and average amount and quantity per state."
+    ),
+    Rollup(
+        "rollup_amazon_city", "amazon_sales",
+        {"month": MONTH, "ship_state": "ship_state", "ship_city": "ship_city", "ship_country": "ship_country",
+         "status": "status"},
+        ["amount", "qty"],
+        "Monthly summary of Amazon sales (amazon_sales) per shipping city, state and country and order "
+        "status: order lines, total and average amount and quantity per city."
+    ),
+    Rollup(
+        "rollup_amazon_sku", "amazon_sales",
+        {"month": MONTH, "sku": "sku", "style": "style", "category": "category", "size": "size"},
+        ["amount", "qty"],
+        "Monthly summary of Amazon sales (amazon_sales) per product SKU, style, category and size: "
+        "units sold (quantity), revenue (amount) and order lines per product."
+    ),
+    Rollup(
+        "rollup_international_monthly", "international_sales",
+        {"month": MONTH, "months": "months", "customer": "customer", "sku": "sku", "style": "style", "size": "size"},
+        ["pcs", "rate", "gross_amt"],
+        "Monthly summary of international sales (international_sales) per customer, SKU, style and size: "
+        "pieces sold, gross amount and rates."
+    ),
+]
+
+def rollup_documents(rollups: List[Rollup] = ROLLUPS) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    """Table and column descriptions of the rollups, in the document shape of ingest_vectors.collect_documents."""
+    table_docs, column_docs = [], {}
+    for rollup in rollups:
+        table_docs.append({
+            'content': rollup.description,
+            'metadata': {"type": "table", "table_name": rollup.name, "source": f"rollup:{rollup.name}"}
+        })
+        descriptions = {d: f"{d} of the {rollup.source} rows summarized in the group"
+                        if expr == d else f"{d} ({expr}) of the {rollup.source} rows summarized in the group"
+                        for d, expr in rollup.dimensions.items()}
+        descriptions["row_count"] = f"Number of {rollup.source} rows (order lines) in the group"
+        for m in rollup.measures:
+            descriptions[f"sum_{m}"] = f"Total {m} (sum of {rollup.source}.{m}) of the group"
+            descriptions[f"count_{m}"] = f"Number of non-empty {m} values in the group (divide sum_{m} by it for the average)"
+            descriptions[f"min_{m}"] = f"Smallest {m} in the group"
+            descriptions[f"max_{m}"] = f"Largest {m} in the group"
+        column_docs[rollup.name] = [{
+            'content': f"{column}: {text}",
+            'metadata': {"type": "column", "table_name": rollup.name, "column_name": column,
+                         "source": f"rollup:{rollup.name}:{column}"}
+        } for column, text in descriptions.items()]
+    return table_docs, column_docs
+
+def built_rollups(db_path: str, rollups: List[Rollup] = ROLLUPS) -> List[Rollup]:
+    """Rollups the database currently holds (built by RollupManager with the current definition)."""
+    if not os.path.exists(db_path):
+        return []
+    conn = sqlite3.connect(db_path)
+    try:
+        state = dict(conn.execute("SELECT name, fingerprint FROM rollup_state").fetchall())
+    except sqlite3.Error:
+        return []
+    finally:
+        conn.close()
+    return [r for r in rollups if state.get(r.name) == r.fingerprint()]
+
+class RollupManager:
+    """
+    Builds and refreshes the rollup tables of a database.
+
+    Progress is kept in the `rollup_state` table: the highest source rowid aggregated so far
+    (watermark), the source row count at that point and a hash of the first and last aggregated
+    rows. A refresh aggregates only the rows after the watermark and upserts them into the
+    rollup; it rebuilds from scratch when the definition changed or the aggregated rows were
+    deleted or replaced (e.g. the table was reloaded with other data). Updates in the middle of
+    already aggregated rows are not detected.
+    """
+
+    def __init__(self, db_path: str, rollups: List[Rollup] = ROLLUPS):
+        """
+        Args:
+            db_path (str): SQLite database holding the source tables.
+            rollups (List[Rollup]): Rollups to maintain. Defaults to ROLLUPS.
+        """
+        self.db_path = db_path
+        self.rollups = rollups
+
+    def refresh(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Brings every rollup up to date with its source table.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Rollup name -> 'mode' ('rebuilt', 'incremental', 'fresh' or
+            'skipped' when the source table is missing), 'source_rows' (new rows aggregated),
+            'rows' (rollup size) and 'elapsed' (seconds).
+        """
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        report = {}
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS rollup_state (name TEXT PRIMARY KEY, source TEXT, watermark INTEGER, "
+                         "source_rows INTEGER, fingerprint TEXT, boundary TEXT, refreshed REAL)")
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            for rollup in self.rollups:
+                start = time.time()
+                if rollup.source not in tables:
+                    report[rollup.name] = {"mode": "skipped", "source_rows": 0, "rows": 0, "elapsed": 0.0}
+                    continue
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    mode, added = self._refresh_one(conn, rollup, tables)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                rows = conn.execute(f'SELECT COUNT(*) FROM "{rollup.name}"').fetchone()[0]
+                report[rollup.name] = {"mode": mode, "source_rows": added, "rows": rows, "elapsed": time.time() - start}
+        finally:
+            conn.close()
+        return report
+
+    @staticmethod
+    def _boundary(conn: sqlite3.Connection, source: str, watermark: int) -> str:
+        """Hash of the first and the last aggregated source rows: a reloaded table differs there."""
+        rows = conn.execute(f'SELECT * FROM "{source}" WHERE rowid IN ((SELECT MIN(rowid) FROM "{source}"), ?) ORDER BY rowid',
+                            (watermark,)).fetchall()
+        return hashlib.sha256(repr(rows).encode("utf-8")).hexdigest()[:16]
+
+    def _refresh_one(self, conn: sqlite3.Connection, rollup: Rollup, tables: set) -> Tuple[str, int]:
+        state = conn.execute("SELECT watermark, source_rows, fingerprint, boundary FROM rollup_state WHERE name = ?",
+                             (rollup.name,)).fetchone()
+        high = conn.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM "{rollup.source}"').fetchone()[0]
+        rebuild = state is None or rollup.name not in tables or state[2] != rollup.fingerprint() or high < state[0]
+        if not rebuild:
+            kept = conn.execute(f'SELECT COUNT(*) FROM "{rollup.source}" WHERE rowid <= ?', (state[0],)).fetchone()[0]
+            rebuild = kept != state[1] or self._boundary(conn, rollup.source, state[0]) != state[3]
+        if rebuild:
+            conn.execute(f'DROP TABLE IF EXISTS "{rollup.name}"')
+            conn.execute(rollup.create_sql())
+            watermark, source_rows = 0, 0
+        else:
+            watermark, source_rows = state[0], state[1]
+            if high == watermark:
+                return "fresh", 0
+        added = conn.execute(f'SELECT COUNT(*) FROM "{rollup.source}" WHERE rowid > ? AND rowid <= ?',
+                             (watermark, high)).fetchone()[0]
+        # Rows beyond `high` cannot appear: the refresh holds the write lock (BEGIN IMMEDIATE)
+        conn.execute(rollup.upsert_sql(), (watermark,))
+        conn.execute("INSERT OR REPLACE INTO rollup_state VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (rollup.name, rollup.source, high, source_rows + added, rollup.fingerprint(),
+                      self._boundary(conn, rollup.source, high), time.time()))
+        return ("rebuilt" if rebuild else "incremental"), added
+
+_AGGREGATE = re.compile(r'\b(sum|total|count|avg|min|max)\s*\(\s*(distinct\s+)?([^()]*?)\s*\)', re.IGNORECASE)
+_ANY_AGGREGATE = re.compile(r'\b(sum|total|count|avg|min|max|group_concat|string_agg)\s*\(', re.IGNORECASE)
+_UNSUPPORTED = re.compile(r'\b(join|union|intersect|except|over|window|with|recursive)\b|\bfrom\s+\S+(?:\s+(?:as\s+)?\w+)?\s*,',
+                          re.IGNORECASE)
+_KEYWORDS = {"where", "group", "order", "limit", "having", "as", "on", "join", "inner", "left", "natural", "cross"}
+_MARK = "\x00{}\x00"
+_MONTH_MARK = "\x02{}\x02"
+# A select item ending in an alias ('... AS total' or '... total')
+_ITEM_ALIAS = re.compile(r'(?:\bas\s+|[)\x01\x02\s])(?!end\s*$)(?:"[^"]*"|`[^`]*`|\[[^\]]*\]|[A-Za-z_]\w*)\s*$', re.IGNORECASE)
+
+def _month_patterns(column: str) -> List[re.Pattern]:
+    col = rf'(?:\w+\.)?["`\[]?{column}["`\]]?'
+    return [re.compile(rf"strftime\s*\(\s*'%Y-%m'\s*,\s*{col}\s*\)", re.IGNORECASE),
+            re.compile(rf"substr(?:ing)?\s*\(\s*{col}\s*,\s*1\s*,\s*7\s*\)", re.IGNORECASE)]
+
+def _keep_column_names(code: str, original: Callable[[str], str]) -> str:
+    """
+    Aliases every select item holding an aggregate or month marker (\x01 / \x02) without an alias
+    to its original text, which SQLite would have used as the column name.
+    """
+    select = re.search(r'\bselect\s+(?:distinct\s+|all\s+)?', code, re.IGNORECASE)
+    end = re.search(r'\bfrom\b', code[select.end():], re.IGNORECASE) if select else None
+    if end is None:
+        return code
+    start, stop = select.end(), select.end() + end.start()
+    items, depth, last = [], 0, start
+    for i in range(start, stop):
+        if code[i] == '(':
+            depth += 1
+        elif code[i] == ')':
+            depth -= 1
+        elif code[i] == ',' and depth == 0:
+            items.append(code[last:i])
+            last = i + 1
+    items.append(code[last:stop])
+    named = []
+    for item in items:
+        text = item.strip()
+        if re.search(r'[\x01\x02]', text) and not _ITEM_ALIAS.search(text):
+            name = original(text).replace('"', '""')
+            item = item.replace(text, f'{text} AS "{name}"', 1)
+        named.append(item)
+    return code[:start] + ",".join(named) + code[stop:]
+
+class RollupRewriter:
+    """
+    Redirects aggregate queries on a fact table to the smallest up-to-date rollup that can answer them.
+
+    Eligible: one SELECT over the source table (no joins, subqueries or window functions) with at
+    least one aggregate; every column used outside an aggregate is a rollup dimension (the month
+    expressions strftime('%Y-%m', date) / substr(date, 1, 7) match the 'month' dimension), and
+    aggregates are SUM/TOTAL/COUNT/AVG/MIN/MAX of a measure, COUNT(*), or MIN/MAX/COUNT of a dimension.
+    Anything else is returned unchanged. Rewritten select items without an alias are aliased to their
+    original text, so the result keeps the column names of the original query.
+    """
+
+    def __init__(self, db_client: SQLiteClient, rollups: List[Rollup] = ROLLUPS):
+        """
+        Args:
+            db_client (SQLiteClient): Client of the database holding the rollups (also compiles the rewrites).
+            rollups (List[Rollup]): Candidate rollups. Defaults to ROLLUPS.
+        """
+        self.db_client = db_client
+        self.rollups = rollups
+        self._lock = threading.Lock()
+        self._version = None
+        self._available: Dict[str, int] = {}
+        self._source_columns: Dict[str, List[str]] = {}
+        self._stats = {"checked": 0, "rewritten": 0}
+
+    def _refresh(self):
+        """Rollups that exist and cover their whole source (name -> rows), rechecked when the database changes."""
+        version = db_version(self.db_client.db_path)
+        with self._lock:
+            if version == self._version:
+                return
+        available, source_columns = {}, {}
+        try:
+            state = {row['name']: row for row in self.db_client.execute_query(
+                "SELECT name, watermark, fingerprint FROM rollup_state")}
+        except sqlite3.Error:
+            state = {}
+        for rollup in self.rollups:
+            entry = state.get(rollup.name)
+            if entry is None or entry['fingerprint'] != rollup.fingerprint():
+                continue
+            try:
+                high = self.db_client.execute_query(f'SELECT COALESCE(MAX(rowid), 0) AS high FROM "{rollup.source}"')[0]['high']
+                if high != entry['watermark']:
+                    print(f"RollupRewriter: {rollup.name} is behind {rollup.source}; not used until refreshed")
+                    continue
+                available[rollup.name] = self.db_client.execute_query(f'SELECT COUNT(*) AS n FROM "{rollup.name}"')[0]['n']
+                if rollup.source not in source_columns:
+                    source_columns[rollup.source] = [row['name'] for row in self.db_client.execute_query(
+                        "SELECT name FROM pragma_table_info(?)", (rollup.source,))]
+            except sqlite3.Error:
+                continue
+        with self._lock:
+            self._available, self._source_columns, self._version = available, source_columns, version
+
+    def rewrite(self, sql: str) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: 'sql' (rewritten or unchanged), 'rollup' (name, or None if not rewritten)
+            and 'source' (the fact table it replaces).
+        """
+        self._refresh()
+        with self._lock:
+            self._stats["checked"] += 1
+        result = self._rewrite(sql)
+        if result is None:
+            return {"sql": sql, "rollup": None, "source": None}
+        rewritten, rollup = result
+        # Never hand back SQL that doesn't compile
+        if self.db_client.explain(rewritten) is not None:
+            return {"sql": sql, "rollup": None, "source": None}
+        with self._lock:
+            self._stats["rewritten"] += 1
+        return {"sql": rewritten, "rollup": rollup.name, "source": rollup.source}
+
+    def _rewrite(self, sql: str) -> Optional[Tuple[str, Rollup]]:
+        if not self._available:
+            return None
+        # The month dimension may be written as an expression over the date column
+        months = []
+
+        def month(m: re.Match) -> str:
+            months.append(m.group(0))
+            return _MONTH_MARK.format(len(months) - 1)
+
+        sql = sql.strip().rstrip(";")
+        for pattern in _month_patterns("date"):
+            sql = pattern.sub(month, sql)
+        by_month = bool(months)
+        literals = []
+
+        def mask(m: re.Match) -> str:
+            literals.append(m.group(0))
+            return _MARK.format(len(literals) - 1)
+
+        code = STRING_LITERAL.sub(mask, sql)
+        if len(re.findall(r'\bselect\b', code, re.IGNORECASE)) != 1 or _UNSUPPORTED.search(code):
+            return None
+        match = re.search(r'\bfrom\s+["`\[]?(\w+)["`\]]?(?:\s+(?:as\s+)?(\w+))?', code, re.IGNORECASE)
+        if match is None:
+            return None
+        source = match.group(1)
+        candidates = [r for r in self.rollups if r.source.lower() == source.lower() and r.name in self._available]
+        if not candidates:
+            return None
+        alias = match.group(2) if match.group(2) and match.group(2).lower() not in _KEYWORDS else None
+        qualifiers = {source.lower()} | ({alias.lower()} if alias else set())
+
+        def column(arg: str) -> Optional[str]:
+            m = re.fullmatch(r'(?:(\w+)\.)?["`\[]?(\w+)["`\]]?', arg.strip())
+            if m is None or (m.group(1) and m.group(1).lower() not in qualifiers):
+                return None
+            return m.group(2).lower()
+
+        aggregates = []
+
+        def take(m: re.Match) -> str:
+            aggregates.append((m.group(1).lower(), bool(m.group(2)), m.group(3), m.group(0)))
+            return f"\x01{len(aggregates) - 1}\x01"
+
+        code = _AGGREGATE.sub(take, code)
+        if not aggregates or _ANY_AGGREGATE.search(code):
+            return None
+
+        source_columns = {c.lower() for c in self._source_columns.get(candidates[0].source, [])}
+        measures = {m for r in candidates for m in r.measures}
+        aliases = {a.lower() for a in re.findall(r'\bas\s+["`\[]?(\w+)', code, re.IGNORECASE)}
+        needed_dims, needed_measures = {"month"} if by_month else set(), set()
+        # Columns outside aggregates (select list, WHERE, GROUP BY, ...) must be dimensions
+        for word in re.findall(r'(?<![\w\x00\x01])(?:\w+\.)?["`\[]?([A-Za-z_]\w*)(?!\s*\()', code):
+            name = word.lower()
+            if name not in aliases and (name in source_columns or name == "month"):
+                needed_dims.add(name)
+        for func, distinct, arg, _ in aggregates:
+            if arg.strip() == "*":
+                if func != "count" or distinct:
+                    return None
+                continue
+            col = column(arg)
+            if col is None:
+                return None
+            if col in measures and not distinct:
+                needed_measures.add(col)
+            elif func in ("sum", "total", "avg"):
+                return None
+            else:
+                needed_dims.add(col)
+
+        matching = [r for r in candidates if needed_dims <= set(r.dimensions) and needed_measures <= set(r.measures)]
+        if not matching:
+            return None
+        rollup = min(matching, key=lambda r: self._available[r.name])
+
+        def original(text: str) -> str:
+            text = re.sub(r'\x01(\d+)\x01', lambda m: aggregates[int(m.group(1))][3], text)
+            text = re.sub(r'\x02(\d+)\x02', lambda m: months[int(m.group(1))], text)
+            return re.sub(r'\x00(\d+)\x00', lambda m: literals[int(m.group(1))], text)
+
+        code = _keep_column_names(code, original)
+
+        def expand(m: re.Match) -> str:
+            func, distinct, arg, _ = aggregates[int(m.group(1))]
+            if arg.strip() == "*":
+                return "SUM(row_count)"
+            col = column(arg)
+            if col in needed_measures:
+                return {
+                    "sum": f"SUM(sum_{col})",
+                    "total": f"TOTAL(sum_{col})",
+                    "count": f"SUM(count_{col})",
+                    "avg": f"(CAST(SUM(sum_{col}) AS REAL) / SUM(count_{col}))",
+                    "min": f"MIN(min_{col})",
+                    "max": f"MAX(max_{col})",
+                }[func]
+            if func == "count" and not distinct:
+                return f"SUM(CASE WHEN {col} IS NOT NULL THEN row_count ELSE 0 END)"
+            return f"{func.upper()}({'DISTINCT ' if distinct else ''}{col})"
+
+        code = re.sub(r'\x01(\d+)\x01', expand, code)
+        code = re.sub(r'\x02\d+\x02', "month", code)
+        code = re.sub(rf'(\bfrom\s+)["`\[]?{re.escape(source)}["`\]]?', lambda m: f"{m.group(1)}{rollup.name}",
+                      code, count=1, flags=re.IGNORECASE)
+        rewritten = re.sub(r'\x00(\d+)\x00', lambda m: literals[int(m.group(1))], code)
+        return rewritten, rollup
+
+    def stats(self) -> Dict[str, Any]:
+        """Checked / rewritten queries and the rollups currently usable (name -> rows)."""
+        with self._lock:
+            return {**self._stats, "available": dict(self._available)}
+
+def format_refresh(report: Dict[str, Dict[str, Any]]) -> str:
+    return "\n".join(f"  {name}: {r['mode']}, +{r['source_rows']} source rows -> {r['rows']} rows ({r['elapsed']:.2f}s)"
+                     for name, r in report.items())
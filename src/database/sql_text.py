@@ -0,0 +1,17 @@
+import re
+from typing import List, Pattern, Tuple
+
+# Single-quoted string literals ('' escapes a quote)
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+# String literals and double-quoted tokens: SQLite reads a double-quoted token that names no column as a string
+QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+
+def code_segments(sql: str, literal: Pattern = STRING_LITERAL) -> List[Tuple[bool, str]]:
+    """Splits SQL into (is_code, text) parts; matches of `literal` (string literals by default) are the non-code parts."""
+    parts, last = [], 0
+    for match in literal.finditer(sql):
+        parts.append((True, sql[last:match.start()]))
+        parts.append((False, match.group(0)))
+        last = match.end()
+    parts.append((True, sql[last:]))
+    return parts
@@ -0,0 +1,144 @@
+import re
+import difflib
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+from .catalog import SchemaCatalog, TABLE_MAPPING
+from .sqlite_client import SQLiteClient
+from .sql_text import code_segments
+from src.vector_store.lexical import normalize_name
+
+_ERROR = re.compile(r"no such (table|column): (.+)$")
+
+def replace_identifier(sql: str, old: str, new: str) -> str:
+    """
+    Replaces the identifier `old` (bare or quoted with "", `` or []) by `new` outside string literals.
+    Matching is case-insensitive, like SQLite identifiers.
+    """
+    quoted = [rf'"{re.escape(old)}"', rf'`{re.escape(old)}`', rf'\[{re.escape(old)}\]']
+    if re.fullmatch(r'\w+', old):
+        quoted.append(rf'(?<![\w"`\[]){re.escape(old)}(?![\w"`\]])')
+    pattern = re.compile('|'.join(quoted), re.IGNORECASE)
+    replacement = new if re.fullmatch(r'\w+', new) else f'"{new}"'
+    return ''.join(pattern.sub(lambda _: replacement, text) if is_code else text for is_code, text in code_segments(sql))
+
+class SQLValidator:
+    """
+    Pre-flight check and deterministic repair of generated SQL.
+
+    The query is compiled with EXPLAIN against the database; unknown tables and columns
+    reported by SQLite are replaced by the TABLE_MAPPING alias or the closest real name
+    (normalized exact match first, then difflib similarity) and the query is compiled again.
+    Double-quoted names that are neither tables, columns nor aliases are repaired the same
+    way: SQLite would otherwise silently read them as string literals.
+    Only queries that cannot be repaired this way need SQLRegenerationAgent.
+    """
+
+    def __init__(self, db_client: SQLiteClient, catalog: SchemaCatalog, aliases: Optional[Dict[str, str]] = None,
+                 fuzzy_cutoff: float = 0.75, max_fixes: int = 5):
+        """
+        Initialize the validator.
+
+        Args:
+            db_client (SQLiteClient): Client used to compile (EXPLAIN) the queries.
+            catalog (SchemaCatalog): Source of the real table and column names.
+            aliases (dict, optional): Alternative table names -> SQLite table names. Defaults to TABLE_MAPPING.
+            fuzzy_cutoff (float): Minimum difflib similarity of a fuzzy replacement.
+            max_fixes (int): Maximum number of replacements per query.
+        """
+        self.db_client = db_client
+        self.catalog = catalog
+        self.aliases = TABLE_MAPPING if aliases is None else aliases
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.max_fixes = max_fixes
+        self._lock = threading.Lock()
+        self._stats = {"checked": 0, "valid": 0, "repaired": 0, "failed": 0}
+
+    @staticmethod
+    def _closest(name: str, candidates: List[str], cutoff: float) -> Optional[str]:
+        normalized = {normalize_name(c): c for c in candidates}
+        key = normalize_name(name)
+        if key in normalized:
+            return normalized[key]
+        # Also compare without separators ('shipcity' vs 'ship_city')
+        compact = {k.replace('_', ''): c for k, c in normalized.items()}
+        if key.replace('_', '') in compact:
+            return compact[key.replace('_', '')]
+        match = difflib.get_close_matches(key, list(normalized), n=1, cutoff=cutoff)
+        return normalized[match[0]] if match else None
+
+    def _referenced_tables(self, sql: str) -> List[str]:
+        code = ' '.join(text for is_code, text in code_segments(sql) if is_code).lower()
+        return [t for t in self.catalog.tables() if re.search(rf'(?<!\w){re.escape(t.lower())}(?!\w)', code)]
+
+    def _resolve_table(self, name: str) -> Optional[str]:
+        tables = list(self.catalog.tables())
+        aliases = {normalize_name(k): v for k, v in self.aliases.items() if v in tables}
+        if normalize_name(name) in aliases:
+            return aliases[normalize_name(name)]
+        match = self._closest(name, tables + list(self.aliases), self.fuzzy_cutoff)
+        if match is None:
+            return None
+        return aliases.get(normalize_name(match), match if match in tables else None)
+
+    def _resolve_column(self, name: str, sql: str, cutoff: Optional[float] = None) -> Optional[str]:
+        tables = self.catalog.tables()
+        referenced = self._referenced_tables(sql) or list(tables)
+        columns = list(dict.fromkeys(col for t in referenced for col, _ in tables[t]))
+        return self._closest(name, columns, self.fuzzy_cutoff if cutoff is None else cutoff)
+
+    def _unknown_quoted(self, sql: str) -> List[str]:
+        """Double-quoted names that are not tables, columns or aliases defined in the query."""
+        code = ' '.join(text for is_code, text in code_segments(sql) if is_code)
+        known = {t.lower() for t in self.catalog.tables()}
+        known |= {col.lower() for columns in self.catalog.tables().values() for col, _ in columns}
+        known |= {a.lower() for a in re.findall(r'\bAS\s+"([^"]+)"', code, re.IGNORECASE)}
+        return [name for name in dict.fromkeys(re.findall(r'"([^"]+)"', code)) if name.lower() not in known]
+
+    def repair(self, sql: str) -> Dict[str, Any]:
+        """
+        Compiles the query and repairs unknown identifiers.
+
+        Returns:
+            Dict[str, Any]: 'sql' (repaired or unchanged), 'valid' (compiles and has no unknown names),
+            'fixes' ([(old, new)] replacements) and 'error' (last SQLite error when not valid).
+        """
+        fixes, seen, error = [], set(), None
+        for _ in range(self.max_fixes + 1):
+            error = self.db_client.explain(sql)
+            if error is None:
+                # Only unambiguous renames ('Ship City' -> ship_city): a quoted value may be an intended string
+                unknown = [(name, self._resolve_column(name, sql, cutoff=1.0)) for name in self._unknown_quoted(sql)]
+                unknown = [(old, new) for old, new in unknown if new]
+                if not unknown or len(fixes) >= self.max_fixes:
+                    return self._result(sql, True, fixes, None)
+                old, new = unknown[0]
+            else:
+                match = _ERROR.match(error)
+                if match is None or error in seen:
+                    break
+                seen.add(error)
+                kind, name = match.group(1), match.group(2).split(' - ')[0].strip('"')
+                # 'main.table' / 'alias.column': the unknown part is the last one
+                name = name.split('.', 1)[1] if kind == 'table' and name.lower().startswith('main.') else name
+                name = name.rsplit('.', 1)[-1] if kind == 'column' else name
+                new = self._resolve_table(name) if kind == 'table' else self._resolve_column(name, sql)
+                old = name
+            if not new or len(fixes) >= self.max_fixes:
+                break
+            repaired = replace_identifier(sql, old, new)
+            if repaired == sql:
+                break
+            fixes.append((old, new))
+            sql = repaired
+        return self._result(sql, False, fixes, error)
+
+    def _result(self, sql: str, valid: bool, fixes: List[Tuple[str, str]], error: Optional[str]) -> Dict[str, Any]:
+        with self._lock:
+            self._stats["checked"] += 1
+            self._stats["valid" if valid and not fixes else "repaired" if valid else "failed"] += 1
+        return {"sql": sql, "valid": valid, "fixes": fixes, "error": error}
+
+    def stats(self) -> Dict[str, int]:
+        """Checked queries: valid as generated, repaired locally, or left to regeneration."""
+        with self._lock:
+            return dict(self._stats)
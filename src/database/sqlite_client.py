@@ -1,29 +1,153 @@
 import sqlite3
 import os
-from typing import List, Dict, Any, Optional
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional
 from .base import DatabaseConnector
+from .connection_pool import SQLiteConnectionPool
+from .query_guard import QueryGuard, QueryLimits, check_join_cost
+from .result_cache import db_version
+
+def _row_size(row: Dict[str, Any]) -> int:
+    """Approximate in-memory size of a result row (text/blob lengths, 8 bytes per number)."""
+    return sum(len(key) + (len(value) if isinstance(value, (str, bytes)) else 8) for key, value in row.items())
+
+class BoundedStream:
+    """
+    Row chunks of a query, cut off at a row budget and an approximate byte budget.
+
+    Rows beyond the budget are not fetched: the iteration ends, the query is stopped and
+    `truncated` is set. `row_count`, `bytes`, `time_to_first_row` and `elapsed` follow the
+    rows consumed so far. Iterate it directly, or with `async for` to fetch each chunk in
+    the default executor.
+    """
+
+    def __init__(self, chunks: Iterator[List[Dict[str, Any]]], max_rows: int, max_bytes: int):
+        """
+        Args:
+            chunks (Iterator): Row chunks, e.g. from SQLiteClient.iter_query.
+            max_rows (int): Row budget.
+            max_bytes (int): Approximate size budget of the returned values.
+        """
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.row_count = 0
+        self.bytes = 0
+        self.truncated = False
+        self.time_to_first_row: Optional[float] = None
+        self._chunks = chunks
+        self._start = time.time()
+        self._end: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the query started (until the stream ended, once it has)."""
+        return (self._end or time.time()) - self._start
+
+    def __iter__(self) -> "BoundedStream":
+        return self
+
+    def __next__(self) -> List[Dict[str, Any]]:
+        if self._end is not None:
+            raise StopIteration
+        try:
+            chunk = next(self._chunks, None)
+        except BaseException:
+            self.close()
+            raise
+        if chunk is None:
+            self.close()
+            raise StopIteration
+        if self.time_to_first_row is None:
+            self.time_to_first_row = time.time() - self._start
+
+        kept = []
+        for row in chunk:
+            row_size = _row_size(row)
+            if self.row_count >= self.max_rows or self.bytes + row_size > self.max_bytes:
+                self.truncated = True
+                break
+            kept.append(row)
+            self.row_count += 1
+            self.bytes += row_size
+        if self.truncated:
+            self.close()
+            if not kept:
+                raise StopIteration
+        return kept
+
+    async def __aiter__(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, next, self, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            await loop.run_in_executor(None, self.close)
+
+    def close(self):
+        """Stops the query (rows not consumed yet are never fetched)."""
+        if self._end is None:
+            self._end = time.time()
+            self._chunks.close()
+
+    def summary(self) -> Dict[str, Any]:
+        """'row_count', 'bytes', 'truncated', 'time_to_first_row' and 'elapsed' (seconds)."""
+        return {
+            "row_count": self.row_count,
+            "bytes": self.bytes,
+            "truncated": self.truncated,
+            "time_to_first_row": self.time_to_first_row,
+            "elapsed": self.elapsed
+        }
 
 class SQLiteClient(DatabaseConnector):
     """
     SQLite implementation of the DatabaseConnector.
+
+    By default one read-write connection is shared (one statement at a time). With
+    `read_only=True` queries run on a SQLiteConnectionPool of read-only connections
+    instead, so concurrent reads proceed in parallel and no query can write.
+    `limits` bound every query (deadline, VM steps, full-scan join cost); a query stopped
+    by them raises QueryAbortedError.
     """
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, read_only: bool = False, pool_options: Optional[Dict[str, Any]] = None,
+                 limits: Optional[QueryLimits] = None):
         """
         Initialize the SQLite client.
         
         Args:
             db_path (str): Path to the SQLite database file.
+            read_only (bool): Run queries on a pool of read-only (mode=ro, WAL) connections.
+            pool_options (dict, optional): Keyword arguments for SQLiteConnectionPool
+                (max_connections, pragmas, max_age_seconds, ...).
+            limits (QueryLimits, optional): Per-query limits. Defaults to none.
         """
         self.db_path = db_path
+        self.read_only = read_only
+        self.pool_options = pool_options or {}
         self.conn = None
+        self.pool = None
+        self.limits = limits or QueryLimits()
+        self._row_counts: Dict[str, int] = {}
+        self._row_counts_version = None
+        # The connection is shared with executor threads (async agents); one statement at a time
+        self._lock = threading.RLock()
 
     def connect(self):
-        """Establishes a connection to the SQLite database."""
+        """Establishes a connection (or, in read-only mode, the connection pool) to the SQLite database."""
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(f"Database file not found at: {self.db_path}")
         
-        self.conn = sqlite3.connect(self.db_path)
+        if self.read_only:
+            self.pool = SQLiteConnectionPool(self.db_path, **self.pool_options)
+            return
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         # Enable row factory to get dictionary-like access if needed, 
         # but we will manually construct dicts for consistency across DBs.
         self.conn.row_factory = sqlite3.Row
@@ -33,41 +157,207 @@ class SQLiteClient(DatabaseConnector):
         if self.conn:
             self.conn.close()
             self.conn = None
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """A pooled read-only connection, or the shared connection held under the lock."""
+        if self.read_only:
+            with self._lock:
+                if not self.pool:
+                    self.connect()
+            with self.pool.connection() as conn:
+                yield conn
+            return
+        with self._lock:
+            if not self.conn:
+                self.connect()
+            yield self.conn
 
-    def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
+    def _table_rows(self, conn: sqlite3.Connection) -> Dict[str, int]:
         """
-        Executes a SQL query and returns the results as a list of dictionaries.
+        Estimated row count of every table, cached until the database or its WAL changes.
+        MAX(rowid) is one index lookup per table (an upper bound after deletes); tables without
+        a rowid use sqlite_stat1 when ANALYZE has run and are not costed otherwise.
         """
-        if not self.conn:
-            self.connect()
+        version = db_version(self.db_path)
+        with self._lock:
+            if version == self._row_counts_version:
+                return self._row_counts
+        analyzed = {}
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            analyzed = {tbl: int(stat.split()[0]) for tbl, stat in conn.execute("SELECT tbl, stat FROM sqlite_stat1") if stat}
+        counts = {}
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")]
+        for table in tables:
+            try:
+                counts[table] = conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+            except sqlite3.OperationalError:
+                # WITHOUT ROWID table
+                if table in analyzed:
+                    counts[table] = analyzed[table]
+        with self._lock:
+            self._row_counts = counts
+            self._row_counts_version = version
+        return counts
 
-        cursor = self.conn.cursor()
+    @contextmanager
+    def _guarded(self, conn: sqlite3.Connection, query: str, params: Optional[tuple], guard: Optional[QueryGuard]):
+        """Checks the plan cost, then runs the block under the deadline / VM step budget of `guard`."""
+        guard = guard or QueryGuard(self.limits)
+        if self.limits.max_join_scan_rows is not None:
+            check_join_cost(conn, query, params, self.limits.max_join_scan_rows, lambda: self._table_rows(conn))
+        guard.install(conn)
         try:
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            
-            if query.strip().upper().startswith("SELECT"):
-                rows = cursor.fetchall()
+            yield
+        except sqlite3.OperationalError as e:
+            # 'interrupted' by the progress handler: report which limit stopped the query
+            if guard.reason is not None:
+                raise guard.error() from e
+            raise
+        finally:
+            guard.uninstall(conn)
+
+    def execute_query(self, query: str, params: Optional[tuple] = None, guard: Optional[QueryGuard] = None) -> List[Dict[str, Any]]:
+        """
+        Executes a SQL query and returns the results as a list of dictionaries.
+        Raises QueryAbortedError if the query breaks the client's limits (or `guard` is cancelled).
+        """
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                with self._guarded(conn, query, params, guard):
+                    if params:
+                        cursor.execute(query, params)
+                    else:
+                        cursor.execute(query)
+                    
+                    rows = cursor.fetchall() if cursor.description is not None else []
+                if not self.read_only:
+                    conn.commit()
                 # Convert sqlite3.Row objects to standard dictionaries
                 return [dict(row) for row in rows]
-            else:
-                self.conn.commit()
-                return []
+            except sqlite3.Error as e:
+                print(f"SQL Error: {e}")
+                raise e
+            finally:
+                cursor.close()
+
+    def explain(self, query: str) -> Optional[str]:
+        """
+        Compiles a SQL query without running it (EXPLAIN).
+
+        Returns:
+            Optional[str]: The SQLite error message (e.g. 'no such column: x'), or None if the query compiles.
+        """
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"EXPLAIN {query}")
+                return None
+            except sqlite3.Error as e:
+                return str(e)
+            finally:
+                cursor.close()
+
+    def iter_query(self, query: str, params: Optional[tuple] = None, chunk_size: int = 500,
+                   guard: Optional[QueryGuard] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Executes a SQL query and yields its rows in chunks of at most `chunk_size` dictionaries.
+
+        Runs on a pooled connection (read-only mode) or its own connection, so a long read
+        neither holds the shared connection nor loads the whole result: only the current chunk
+        is in memory. Closing the iterator early (e.g. once a row budget is reached) stops the query.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (tuple, optional): Parameters to bind to the query.
+            chunk_size (int): Rows per yielded chunk.
+            guard (QueryGuard, optional): Guard to cancel the query with; the limits apply to the whole iteration.
+        """
+        if self.read_only:
+            with self._connection() as conn:
+                yield from self._iter_rows(conn, query, params, chunk_size, guard)
+            return
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Database file not found at: {self.db_path}")
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            yield from self._iter_rows(conn, query, params, chunk_size, guard)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _iter_rows(self, conn: sqlite3.Connection, query: str, params: Optional[tuple], chunk_size: int,
+                   guard: Optional[QueryGuard]) -> Iterator[List[Dict[str, Any]]]:
+        cursor = conn.cursor()
+        try:
+            with self._guarded(conn, query, params, guard):
+                cursor.execute(query, params or ())
+                if cursor.description is None:
+                    return
+                columns = [d[0] for d in cursor.description]
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield [dict(zip(columns, row)) for row in rows]
         except sqlite3.Error as e:
             print(f"SQL Error: {e}")
             raise e
         finally:
             cursor.close()
 
+    def stream_bounded(self, query: str, params: Optional[tuple] = None, max_rows: int = 1000,
+                       max_bytes: int = 2_000_000, chunk_size: int = 500, guard: Optional[QueryGuard] = None) -> BoundedStream:
+        """
+        Streams the rows of a SQL query in chunks, stopping at `max_rows` rows / ~`max_bytes` of values.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (tuple, optional): Parameters to bind to the query.
+            max_rows (int): Row budget.
+            max_bytes (int): Approximate size budget of the returned values.
+            chunk_size (int): Rows fetched from SQLite at a time.
+            guard (QueryGuard, optional): Guard to cancel the query with.
+
+        Returns:
+            BoundedStream: Iterator of row chunks with 'truncated' / 'time_to_first_row' figures.
+        """
+        # One row past the budget is enough to tell a complete result from a truncated one
+        chunks = self.iter_query(query, params, chunk_size=min(chunk_size, max_rows + 1), guard=guard)
+        return BoundedStream(chunks, max_rows, max_bytes)
+
+    def execute_bounded(self, query: str, params: Optional[tuple] = None, max_rows: int = 1000,
+                        max_bytes: int = 2_000_000, chunk_size: int = 500, guard: Optional[QueryGuard] = None) -> Dict[str, Any]:
+        """
+        Executes a SQL query, keeping at most `max_rows` rows / ~`max_bytes` of values.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (tuple, optional): Parameters to bind to the query.
+            max_rows (int): Row budget.
+            max_bytes (int): Approximate size budget of the returned values.
+            chunk_size (int): Rows fetched from SQLite at a time.
+            guard (QueryGuard, optional): Guard to cancel the query with.
+
+        Returns:
+            Dict[str, Any]: 'rows', 'row_count', 'bytes', 'truncated' (True if the budget cut
+            the result short), 'time_to_first_row' and 'elapsed' (seconds).
+        """
+        stream = self.stream_bounded(query, params, max_rows, max_bytes, chunk_size, guard)
+        try:
+            rows = [row for chunk in stream for row in chunk]
+        finally:
+            stream.close()
+        return {"rows": rows, **stream.summary()}
+
     def get_table_schema(self, table_name: str) -> str:
         """
         Retrieves the CREATE TABLE statement for a specific table.
         """
-        if not self.conn:
-            self.connect()
-            
         query = f"SELECT sql FROM sqlite_master WHERE type='table' AND name='{table_name}';"
         results = self.execute_query(query)
         
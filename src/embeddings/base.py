@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import List
 
@@ -31,3 +32,15 @@ class EmbeddingService(ABC):
             List[List[float]]: List of embedding vectors.
         """
         pass
+
+    async def agenerate_embedding(self, text: str) -> List[float]:
+        """Async variant of generate_embedding."""
+        return (await self.agenerate_embeddings([text]))[0]
+
+    async def agenerate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Async variant of generate_embeddings.
+        Runs the blocking implementation in the default executor; services with a native
+        async client override this.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.generate_embeddings, texts)
@@ -0,0 +1,146 @@
+import time
+import random
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .base import EmbeddingService
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    `clock` and `sleep` default to time.monotonic/time.sleep and can be replaced (e.g. in tests).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Blocks until `tokens` are available and consumes them."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+class BatchEmbedder:
+    """
+    Embeds large lists of texts with bounded parallelism across batches.
+
+    Every batch is one call to the underlying service. Calls are paced by a token
+    bucket (`requests_per_minute`) and failed batches are retried with exponential
+    backoff and jitter. The output order always matches the input order.
+    """
+
+    def __init__(self, service: EmbeddingService, batch_size: int = 100, max_workers: int = 4,
+                 requests_per_minute: Optional[float] = None, max_retries: int = 5, backoff_seconds: float = 1.0):
+        self.service = service
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.rate_limiter = TokenBucket(requests_per_minute / 60.0) if requests_per_minute else None
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                vectors = self.service.generate_embeddings(batch)
+                if len(vectors) != len(batch):
+                    raise RuntimeError(f"Expected {len(batch)} embeddings, got {len(vectors)}")
+                return vectors
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt) * (1 + random.random())
+                print(f"Embedding batch failed ({e}); retrying in {delay:.1f}s "
+                      f"(attempt {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Returns one embedding per text, in input order."""
+        if not texts:
+            return []
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self._embed_batch, batches))
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+class CoalescingEmbedder:
+    """
+    Merges concurrent async embedding requests into shared service calls.
+
+    Requests arriving within `window_seconds` of each other (or until `max_batch`
+    texts are pending) are deduplicated and sent as one agenerate_embeddings call;
+    every caller gets its own vectors back in order. Must be used from one event loop.
+    """
+
+    def __init__(self, service: EmbeddingService, max_batch: int = 100, window_seconds: float = 0.01):
+        self.service = service
+        self.max_batch = max_batch
+        self.window_seconds = window_seconds
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self._stats = {"requests": 0, "texts": 0, "calls": 0, "embedded": 0}
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Returns one embedding per text, sharing the service call with concurrent requests."""
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((list(texts), future))
+        self._pending_texts += len(texts)
+        self._stats["requests"] += 1
+        self._stats["texts"] += len(texts)
+        if self._pending_texts >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._pending_texts = self._pending, [], 0
+        if pending:
+            task = asyncio.ensure_future(self._run(pending))
+            # Keep a reference until the call is done
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending: List[Tuple[List[str], asyncio.Future]]):
+        unique = list(dict.fromkeys(text for texts, _ in pending for text in texts))
+        try:
+            self._stats["calls"] += 1
+            self._stats["embedded"] += len(unique)
+            vectors = dict(zip(unique, await self.service.agenerate_embeddings(unique)))
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for texts, future in pending:
+            if not future.done():
+                future.set_result([vectors[text] for text in texts])
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests and texts received vs service calls made and texts actually embedded."""
+        return dict(self._stats)
@@ -0,0 +1,169 @@
+import os
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from .base import EmbeddingService
+
+class CachedEmbedding(EmbeddingService, Embeddings):
+    """
+    Content-addressed cache in front of another EmbeddingService.
+
+    Vectors are keyed by (model name, task type, sha256 of the text), kept in a
+    bounded in-memory LRU and persisted to a SQLite file so they survive restarts.
+    """
+
+    def __init__(self, service: EmbeddingService, cache_dir: str = "embedding_cache", max_memory_items: int = 4096):
+        """
+        Initialize the cache.
+
+        Args:
+            service (EmbeddingService): The underlying embedding service (e.g. GeminiEmbedding).
+            cache_dir (str): Folder (relative to project root) holding the SQLite store.
+            max_memory_items (int): Maximum number of vectors kept in the in-memory LRU.
+        """
+        self.service = service
+        self.model_name = getattr(service, 'model_name', type(service).__name__)
+        self.task_type = getattr(service, 'task_type', 'default')
+        self.output_dimensionality = getattr(service, 'output_dimensionality', None)
+        self.max_memory_items = max_memory_items
+
+        self.cache_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../', cache_dir))
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self.db_path = os.path.join(self.cache_dir, "embeddings.sqlite")
+
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT, task_type TEXT, dim INTEGER, vector BLOB, created_at REAL)"
+        )
+        self._conn.commit()
+
+    def _key(self, text: str) -> str:
+        text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        if self.output_dimensionality:
+            return f"{self.model_name}@{self.output_dimensionality}|{self.task_type}|{text_hash}"
+        return f"{self.model_name}|{self.task_type}|{text_hash}"
+
+    def _remember(self, key: str, vector: List[float]):
+        """Inserts into the in-memory LRU, evicting the least recently used entries."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        """Returns the cached vector for a key (memory first, then disk), or None."""
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self._stats["memory_hits"] += 1
+            return vector
+
+        row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            vector = array('f', row[0]).tolist()
+            self._remember(key, vector)
+            self._stats["disk_hits"] += 1
+            return vector
+
+        self._stats["misses"] += 1
+        return None
+
+    def _store(self, keys: List[str], vectors: List[List[float]]):
+        rows = []
+        for key, vector in zip(keys, vectors):
+            vector = list(vector)
+            self._remember(key, vector)
+            rows.append((key, self.model_name, self.task_type, len(vector), array('f', vector).tobytes(), time.time()))
+        self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?, ?)", rows)
+        self._conn.commit()
+
+    def generate_embedding(self, text: str) -> List[float]:
+        """Returns the cached embedding for a text, calling the service on a miss."""
+        return self.generate_embeddings([text])[0]
+
+    def _split(self, texts: List[str]) -> Tuple[List[str], Dict[str, List[float]], "OrderedDict[str, str]"]:
+        """Returns (keys, cached vectors by key, texts to embed by key)."""
+        keys = [self._key(t) for t in texts]
+        found: Dict[str, List[float]] = {}
+        missing: "OrderedDict[str, str]" = OrderedDict()
+
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in found or key in missing:
+                    continue
+                vector = self._lookup(key)
+                if vector is None:
+                    missing[key] = text
+                else:
+                    found[key] = vector
+        return keys, found, missing
+
+    def _merge(self, keys: List[str], found: Dict[str, List[float]], missing: "OrderedDict[str, str]",
+               vectors: List[List[float]]) -> List[List[float]]:
+        if len(vectors) != len(missing):
+            # Nothing is stored: a short batch cannot be matched to its texts
+            raise ValueError(
+                f"Embedding service returned {len(vectors)} vectors for {len(missing)} texts ({self.model_name})"
+            )
+        if missing:
+            with self._lock:
+                self._store(list(missing.keys()), vectors)
+            found.update(zip(missing.keys(), vectors))
+        return [list(found[key]) for key in keys]
+
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Returns embeddings for a list of texts.
+        All cache misses are sent to the underlying service in a single batch call.
+        """
+        if not texts:
+            return []
+        keys, found, missing = self._split(texts)
+        vectors = self.service.generate_embeddings(list(missing.values())) if missing else []
+        return self._merge(keys, found, missing, vectors)
+
+    async def agenerate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Async variant of generate_embeddings (misses go to the service's async path).
+        The SQLite lookups and writes run in the default executor, off the event loop.
+        """
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        keys, found, missing = await loop.run_in_executor(None, self._split, texts)
+        vectors = await self.service.agenerate_embeddings(list(missing.values())) if missing else []
+        return await loop.run_in_executor(None, self._merge, keys, found, missing, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        """LangChain compatibility alias for generate_embedding."""
+        return self.generate_embedding(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """LangChain compatibility alias for generate_embeddings."""
+        return self.generate_embeddings(texts)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters for the cache."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_items"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear_memory(self):
+        """Drops the in-memory LRU (the disk store is kept)."""
+        with self._lock:
+            self._memory.clear()
@@ -0,0 +1,39 @@
+import hashlib
+import math
+from typing import List
+from langchain_core.embeddings import Embeddings
+from .base import EmbeddingService
+
+class FakeEmbedding(EmbeddingService, Embeddings):
+    """
+    Deterministic offline embedding service.
+    Vectors are derived from a hash of the text, so identical texts always map to
+    identical unit vectors. Useful for testing ingestion and retrieval without network.
+    """
+
+    def __init__(self, dim: int = 768, model_name: str = "fake-embedding"):
+        self.dim = dim
+        self.model_name = model_name
+        self.task_type = "RETRIEVAL_DOCUMENT"
+
+    def generate_embedding(self, text: str) -> List[float]:
+        values = []
+        counter = 0
+        while len(values) < self.dim:
+            digest = hashlib.sha256(f"{counter}:{text}".encode('utf-8')).digest()
+            values.extend((b - 127.5) / 127.5 for b in digest)
+            counter += 1
+        values = values[:self.dim]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return [self.generate_embedding(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """LangChain compatibility alias for generate_embedding."""
+        return self.generate_embedding(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """LangChain compatibility alias for generate_embeddings."""
+        return self.generate_embeddings(texts)
@@ -1,7 +1,8 @@
+import asyncio
 from google import genai
 from google.genai import types
 import os
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
 from langchain_core.embeddings import Embeddings
 from .base import EmbeddingService
@@ -11,9 +12,12 @@ class GeminiEmbedding(EmbeddingService, Embeddings):
     Gemini implementation of EmbeddingService using google-genai (v2).
     """
 
-    def __init__(self, api_key: str = None, model_name: str = "models/text-embedding-004"):
+    def __init__(self, api_key: str = None, model_name: str = "models/text-embedding-004", task_type: str = "RETRIEVAL_DOCUMENT",
+                 output_dimensionality: Optional[int] = None):
         """
         Initialize Gemini Embedding service.
+        :param output_dimensionality: Request shorter vectors (e.g. 256) from models that support it.
+                                      None keeps the model default (768 for text-embedding-004).
         """
         load_dotenv('secrets/.env')
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
@@ -22,6 +26,8 @@ class GeminiEmbedding(EmbeddingService, Embeddings):
             
         self.client = genai.Client(api_key=self.api_key)
         self.model_name = model_name
+        self.task_type = task_type
+        self.output_dimensionality = output_dimensionality
 
     def generate_embedding(self, text: str) -> List[float]:
         """Generates embedding for a single text."""
@@ -29,8 +35,9 @@ class GeminiEmbedding(EmbeddingService, Embeddings):
             model=self.model_name,
             contents=text,
             config=types.EmbedContentConfig(
-                task_type="RETRIEVAL_DOCUMENT",
-                title="Embedding of single text"
+                task_type=self.task_type,
+                title="Embedding of single text",
+                output_dimensionality=self.output_dimensionality
             )
         )
         return result.embeddings[0].values
@@ -50,8 +57,9 @@ class GeminiEmbedding(EmbeddingService, Embeddings):
                     model=self.model_name,
                     contents=batch,
                     config=types.EmbedContentConfig(
-                        task_type="RETRIEVAL_DOCUMENT",
-                        title="Batch embedding"
+                        task_type=self.task_type,
+                        title="Batch embedding",
+                        output_dimensionality=self.output_dimensionality
                     )
                 )
                 if result.embeddings:
@@ -63,6 +71,27 @@ class GeminiEmbedding(EmbeddingService, Embeddings):
                 
         return all_embeddings
 
+    async def agenerate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generates embeddings with the async client, sending all batches concurrently."""
+        if not texts:
+            return []
+            
+        batch_size = 100
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        results = await asyncio.gather(*[
+            self.client.aio.models.embed_content(
+                model=self.model_name,
+                contents=batch,
+                config=types.EmbedContentConfig(
+                    task_type=self.task_type,
+                    title="Batch embedding",
+                    output_dimensionality=self.output_dimensionality
+                )
+            )
+            for batch in batches
+        ])
+        return [e.values for result in results for e in (result.embeddings or [])]
+
     def embed_query(self, text: str) -> List[float]:
         """LangChain compatibility alias for generate_embedding."""
         # For query, we might want a different task type, but using same for consistency for now
@@ -1,7 +1,12 @@
 import sys
 import os
+import re
 import time
-from typing import Dict, Any
+import asyncio
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Tuple
 
 # Add project root
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -15,6 +20,14 @@ from src.agents.sql_regeneration.agent import SQLRegenerationAgent
 
 # Inherit from CustomBaseAgent
 from src.agents.base_agent import CustomBaseAgent
+from src.cache.query_cache import SemanticQueryCache
+from src.database.catalog import SchemaCatalog, TABLE_MAPPING
+from src.database.sql_validator import SQLValidator
+from src.database.rollups import RollupRewriter
+from src.embeddings.batching import CoalescingEmbedder
+
+# Set while a batch runs: embeddings of concurrent questions share service calls
+_batch_embedder: ContextVar[Optional[CoalescingEmbedder]] = ContextVar("batch_embedder", default=None)
 
 class Orchestrator(CustomBaseAgent):
     def __init__(self):
@@ -29,23 +42,312 @@ class Orchestrator(CustomBaseAgent):
         self.sql_exec_agent = SQLExecutionAgent()
         self.sql_regen_agent = SQLRegenerationAgent()
         
+        # Shared (cached) embedding service used to embed all search terms once per request
+        self.embedding_service = self.table_agent.embedding_service
+        
+        # Query -> validated SQL cache (invalidated when the database or the indices change)
+        cache_config = self.config.get('query_cache', {})
+        self.query_cache = None
+        if cache_config.get('enabled', False):
+            self.query_cache = SemanticQueryCache(
+                self.embedding_service,
+                db_path=self.sql_exec_agent.db_client.db_path,
+                index_folder=os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'faiss_db')),
+                max_entries=cache_config.get('max_entries', 1000),
+                ttl_seconds=cache_config.get('ttl_seconds', 3600),
+                similarity_threshold=cache_config.get('similarity_threshold', 0.95)
+            )
+        
+        # Speculative table search on the raw query, overlapping entity extraction
+        self.speculation_stats = {"queries": 0, "skipped_extraction": 0, "reused": 0, "refined": 0, "unused": 0}
+        self.last_batch_summary: Optional[Dict[str, Any]] = None
+        
+        # Small catalogs skip retrieval: one LLM call with the whole (compact) schema
+        self.catalog = SchemaCatalog(self.sql_exec_agent.db_client)
+        self.mode_stats = {"fused": 0, "multi_agent": 0}
+        
+        # Local pre-flight: unknown tables/columns are fixed without a regeneration call
+        validation_config = self.config.get('sql_validation', {})
+        self.sql_validator = None
+        if validation_config.get('enabled', False):
+            self.sql_validator = SQLValidator(
+                self.sql_exec_agent.db_client,
+                self.catalog,
+                fuzzy_cutoff=validation_config.get('fuzzy_cutoff', 0.75),
+                max_fixes=validation_config.get('max_fixes', 5)
+            )
+        
+        # Aggregates over the fact tables are answered from the rollup tables built at import
+        self.rollup_rewriter = None
+        if self.config.get('rollups', {}).get('enabled', False):
+            self.rollup_rewriter = RollupRewriter(self.sql_exec_agent.db_client)
+        
         print("Agents initialized.")
 
-    def run(self, user_query: str) -> Dict[str, Any]:
+    def _deadline(self, start_time: float) -> float:
+        """End-to-end deadline of a request started at `start_time` (`retry.deadline_seconds`)."""
+        return start_time + (self.config.get('retry') or {}).get('deadline_seconds', 30.0)
+
+    async def _execute(self, sql_query: str, deadline: Optional[float] = None) -> Tuple[Any, Optional[Dict[str, Any]]]:
         """
-        Runs the full Text-to-SQL pipeline.
+        Runs SQL within the execution budget: (rows or "Error: ..." string, row/byte/timing stats).
+        A query still running at `deadline` (time.time()) is cancelled, which stops it in its executor thread.
+        """
+        timeout = None if deadline is None else max(0.0, deadline - time.time())
+        try:
+            result = await asyncio.wait_for(self.sql_exec_agent.aexecute_bounded(sql_query), timeout=timeout)
+        except asyncio.TimeoutError:
+            return "Error: [deadline] Query cancelled at the end-to-end deadline.", None
+        if isinstance(result, str):
+            return result, None
+        return result['rows'], {k: v for k, v in result.items() if k != 'rows'}
+
+    async def _preflight(self, sql_query: str, logs: List[str]) -> str:
+        """
+        Compiles the SQL locally and returns it with unknown identifiers repaired where possible,
+        redirected to a rollup table when one can answer it.
+        """
+        loop = asyncio.get_running_loop()
+        if self.sql_validator is not None:
+            check = await loop.run_in_executor(None, self.sql_validator.repair, sql_query)
+            if check['fixes']:
+                fixes = ", ".join(f"{old} -> {new}" for old, new in check['fixes'])
+                print(f"  Repaired locally: {fixes}")
+                logs.append(f"Local repair: {fixes}")
+            sql_query = check['sql']
+        if self.rollup_rewriter is not None:
+            rewrite = await loop.run_in_executor(None, self.rollup_rewriter.rewrite, sql_query)
+            if rewrite['rollup']:
+                print(f"  Rewritten to rollup: {rewrite['source']} -> {rewrite['rollup']}")
+                logs.append(f"Rollup: {rewrite['source']} -> {rewrite['rollup']}")
+            sql_query = rewrite['sql']
+        return sql_query
+
+    async def _run_cached(self, user_query: str, start_time: float) -> Optional[Dict[str, Any]]:
+        """Answers the query with cached SQL, or returns None if there is no (working) cached SQL."""
+        loop = asyncio.get_running_loop()
+        hit = await loop.run_in_executor(None, self.query_cache.lookup, user_query)
+        if hit is None:
+            return None
+        print(f"Query cache hit ({hit['match']}, similarity {hit['similarity']:.3f}): {hit['query']}")
+        execution_result, execution = await self._execute(hit['sql'], self._deadline(start_time))
+        timed_out = isinstance(execution_result, str) and execution_result.startswith("Error: [deadline]")
+        if isinstance(execution_result, str) and execution_result.startswith("Error") and not timed_out:
+            # Cached SQL no longer works: drop it and run the full pipeline
+            self.query_cache.invalidate(hit['query'])
+            return None
+        result = {
+            "query": user_query,
+            "sql": hit['sql'],
+            "result": execution_result,
+            "execution": execution,
+            "latency": time.time() - start_time,
+            "cache": hit['match'],
+            "mode": "cache",
+            "logs": [f"Query: {user_query}", f"Cache hit ({hit['match']}): {hit['query']}"]
+        }
+        if timed_out:
+            # No time left for the full pipeline; the cached SQL is kept (it is slow, not broken)
+            result["error"] = execution_result
+        return result
+
+    async def _aembed(self, texts: List[str]) -> List[List[float]]:
+        """Embeds texts, pooled with the other questions of the running batch if there is one."""
+        coalescer = _batch_embedder.get()
+        if coalescer is not None:
+            return await coalescer.embed(texts)
+        return await self.embedding_service.agenerate_embeddings(texts)
+
+    async def _embed_terms(self, terms: List[str], term_vectors: Dict[str, Any]):
+        """Embeds the terms not yet in `term_vectors` with one batched call."""
+        missing = [t for t in dict.fromkeys(terms) if t not in term_vectors]
+        if missing:
+            term_vectors.update(zip(missing, await self._aembed(missing)))
+
+    async def _speculate(self, user_query: str) -> List[Dict[str, Any]]:
+        """Embeds the raw query and searches table_descriptions with it (accepted tables, best first)."""
+        vector = (await self._aembed([user_query]))[0]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.table_agent.match_vector, vector, user_query)
+
+    def _is_confident(self, results: List[Dict[str, Any]]) -> bool:
+        """Whether the best speculative table match clears the (stricter) speculation thresholds."""
+        spec = self.config.get('speculation') or {}
+        if not results:
+            return False
+        best = results[0]
+        if best['score'] is None:
+            return best.get('lexical_score', 0.0) >= spec.get('confident_lexical', 1.0)
+        return self.table_agent.store.is_match(
+            best['score'], spec.get('confident_distance', 0.6), spec.get('confident_similarity', 0.85)
+        )
+
+    async def _extract(self, user_query: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], bool]:
+        """
+        Step 1 with speculation: entity extraction and the raw-query table search run concurrently.
+        Returns (extraction result or None if it was skipped, speculative tables, confident).
+        """
+        mode = (self.config.get('speculation') or {}).get('mode', 'off')
+        extraction = asyncio.ensure_future(self.entity_agent.aexecute(user_query))
+        if mode == 'off':
+            return await extraction, [], False
+        
+        speculation = asyncio.ensure_future(self._speculate(user_query))
+        try:
+            if mode == 'skip':
+                done, _ = await asyncio.wait({extraction, speculation}, return_when=asyncio.FIRST_COMPLETED)
+                if speculation in done and not extraction.done() and speculation.exception() is None:
+                    if self._is_confident(speculation.result()):
+                        # Confident table match before the LLM answered: skip extraction entirely
+                        extraction.cancel()
+                        return None, speculation.result(), True
+            
+            extraction_result = await extraction
+            try:
+                # Never let speculation delay the regular path by more than max_wait_seconds
+                max_wait = (self.config.get('speculation') or {}).get('max_wait_seconds', 0.5)
+                speculative = await asyncio.wait_for(speculation, timeout=max_wait)
+            except asyncio.TimeoutError:
+                speculative = []
+            except Exception as e:
+                print(f"  Speculative table search failed: {e}")
+                speculative = []
+            return extraction_result, speculative, self._is_confident(speculative)
+        finally:
+            # Extraction failed (or this request was cancelled): leave no task running behind
+            for task in (extraction, speculation):
+                if not task.done():
+                    task.cancel()
+
+    async def _query_attributes(self, user_query: str, tables: List[str]) -> List[str]:
+        """Attributes without an extraction step: query words/bigrams naming a column, plus the query itself."""
+        words = re.findall(r"[A-Za-z0-9_\-]+", user_query)
+        candidates = list(dict.fromkeys(words + [f"{a} {b}" for a, b in zip(words, words[1:])]))
+        loop = asyncio.get_running_loop()
+        matches = await loop.run_in_executor(None, self.column_agent.lexical_matches, tables, candidates)
+        return [c for c in candidates if c in matches] + [user_query]
+
+    def speculation_report(self) -> Dict[str, Any]:
+        """How often speculation paid off (extraction skipped or table search reused)."""
+        stats = dict(self.speculation_stats)
+        paid_off = stats["skipped_extraction"] + stats["reused"]
+        stats["paid_off_rate"] = paid_off / stats["queries"] if stats["queries"] else 0.0
+        return stats
+
+    async def arun_batch(self, queries: List[str], concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
         """
+        Runs many questions, yielding each result as soon as it is ready.
+
+        Identical questions (after normalization) run once; every copy gets the result.
+        At most `concurrency` questions are in flight, and their entity/attribute embeddings
+        are pooled into shared service calls. Each result carries 'batch_index' (position in
+        `queries`); `self.last_batch_summary` holds throughput and latency figures afterwards.
+        """
+        batch_config = self.config.get('batch') or {}
+        concurrency = concurrency or batch_config.get('concurrency', 16)
+        coalescer = CoalescingEmbedder(
+            self.embedding_service,
+            max_batch=batch_config.get('embedding_batch_size', 100),
+            window_seconds=batch_config.get('embedding_window_ms', 20) / 1000.0
+        )
+        token = _batch_embedder.set(coalescer)
+        
+        positions: Dict[str, List[int]] = {}
+        for index, query in enumerate(queries):
+            positions.setdefault(SemanticQueryCache.normalize(query), []).append(index)
+        
+        semaphore = asyncio.Semaphore(concurrency)
         start_time = time.time()
-        logs = []
+        latencies, errors, tasks = [], 0, []
         
-        print(f"\n--- Processing Query: {user_query} ---")
-        logs.append(f"Query: {user_query}")
+        async def answer(indices: List[int]) -> Tuple[List[int], Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return indices, await self.arun(queries[indices[0]])
+                except Exception as e:
+                    return indices, {"query": queries[indices[0]], "error": f"{type(e).__name__}: {e}", "logs": []}
+        
+        try:
+            tasks.extend(asyncio.ensure_future(answer(indices)) for indices in positions.values())
+            for next_done in asyncio.as_completed(tasks):
+                indices, result = await next_done
+                latencies.append(result.get("latency", time.time() - start_time))
+                errors += "error" in result
+                for index in indices:
+                    yield dict(result, query=queries[index], batch_index=index)
+        finally:
+            _batch_embedder.reset(token)
+            for task in tasks:
+                task.cancel()
         
-        # 1. Entity Extraction
+        elapsed = time.time() - start_time
+        ordered = sorted(latencies)
+        self.last_batch_summary = {
+            "questions": len(queries),
+            "unique": len(positions),
+            "duplicates": len(queries) - len(positions),
+            "errors": errors,
+            "concurrency": concurrency,
+            "elapsed": elapsed,
+            "throughput_qps": len(queries) / elapsed if elapsed else 0.0,
+            "latency_mean": statistics.mean(ordered) if ordered else 0.0,
+            "latency_p50": ordered[len(ordered) // 2] if ordered else 0.0,
+            "latency_p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0,
+            "latency_max": ordered[-1] if ordered else 0.0,
+            "embedding": coalescer.stats()
+        }
+
+    def run_batch(self, queries: List[str], concurrency: Optional[int] = None,
+                  on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Synchronous wrapper around `arun_batch` (usable from a running event loop, like `run`).
+        `on_result` is called with each result as it finishes; returns
+        {'results': [...in input order], 'summary': {...}}.
+        """
+        async def collect() -> List[Dict[str, Any]]:
+            results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+            async for result in self.arun_batch(queries, concurrency):
+                results[result['batch_index']] = result
+                if on_result is not None:
+                    on_result(result)
+            return results
+        
+        results = self._run_sync(collect())
+        summary = self.last_batch_summary
+        print(f"Batch: {summary['questions']} questions ({summary['unique']} unique) in {summary['elapsed']:.1f}s, "
+              f"{summary['throughput_qps']:.2f} q/s, p50 {summary['latency_p50']:.2f}s, p95 {summary['latency_p95']:.2f}s, "
+              f"{summary['errors']} errors, {summary['embedding']['calls']} embedding calls")
+        return {"results": results, "summary": summary}
+
+    def _generation_mode(self) -> str:
+        """'fused' if the configured mode allows it and the compact schema fits the token budget, else 'multi_agent'."""
+        mode = self.config.get('fused_mode', 'auto')
+        if mode == 'never':
+            return "multi_agent"
+        if mode == 'always':
+            return "fused"
+        return "fused" if self.catalog.token_estimate() <= self.config.get('fused_token_budget', 2000) else "multi_agent"
+
+    async def _generate_multi_agent(self, user_query: str, logs: List[str]) -> Optional[Tuple[str, Dict[str, List[Dict[str, Any]]], int]]:
+        """
+        Extraction -> table/column retrieval -> generation.
+        Returns (sql, schema_info used, number of embedded terms), or None if no table matched.
+        """
+        # 1. Entity Extraction (overlapped with a speculative table search on the raw query)
         print("Step 1: Extracting Entities...")
-        extraction_result = self.entity_agent.execute(user_query)
-        entities = extraction_result.get('entities', [])
-        attributes = extraction_result.get('attributes', [])
+        extraction_result, speculative, confident = await self._extract(user_query)
+        speculative_tables = list(dict.fromkeys(res['payload']['table_name'] for res in speculative))
+        loop = asyncio.get_running_loop()
+        term_vectors: Dict[str, Any] = {}
+        
+        if extraction_result is None:
+            outcome = "skipped_extraction"
+            print(f"  Skipped extraction: confident speculative match {speculative_tables}")
+            entities = [user_query]
+            attributes = await self._query_attributes(user_query, speculative_tables)
+        else:
+            entities = extraction_result.get('entities', [])
+            attributes = extraction_result.get('attributes', [])
         
         # Fallback: if no entities found, use the whole query as a search term
         if not entities:
@@ -55,20 +357,50 @@ class Orchestrator(CustomBaseAgent):
         print(f"  Entities: {entities}")
         print(f"  Attributes: {attributes}")
         
+        # Use attributes for column search. If no specific attributes, use entities + query words
+        search_terms = list(dict.fromkeys(attributes + entities))
+        
         # 2. Table Selection
         print("Step 2: Selecting Tables...")
-        selected_tables = self.table_agent.execute(entities)
+        if extraction_result is None:
+            selected_tables = speculative_tables
+        elif confident:
+            # Reuse the speculative match; only entities naming a table add to it (no embedding)
+            outcome = "reused"
+            table_matches = await loop.run_in_executor(None, self.table_agent.lexical_matches, entities)
+            selected_tables = list(dict.fromkeys(
+                speculative_tables + [res['payload']['table_name'] for hits in table_matches.values() for res in hits]
+            ))
+        else:
+            # Refine: regular entity-based selection, falling back to the speculative tables
+            outcome = "refined" if speculative_tables else "unused"
+            # Terms naming a table/column exactly are resolved lexically; only the rest are embedded.
+            # At most one embedding call per query: if entities need one, attributes ride along.
+            table_matches = await loop.run_in_executor(None, self.table_agent.lexical_matches, entities)
+            pending_entities = [e for e in entities if e not in table_matches]
+            if pending_entities:
+                await self._embed_terms(pending_entities + search_terms, term_vectors)
+            selected_tables = await self.table_agent.aexecute(entities, [term_vectors.get(e) for e in entities], table_matches)
+            if not selected_tables and speculative_tables:
+                print("  No tables from entities, using the speculative match.")
+                selected_tables = speculative_tables
+        
+        if (self.config.get('speculation') or {}).get('mode', 'off') != 'off':
+            self.speculation_stats["queries"] += 1
+            self.speculation_stats[outcome] += 1
+            logs.append(f"Speculation: {outcome}")
         
         if not selected_tables:
-            return {"error": "No relevant tables found.", "logs": logs}
+            return None
             
         print(f"  Selected Tables: {selected_tables}")
         
         # 3. Column Selection
         print("Step 3: Selecting Columns...")
-        # Use attributes for column search. If no specific attributes, use entities + query words
-        search_terms = attributes + entities
-        schema_info = self.column_agent.execute(selected_tables, search_terms)
+        column_matches = await loop.run_in_executor(None, self.column_agent.lexical_matches, selected_tables, search_terms)
+        await self._embed_terms([t for t in search_terms if t not in column_matches], term_vectors)
+        schema_info = await self.column_agent.aexecute(selected_tables, search_terms, [term_vectors.get(t) for t in search_terms], column_matches)
+        logs.append(f"Embedded terms: {len(term_vectors)}/{len(search_terms)}")
         
         if not schema_info:
              print("  No specific columns match high threshold. Providing table info context.")
@@ -77,17 +409,6 @@ class Orchestrator(CustomBaseAgent):
              
         print(f"  Schema Info: {list(schema_info.keys())}")
         
-        # Mapping Table Helper
-        # Maps Entity Names to SQLite Table Names (Manual Fix for now)
-        TABLE_MAPPING = {
-            "Amazon Sale Report": "amazon_sales",
-            "International Sale Report": "international_sales",
-            "May-2022": "may_2022",
-            "P L March 2021": "p_l_march_2021",
-            "Sale Report": "inventory", 
-            "Cloud Warehouse Compariosn Chart": "product_master"
-        }
-
         # 4. SQL Generation
         print("Step 4: Generating SQL...")
         
@@ -99,43 +420,182 @@ class Orchestrator(CustomBaseAgent):
             mapped_schema_info[sql_table_name] = columns
             print(f"  Mapping '{original_table}' -> '{sql_table_name}'")
             
-        sql_query = self.sql_gen_agent.execute(user_query, mapped_schema_info)
-        print(f"  Generated SQL: {sql_query}")
-        logs.append(f"Generated SQL: {sql_query}")
-        
-        # 5. SQL Execution
-        print("Step 5: Executing SQL...")
-        execution_result = self.sql_exec_agent.execute(sql_query)
+        sql_query = await self.sql_gen_agent.aexecute(user_query, mapped_schema_info)
+        return sql_query, mapped_schema_info, len(term_vectors)
+
+    async def _regenerate(self, user_query: str, sql_query: str, execution_result: Any, execution: Optional[Dict[str, Any]],
+                          schema_info: Dict[str, List[Dict[str, Any]]], start_time: float,
+                          logs: List[str]) -> Tuple[str, Any, Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Regenerates failing SQL until it runs, feeding the regeneration agent every failed attempt so far.
+
+        Stops after `retry.max_attempts` executions, when an error or a SQL query repeats, or when
+        less than `retry.min_attempt_seconds` remain before `retry.deadline_seconds` (measured from
+        `start_time`). Regeneration calls and executions still running at the deadline are cancelled.
+        Returns (final sql, result, execution stats, diagnostics).
+        """
+        retry_config = self.config.get('retry') or {}
+        max_attempts = retry_config.get('max_attempts', 3)
+        deadline = self._deadline(start_time)
+        min_attempt_seconds = retry_config.get('min_attempt_seconds', 2.0)
         
-        # 6. Error Handling & Regeneration
-        if isinstance(execution_result, str) and execution_result.startswith("Error"):
-            print(f"  Success: False, Error: {execution_result}")
-            print("Step 6: Attempting Regeneration...")
-            logs.append(f"Execution Error: {execution_result}")
+        attempts = [{"sql": sql_query, "error": execution_result if isinstance(execution_result, str) else None}]
+        stop_reason = "succeeded"
+        while attempts[-1]["error"] is not None:
+            error = attempts[-1]["error"]
+            print(f"  Success: False, Error: {error}")
+            logs.append(f"Execution Error: {error}")
+            if len(attempts) >= max_attempts:
+                stop_reason = "max_attempts"
+                break
+            if any(a["error"] == error for a in attempts[:-1]):
+                stop_reason = "repeated_error"
+                break
+            remaining = deadline - time.time()
+            if remaining < min_attempt_seconds:
+                stop_reason = "deadline"
+                break
             
-            new_sql_query = self.sql_regen_agent.execute(
-                user_query=user_query,
-                old_sql=sql_query,
-                error_message=execution_result,
-                schema_info=mapped_schema_info
-            )
+            print(f"Step 6: Attempting Regeneration ({len(attempts)}/{max_attempts - 1})...")
+            try:
+                new_sql_query = await asyncio.wait_for(self.sql_regen_agent.aexecute(
+                    user_query=user_query,
+                    old_sql=attempts[-1]["sql"],
+                    error_message=error,
+                    schema_info=schema_info,
+                    error_history=attempts[:-1]
+                ), timeout=remaining)
+            except asyncio.TimeoutError:
+                stop_reason = "deadline"
+                break
             print(f"  Regenerated SQL: {new_sql_query}")
             logs.append(f"Regenerated SQL: {new_sql_query}")
             
+            new_sql_query = await self._preflight(new_sql_query, logs)
+            if any(a["sql"] == new_sql_query for a in attempts):
+                stop_reason = "repeated_sql"
+                break
             # Retry Execution
-            execution_result = self.sql_exec_agent.execute(new_sql_query)
+            execution_result, execution = await self._execute(new_sql_query, deadline)
+            attempts.append({"sql": new_sql_query, "error": execution_result if isinstance(execution_result, str) else None})
+        
+        if stop_reason != "succeeded":
+            logs.append(f"Regeneration stopped: {stop_reason}")
+        diagnostics = {
+            "attempts": attempts,
+            "stop_reason": stop_reason,
+            "elapsed": time.time() - start_time,
+            "remaining": max(0.0, deadline - time.time())
+        }
+        return attempts[-1]["sql"], execution_result, execution, diagnostics
+
+    def run(self, user_query: str) -> Dict[str, Any]:
+        """
+        Runs the full Text-to-SQL pipeline.
+        Synchronous wrapper around `arun`. Called from a running event loop (e.g. a notebook or
+        an async web handler), `arun` gets its own loop in a worker thread and the caller blocks.
+        """
+        return self._run_sync(self.arun(user_query))
+
+    @staticmethod
+    def _run_sync(coro):
+        """
+        Runs a coroutine to completion from synchronous code. Inside a running event loop,
+        where asyncio.run would raise, it gets its own loop in a worker thread and the caller blocks.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="orchestrator-run") as pool:
+            return pool.submit(asyncio.run, coro).result()
+
+    async def arun(self, user_query: str) -> Dict[str, Any]:
+        """
+        Runs the full Text-to-SQL pipeline without blocking the event loop:
+        LLM and embedding calls use the async genai client, FAISS and SQLite work runs in the
+        default executor. Many queries can run concurrently on one Orchestrator.
+        """
+        start_time = time.time()
+        logs = []
+        
+        print(f"\n--- Processing Query: {user_query} ---")
+        
+        if self.query_cache is not None:
+            cached = await self._run_cached(user_query, start_time)
+            if cached is not None:
+                return cached
+        logs.append(f"Query: {user_query}")
+        
+        mode = self._generation_mode()
+        self.mode_stats[mode] += 1
+        logs.append(f"Mode: {mode}")
+        term_count = 0
+        if mode == "fused":
+            print("Fused mode: generating SQL from the full schema...")
+            compact_schema = self.catalog.compact_schema()
+            sql_query = await self.sql_gen_agent.agenerate_fused(user_query, compact_schema)
+            mapped_schema_info = self.catalog.schema_info()
+        else:
+            generated = await self._generate_multi_agent(user_query, logs)
+            if generated is None:
+                return {"error": "No relevant tables found.", "mode": mode, "logs": logs}
+            sql_query, mapped_schema_info, term_count = generated
+        print(f"  Generated SQL: {sql_query}")
+        logs.append(f"Generated SQL: {sql_query}")
+        
+        # 5. SQL Execution (after local validation / repair)
+        print("Step 5: Executing SQL...")
+        sql_query = await self._preflight(sql_query, logs)
+        execution_result, execution = await self._execute(sql_query, self._deadline(start_time))
+        broken = isinstance(execution_result, str) and execution_result.startswith("Error")
+        if broken and not execution_result.startswith("Error: [deadline]"):
+            # Broken SQL must not be served from the LLM response cache next time
+            forget = self.sql_gen_agent.invalidate_fused if mode == "fused" else self.sql_gen_agent.invalidate
+            schema = compact_schema if mode == "fused" else mapped_schema_info
+            await asyncio.get_running_loop().run_in_executor(None, forget, user_query, schema)
+        
+        # 6. Error Handling & Regeneration (bounded by attempts and the end-to-end deadline)
+        final_sql, execution_result, execution, diagnostics = await self._regenerate(
+            user_query, sql_query, execution_result, execution, mapped_schema_info, start_time, logs
+        )
+        failed = isinstance(execution_result, str) and execution_result.startswith("Error")
         
         end_time = time.time()
         
-        return {
+        if self.query_cache is not None and not failed:
+            await asyncio.get_running_loop().run_in_executor(None, self.query_cache.store, user_query, final_sql, end_time - start_time)
+        
+        result = {
             "query": user_query,
-            "sql": sql_query,
+            "sql": final_sql,
             "result": execution_result,
+            "execution": execution,
             "latency": end_time - start_time,
+            "mode": mode,
+            "embedded_terms": term_count,
+            "cache": "miss" if self.query_cache is not None else None,
+            "attempts": len(diagnostics["attempts"]),
             "logs": logs
         }
+        if failed:
+            result["error"] = execution_result
+            result["diagnostics"] = diagnostics
+        return result
     
 if __name__ == "__main__":
     orchestrator = Orchestrator()
     res = orchestrator.run("How many records are there in amazon sales report?")
     print(res)
+    print(f"Modes: {orchestrator.mode_stats}")
+    if orchestrator.sql_validator is not None:
+        print(f"SQL validation: {orchestrator.sql_validator.stats()}")
+    if orchestrator.rollup_rewriter is not None:
+        print(f"Rollups: {orchestrator.rollup_rewriter.stats()}")
+    print(f"Speculation: {orchestrator.speculation_report()}")
+    if orchestrator.query_cache is not None:
+        print(f"Query cache: {orchestrator.query_cache.stats()}")
+    if orchestrator.sql_exec_agent.result_cache is not None:
+        print(f"Result cache: {orchestrator.sql_exec_agent.result_cache.stats()}")
+    if orchestrator.sql_gen_agent._llm_cache is not None:
+        print(f"LLM cache: {orchestrator.sql_gen_agent._llm_cache.stats()}")
@@ -0,0 +1,60 @@
+import os
+import json
+from typing import Dict, List, Optional, Tuple
+from .faiss_store import FaissStore
+
+# Name of the single index holding the columns of every table
+UNIFIED_COLUMN_INDEX = "columns_all"
+
+# Column ids in the unified index are (table_id << TABLE_ID_SHIFT) | column ordinal
+TABLE_ID_SHIFT = 32
+
+class ColumnTableMap:
+    """
+    Table ownership for the unified column index.
+
+    Every table gets a compact integer `table_id` and owns the contiguous id range
+    [table_id << 32, (table_id + 1) << 32), so a search can be restricted to a set of
+    tables with range selectors. The map is saved as a JSON sidecar next to the FAISS files.
+    """
+
+    def __init__(self, tables: Optional[Dict[str, Dict[str, int]]] = None):
+        self.tables = tables or {}
+
+    @staticmethod
+    def sidecar_path(folder_path: str, index_name: str = UNIFIED_COLUMN_INDEX) -> str:
+        return os.path.join(FaissStore.resolve_folder(folder_path), f"{index_name}.tables.json")
+
+    @classmethod
+    def load(cls, folder_path: str = "faiss_db", index_name: str = UNIFIED_COLUMN_INDEX) -> "ColumnTableMap":
+        path = cls.sidecar_path(folder_path, index_name)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def save(self, folder_path: str = "faiss_db", index_name: str = UNIFIED_COLUMN_INDEX):
+        with open(self.sidecar_path(folder_path, index_name), 'w', encoding='utf-8') as f:
+            json.dump(self.tables, f, indent=2)
+
+    def table_id_for(self, table_name: str) -> int:
+        """Returns the table's id, allocating a new one for unseen tables."""
+        if table_name not in self.tables:
+            table_id = max((t['table_id'] for t in self.tables.values()), default=-1) + 1
+            self.tables[table_name] = {
+                'table_id': table_id,
+                'start': table_id << TABLE_ID_SHIFT,
+                'end': (table_id + 1) << TABLE_ID_SHIFT
+            }
+        return self.tables[table_name]['table_id']
+
+    @staticmethod
+    def column_id(table_id: int, ordinal: int) -> int:
+        return (table_id << TABLE_ID_SHIFT) | ordinal
+
+    def id_ranges(self, table_names: List[str]) -> List[Tuple[int, int]]:
+        """Returns the [start, end) id ranges owned by the given tables (unknown tables are skipped)."""
+        return [
+            (self.tables[t]['start'], self.tables[t]['end'])
+            for t in table_names if t in self.tables
+        ]
@@ -0,0 +1,61 @@
+import faiss
+import numpy as np
+from typing import Any, Dict, List
+
+def _build(vectors: np.ndarray, index_factory: str, metric: str) -> faiss.Index:
+    metric_type = faiss.METRIC_INNER_PRODUCT if metric == "cosine" else faiss.METRIC_L2
+    index = faiss.index_factory(vectors.shape[1], index_factory, metric_type)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+def evaluate_layout(vectors: List[List[float]], index_factory: str, metric: str = "l2", k: int = 10,
+                    dim: int = None, rerank_k_factor: int = None) -> Dict[str, Any]:
+    """
+    Compares a compact index layout against the exact flat index on the same vectors.
+    Every vector is used as a query; recall@k is the fraction of the flat top-k that
+    the compact layout also returns.
+
+    Args:
+        vectors: Document vectors (e.g. the descriptions embedded during ingestion).
+        index_factory: FAISS factory string of the compact layout (e.g. "SQfp16", "PQ32,RFlat").
+        metric: "l2" or "cosine".
+        k: Neighbours compared per query.
+        dim: Evaluate with vectors truncated to this many dimensions (Matryoshka-style
+             reduced output_dimensionality); None keeps the full width.
+        rerank_k_factor: Candidates re-ranked exactly per result for "...,RFlat" layouts.
+
+    Returns:
+        Dict with the byte sizes of both indices, the fraction of memory saved and recall@k.
+    """
+    full = np.ascontiguousarray(np.asarray(vectors, dtype='float32'))
+    compact = np.ascontiguousarray(full[:, :dim]) if dim else full.copy()
+    if metric == "cosine":
+        faiss.normalize_L2(full)
+        faiss.normalize_L2(compact)
+    k = min(k, full.shape[0])
+
+    flat = _build(full, "Flat", metric)
+    index = _build(compact, index_factory, metric)
+    if rerank_k_factor is not None:
+        try:
+            faiss.ParameterSpace().set_index_parameter(index, "k_factor_rf", rerank_k_factor)
+        except RuntimeError:
+            pass
+
+    _, expected = flat.search(full, k)
+    _, found = index.search(compact, k)
+    hits = sum(len(set(e) & set(f)) for e, f in zip(expected, found))
+
+    bytes_flat = faiss.serialize_index(flat).nbytes
+    bytes_compressed = faiss.serialize_index(index).nbytes
+    return {
+        'index_factory': index_factory,
+        'dim': compact.shape[1],
+        'vectors': full.shape[0],
+        'bytes_flat': int(bytes_flat),
+        'bytes_compressed': int(bytes_compressed),
+        'saved': 1.0 - bytes_compressed / bytes_flat,
+        f'recall@{k}': hits / float(expected.size)
+    }
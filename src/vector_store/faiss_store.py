@@ -1,88 +1,529 @@
 import os
+import json
+import sqlite3
+import threading
 import faiss
-from typing import List, Dict, Any, Optional
-from langchain_community.vectorstores import FAISS
-from langchain_community.docstore.in_memory import InMemoryDocstore
-from langchain_core.documents import Document
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+from .base import VectorStore
 
-class FaissStore:
-    def __init__(self, index_name: str, embedding_function: Any, dim: int = 768, folder_path: str = "faiss_indices"):
+# Version of the native on-disk layout (<name>.index + <name>.meta.sqlite)
+STORE_FORMAT_VERSION = 1
+
+class FaissStore(VectorStore):
+    def __init__(self, index_name: str, embedding_function: Any, dim: int = 768, folder_path: str = "faiss_indices", mmap: bool = False,
+                 index_factory: Optional[str] = None, metric: Optional[str] = None):
         """
-        Wrapper for LangChain FAISS store.
+        FAISS store with a pickle-free native on-disk format.
+        The vectors live in a raw FAISS index file (`<index_name>.index`) and the documents
+        in a SQLite sidecar (`<index_name>.meta.sqlite`) that is queried only for search hits.
+        Every vector has a stable int64 id (IndexIDMap2), so documents can be upserted and deleted.
         :param index_name: Name of the index (used for saving/loading).
-        :param embedding_function: LangChain compatible embedding function OR a custom wrapper that has `embed_query`.
-        :param dim: Dimension of embeddings (default 768 for Gemini).
+        :param embedding_function: Embedding service with `embed_query` / `embed_documents`.
+        :param dim: Dimension for a new, empty index (default 768 for Gemini). The first vectors
+                    added decide the real dimension; later vectors (and queries) must have the same
+                    width, so embed them with the `output_dimensionality` the index was built with.
         :param folder_path: Folder to store FAISS indices.
+        :param mmap: Open the index memory-mapped and read-only, so worker processes on one
+                     host share its pages through the OS page cache. Writes reopen it in memory.
+        :param index_factory: FAISS factory string used when the index is created (e.g. "Flat",
+                              "HNSW32", "IVF256,Flat", or compact codes such as "SQfp16", "SQ8",
+                              "PQ32" and "PQ32,RFlat" for exact re-ranking). PQ/IVF layouts need
+                              training data: PQ32 needs at least 256 vectors (one per centroid), so
+                              small per-table collections should stay "Flat" or "SQ*". Existing
+                              indices keep the layout they were built with.
+        :param metric: "l2" (distance, lower is better) or "cosine" (normalized inner product, higher is better).
         """
         self.index_name = index_name
         self.embedding_function = embedding_function
         self.dim = dim
-        self.folder_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../', folder_path))
-        
+        self.mmap = mmap
+        self.index_factory = index_factory or "Flat"
+        self.metric = metric or "l2"
+        if self.metric not in ("l2", "cosine"):
+            raise ValueError(f"Unsupported metric '{self.metric}' (expected 'l2' or 'cosine')")
+        self.folder_path = self.resolve_folder(folder_path)
+
         if not os.path.exists(self.folder_path):
             os.makedirs(self.folder_path)
 
-        self.vector_store = self._load_or_create()
+        self.index_path, self.meta_path = self.index_files(self.folder_path, self.index_name)
+        self._meta_lock = threading.Lock()
+        self._meta = None
+        self._lexical = None
+        self.index = None
+        self.index = self._load_or_create()
+
+    @staticmethod
+    def resolve_folder(folder_path: str) -> str:
+        """Resolves a store folder relative to the project root."""
+        return os.path.abspath(os.path.join(os.path.dirname(__file__), '../../', folder_path))
+
+    @staticmethod
+    def index_files(folder_path: str, index_name: str) -> List[str]:
+        """Returns the on-disk files backing an index (absolute folder path expected)."""
+        return [
+            os.path.join(folder_path, f"{index_name}.index"),
+            os.path.join(folder_path, f"{index_name}.meta.sqlite"),
+        ]
+
+    @staticmethod
+    def legacy_index_files(folder_path: str, index_name: str) -> List[str]:
+        """Returns the files of the old LangChain (pickle) format."""
+        return [
+            os.path.join(folder_path, f"{index_name}.faiss"),
+            os.path.join(folder_path, f"{index_name}.pkl"),
+        ]
+
+    def _load_or_create(self) -> faiss.Index:
+        if not os.path.exists(self.index_path) and all(os.path.exists(p) for p in self.legacy_index_files(self.folder_path, self.index_name)):
+            self._migrate_legacy()
+
+        if os.path.exists(self.index_path) and os.path.exists(self.meta_path):
+            # The stored layout wins over the requested one
+            requested = (self.index_factory, self.metric)
+            info = self._read_info()
+            self.index_factory = info.get('index_factory', "Flat")
+            self.metric = info.get('metric', "l2")
+            if requested != (self.index_factory, self.metric) and requested != ("Flat", "l2"):
+                print(f"Warning: '{self.index_name}' was built as {self.index_factory}/{self.metric}, "
+                      f"not {requested[0]}/{requested[1]}. Rebuild the index to change its layout.")
+            return self._read_index(self.mmap)
+
+        # If not found, create new
+        print(f"Creating new FAISS index: {self.index_name} ({self.index_factory}, {self.metric})")
+        return self._new_index(self.dim)
 
-    def _load_or_create(self) -> FAISS:
+    def _new_index(self, dim: int) -> faiss.Index:
+        metric_type = faiss.METRIC_INNER_PRODUCT if self.metric == "cosine" else faiss.METRIC_L2
+        index = faiss.index_factory(dim, self.index_factory, metric_type)
+        # IVF layouts store ids natively; everything else gets an id map
+        if not self._has_ids(index):
+            index = faiss.IndexIDMap2(index)
+        return index
+
+    @staticmethod
+    def _is_ivf(index: faiss.Index) -> bool:
         try:
-            # Try loading existing index
-            return FAISS.load_local(
-                folder_path=self.folder_path,
-                index_name=self.index_name,
-                embeddings=self.embedding_function,
-                allow_dangerous_deserialization=True
-            )
+            faiss.extract_index_ivf(index)
+            return True
         except RuntimeError:
-            # If not found, create new
-            print(f"Creating new FAISS index: {self.index_name}")
-            index = faiss.IndexFlatL2(self.dim)
-            return FAISS(
-                embedding_function=self.embedding_function,
-                index=index,
-                docstore=InMemoryDocstore(),
-                index_to_docstore_id={},
+            return False
+
+    @classmethod
+    def _has_ids(cls, index: faiss.Index) -> bool:
+        """True if the index keeps caller-provided ids (id map or IVF)."""
+        return isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)) or cls._is_ivf(index)
+
+    @property
+    def higher_is_better(self) -> bool:
+        """True when scores are similarities (cosine), False when they are L2 distances."""
+        return self.metric == "cosine"
+
+    def is_match(self, score: float, distance_threshold: float, similarity_threshold: float) -> bool:
+        """Applies the threshold that fits the index metric."""
+        if self.higher_is_better:
+            return score >= similarity_threshold
+        return score <= distance_threshold
+
+    def _prepare(self, vectors: Any) -> np.ndarray:
+        matrix = np.array(vectors, dtype='float32', copy=True)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if self.index is not None and self.index.ntotal > 0 and matrix.shape[1] != self.index.d:
+            # Cutting vectors down would also need re-normalizing; embed with the index's width instead
+            raise ValueError(
+                f"Vectors have {matrix.shape[1]} dimensions but index '{self.index_name}' has {self.index.d}; "
+                f"embed them with output_dimensionality={self.index.d}"
             )
+        if self.metric == "cosine":
+            faiss.normalize_L2(matrix)
+        return matrix
+
+    def set_search_params(self, ef_search: Optional[int] = None, nprobe: Optional[int] = None, rerank_k_factor: Optional[float] = None):
+        """
+        Applies query-time parameters where the index supports them: HNSW `efSearch`,
+        IVF `nprobe` and, for re-ranking layouts (",RFlat"), how many candidates per
+        requested result are re-scored exactly (`rerank_k_factor`).
+        """
+        space = faiss.ParameterSpace()
+        for name, value in (("efSearch", ef_search), ("nprobe", nprobe), ("k_factor_rf", rerank_k_factor)):
+            if value is None:
+                continue
+            try:
+                space.set_index_parameter(self.index, name, value)
+            except RuntimeError:
+                # Parameter does not apply to this index type
+                pass
+
+    def train(self, vectors: List[List[float]]):
+        """Trains the index (IVF/PQ layouts) on representative vectors; no-op if already trained."""
+        if not self.index.is_trained:
+            print(f"Training FAISS index '{self.index_name}' ({self.index_factory}) on {len(vectors)} vectors...")
+            self.index.train(self._prepare(vectors))
+
+    def connect(self):
+        """(Re)opens the index from disk."""
+        self.index = self._load_or_create()
+
+    def _read_index(self, mmap: bool) -> faiss.Index:
+        if mmap:
+            try:
+                return faiss.read_index(self.index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:
+                # Not every index type supports mmap; fall back to a private in-memory copy
+                pass
+        return faiss.read_index(self.index_path)
+
+    def _migrate_legacy(self):
+        """One-time conversion of a LangChain `.faiss`/`.pkl` index to the native format."""
+        print(f"Migrating legacy FAISS index '{self.index_name}' to the native format...")
+        from langchain_community.vectorstores import FAISS
+
+        legacy = FAISS.load_local(
+            folder_path=self.folder_path,
+            index_name=self.index_name,
+            embeddings=self.embedding_function,
+            allow_dangerous_deserialization=True
+        )
+        rows = []
+        for label, doc_id in legacy.index_to_docstore_id.items():
+            doc = legacy.docstore.search(doc_id)
+            rows.append((int(label), doc.page_content, json.dumps(doc.metadata)))
+
+        self.index = legacy.index
+        self._write_rows(rows)
+        self.save_local()
+
+    def _read_info(self) -> Dict[str, str]:
+        with self._meta_lock:
+            try:
+                rows = self._connect_meta().execute("SELECT key, value FROM info").fetchall()
+            except sqlite3.OperationalError:
+                return {}
+        return dict(rows)
+
+    def _connect_meta(self) -> sqlite3.Connection:
+        if self._meta is None:
+            if self.mmap and os.path.exists(self.meta_path):
+                uri = f"file:{self.meta_path}?mode=ro"
+                self._meta = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            else:
+                self._meta = sqlite3.connect(self.meta_path, check_same_thread=False)
+                self._meta.execute("CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, content TEXT, metadata TEXT)")
+                self._meta.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+                self._meta.execute("INSERT OR REPLACE INTO info VALUES ('format_version', ?)", (str(STORE_FORMAT_VERSION),))
+                self._meta.commit()
+        return self._meta
+
+    def _ensure_writable(self):
+        """Swaps a memory-mapped read-only index (and metadata connection) for writable ones."""
+        if not self.mmap:
+            return
+        if os.path.exists(self.index_path):
+            self.index = self._read_index(mmap=False)
+        with self._meta_lock:
+            if self._meta is not None:
+                self._meta.close()
+                self._meta = None
+        self.mmap = False
+
+    def _ensure_id_map(self):
+        """Converts an index without stable ids (positions as labels) to an IndexIDMap2 with the same labels."""
+        if self._has_ids(self.index):
+            return
+        count = self.index.ntotal
+        index = self._new_index(self.index.d)
+        if count:
+            vectors = self.index.reconstruct_n(0, count)
+            if not index.is_trained:
+                index.train(vectors)
+            index.add_with_ids(vectors, np.arange(count, dtype='int64'))
+        self.index = index
+
+    def _stored_ids(self) -> np.ndarray:
+        return faiss.vector_to_array(self.index.id_map)
+
+    def _reconstruct_all(self) -> np.ndarray:
+        """Returns every stored vector of an id-mapped index, in the order of `_stored_ids()`."""
+        inner = faiss.downcast_index(self.index.index)
+        return inner.reconstruct_n(0, inner.ntotal)
+
+    def _remove_ids(self, id_array: np.ndarray):
+        if not isinstance(self.index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            # IVF: ids live in the inverted lists, unknown ids are ignored
+            self.index.remove_ids(id_array)
+            return
+        existing = self._stored_ids()
+        present = np.isin(id_array, existing)
+        if not present.any():
+            return
+        try:
+            self.index.remove_ids(id_array[present])
+        except RuntimeError:
+            # Graph indices (HNSW) cannot delete in place: rebuild without the removed ids
+            keep = ~np.isin(existing, id_array)
+            vectors = self._reconstruct_all()
+            index = self._new_index(self.index.d)
+            if keep.any():
+                if not index.is_trained:
+                    index.train(vectors[keep])
+                index.add_with_ids(vectors[keep], existing[keep])
+            self.index = index
+
+    def _write_rows(self, rows: List[Tuple[int, str, str]]):
+        with self._meta_lock:
+            conn = self._connect_meta()
+            conn.executemany("INSERT OR REPLACE INTO docs VALUES (?, ?, ?)", rows)
+            conn.commit()
+            self._lexical = None
+
+    def _delete_rows(self, ids: List[int]):
+        with self._meta_lock:
+            conn = self._connect_meta()
+            conn.executemany("DELETE FROM docs WHERE id = ?", [(i,) for i in ids])
+            conn.commit()
+            self._lexical = None
+
+    def all_documents(self) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Returns every stored (id, content, metadata) row."""
+        with self._meta_lock:
+            rows = self._connect_meta().execute("SELECT id, content, metadata FROM docs ORDER BY id").fetchall()
+        return [(row[0], row[1], json.loads(row[2])) for row in rows]
+
+    def lexical_index(self):
+        """LexicalIndex over this store's documents, built on first use and rebuilt after writes."""
+        if self._lexical is None:
+            from .lexical import LexicalIndex
+            self._lexical = LexicalIndex(self.all_documents())
+        return self._lexical
+
+    def next_id(self) -> int:
+        """Returns the smallest id larger than every stored id."""
+        with self._meta_lock:
+            row = self._connect_meta().execute("SELECT MAX(id) FROM docs").fetchone()
+        return 0 if row[0] is None else row[0] + 1
 
     def add_documents(self, documents: List[Dict[str, Any]]):
         """
         Add documents to the store.
         :param documents: List of dicts with 'content' and 'metadata'.
         """
-        docs = [
-            Document(page_content=d['content'], metadata=d.get('metadata', {})) 
-            for d in documents
+        if not documents:
+            return
+        vectors = self.embedding_function.embed_documents([d['content'] for d in documents])
+        self.add_vectors(vectors, documents)
+
+    def add_vectors(self, vectors: List[List[float]], documents: List[Dict[str, Any]]) -> List[int]:
+        """
+        Add precomputed vectors with their documents (new ids are generated) and persist the store.
+        :param vectors: One embedding per document.
+        :param documents: List of dicts with 'content' and 'metadata'.
+        :return: The ids assigned to the documents.
+        """
+        return self.upsert_vectors(
+            vectors,
+            [d.get('metadata', {}) for d in documents],
+            contents=[d['content'] for d in documents]
+        )
+
+    def upsert_vectors(self, vectors: List[List[float]], metadata: List[Dict[str, Any]], ids: Optional[List[Any]] = None,
+                       contents: Optional[List[str]] = None, persist: bool = True) -> List[int]:
+        """
+        Inserts or replaces vectors under stable ids.
+        :param vectors: List of embedding vectors.
+        :param metadata: Metadata (payload) per vector.
+        :param ids: Integer ids (or their string form). Existing ids are replaced; None generates new ids.
+        :param contents: Document text per vector (defaults to empty).
+        :param persist: Write the index to disk afterwards.
+        :return: The ids that were written.
+        """
+        if len(vectors) == 0:
+            return []
+        self._ensure_writable()
+        self._ensure_id_map()
+
+        matrix = self._prepare(vectors)
+        if self.index.ntotal == 0 and matrix.shape[1] != self.index.d:
+            # Empty store created with a default dimension: adopt the real one
+            self.dim = matrix.shape[1]
+            self.index = self._new_index(self.dim)
+        if not self.index.is_trained:
+            # Build-time training step (IVF/PQ) on the vectors being ingested
+            self.train(matrix)
+
+        if ids is None:
+            start = self.next_id()
+            ids = list(range(start, start + len(vectors)))
+        id_array = np.asarray([int(i) for i in ids], dtype='int64')
+
+        # Replace: drop any previous vectors under these ids first
+        self._remove_ids(id_array)
+        self.index.add_with_ids(matrix, id_array)
+
+        contents = contents if contents is not None else [""] * len(vectors)
+        rows = [
+            (int(i), content, json.dumps(meta or {}))
+            for i, content, meta in zip(id_array, contents, metadata)
         ]
-        self.vector_store.add_documents(docs)
-        self.save_local()
+        self._write_rows(rows)
+        if persist:
+            self.save_local()
+        return [int(i) for i in id_array]
+
+    def delete_vectors(self, ids: List[Any], persist: bool = True):
+        """Removes vectors (and their documents) by id."""
+        if not ids:
+            return
+        self._ensure_writable()
+        self._ensure_id_map()
+        id_list = [int(i) for i in ids]
+        self._remove_ids(np.asarray(id_list, dtype='int64'))
+        self._delete_rows(id_list)
+        if persist:
+            self.save_local()
+
+    def search_vectors(self, query_vector: List[float], limit: int = 5) -> List[Dict[str, Any]]:
+        """Searches with a single precomputed query vector."""
+        return self.search_by_vectors([query_vector], k=limit)[0]
 
     def search_similarity(self, query: str, k: int = 3, threshold: float = 0.0) -> List[Dict[str, Any]]:
         """
         Search for similar documents.
         Returns list of results with score.
         """
-        # score_threshold filters results with score < threshold (for cosine sim) or distance > threshold (L2).
-        # FAISS uses L2 distance by default (lower is better) or Inner Product (higher is better).
-        # Wrapper uses whatever index is provided. IndexFlatL2 is L2 distance.
-        # LangChain's similarity_search_with_score returns L2 distance for L2 index.
-        # So "threshold" interpretation depends on metric. 
-        # For simplicity, we return everything top_k and let agent filter.
-        
-        results = self.vector_store.similarity_search_with_score(query, k=k)
-        
-        formatted_results = []
-        for doc, score in results:
-            # Convert L2 distance to a similarity score if needed, or just pass raw.
-            # L2 is 0-inf (lower is better).
-            # We might want to normalize or just return score.
-            # Let's return raw score and payload equivalent.
-            formatted_results.append({
-                'payload': doc.metadata,  # Map metadata to payload for compatibility
-                'content': doc.page_content,
-                'score': float(score) # L2 distance
-            })
-            
-        return formatted_results
+        # Scores are L2 distances (lower is better) or cosine similarities (higher is better,
+        # see `higher_is_better`); we return everything top_k and let the agent filter.
+        vector = self.embedding_function.embed_query(query)
+        return self.search_by_vectors([vector], k=k)[0]
+
+    def search_by_vectors(self, vectors: List[List[float]], k: int = 3, id_ranges: Optional[List[Tuple[int, int]]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Search with precomputed query vectors.
+        The whole (n_terms x dim) matrix is answered by a single `index.search` call,
+        so callers can embed their terms once and reuse the vectors across stores.
+        If `id_ranges` ([start, end) pairs) is given, only vectors with ids inside
+        those ranges are considered.
+        Returns one result list per query vector, in the same format as `search_similarity`.
+        """
+        if len(vectors) == 0:
+            return []
+
+        matrix = self._prepare(vectors)
+
+        index = self.index
+        if index.ntotal == 0:
+            return [[] for _ in range(matrix.shape[0])]
+
+        if id_ranges is not None:
+            if not id_ranges:
+                return [[] for _ in range(matrix.shape[0])]
+            # Keep references to the selectors alive for the duration of the search
+            selector, _selectors = self._id_selector(id_ranges)
+            params = self._search_params(selector)
+            try:
+                if params is None:
+                    raise RuntimeError("id selectors not supported")
+                distances, labels = index.search(matrix, min(k, index.ntotal), params=params)
+            except RuntimeError:
+                # Layout without selector support (PQ, re-ranking): over-fetch and filter
+                distances, labels = self._search_and_filter(matrix, k, id_ranges)
+        else:
+            distances, labels = index.search(matrix, min(k, index.ntotal))
+
+        # Only the hits are read from the metadata sidecar
+        docs = self._fetch_documents({int(label) for label in labels.flatten() if label != -1})
+
+        all_results = []
+        for row_distances, row_labels in zip(distances, labels):
+            row_results = []
+            for score, label in zip(row_distances, row_labels):
+                doc = docs.get(int(label))
+                if doc is None:
+                    continue
+                row_results.append(self._format_result(doc, score, int(label)))
+            all_results.append(row_results)
+
+        return all_results
+
+    def _fetch_documents(self, labels: set) -> Dict[int, Dict[str, Any]]:
+        if not labels:
+            return {}
+        placeholders = ",".join("?" * len(labels))
+        with self._meta_lock:
+            rows = self._connect_meta().execute(
+                f"SELECT id, content, metadata FROM docs WHERE id IN ({placeholders})", tuple(labels)
+            ).fetchall()
+        return {
+            row[0]: {'content': row[1], 'metadata': json.loads(row[2])}
+            for row in rows
+        }
+
+    @staticmethod
+    def _id_selector(id_ranges: List[Tuple[int, int]]) -> Tuple[faiss.IDSelector, List[faiss.IDSelector]]:
+        """
+        Builds a FAISS id selector matching any of the [start, end) id ranges.
+        Returns the selector and every sub-selector it references (which must stay alive).
+        """
+        selectors = [faiss.IDSelectorRange(start, end) for start, end in id_ranges]
+        selector = selectors[0]
+        for other in selectors[1:]:
+            selector = faiss.IDSelectorOr(selector, other)
+            selectors.append(selector)
+        return selector, selectors
+
+    def _search_and_filter(self, matrix: np.ndarray, k: int, id_ranges: List[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Unfiltered search with a larger k, keeping only ids inside the ranges (padded with -1)."""
+        fetch = min(self.index.ntotal, max(k * 10, 100))
+        distances, labels = self.index.search(matrix, fetch)
+        out_d = np.full((matrix.shape[0], k), np.nan, dtype='float32')
+        out_l = np.full((matrix.shape[0], k), -1, dtype='int64')
+        for row in range(matrix.shape[0]):
+            keep = np.zeros(fetch, dtype=bool)
+            for start, end in id_ranges:
+                keep |= (labels[row] >= start) & (labels[row] < end)
+            found = np.flatnonzero(keep)[:k]
+            out_d[row, :len(found)] = distances[row, found]
+            out_l[row, :len(found)] = labels[row, found]
+        return out_d, out_l
+
+    def _search_params(self, selector: faiss.IDSelector) -> Optional[faiss.SearchParameters]:
+        """
+        Search parameters of the right type for the index, carrying the selector and current
+        efSearch/nprobe. None if the layout cannot filter by id during the search.
+        """
+        inner = faiss.downcast_index(self.index.index) if isinstance(self.index, (faiss.IndexIDMap, faiss.IndexIDMap2)) else self.index
+        if isinstance(inner, (faiss.IndexRefine, faiss.IndexPQ)):
+            return None
+        if isinstance(inner, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
+        try:
+            ivf = faiss.extract_index_ivf(inner)
+            return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+        except RuntimeError:
+            return faiss.SearchParameters(sel=selector)
+
+    @staticmethod
+    def _format_result(doc: Dict[str, Any], score: float, doc_id: int) -> Dict[str, Any]:
+        # Raw score (L2 distance: lower is better, or cosine similarity: higher is better) and payload
+        return {
+            'id': doc_id,
+            'payload': doc['metadata'],  # Map metadata to payload for compatibility
+            'content': doc['content'],
+            'score': float(score) # L2 distance or cosine similarity
+        }
 
     def save_local(self):
-        self.vector_store.save_local(folder_path=self.folder_path, index_name=self.index_name)
+        # Write to a temp file and rename, so processes that have the old file
+        # memory-mapped keep a consistent view until they reload.
+        tmp_path = f"{self.index_path}.tmp"
+        faiss.write_index(self.index, tmp_path)
+        os.replace(tmp_path, self.index_path)
+        with self._meta_lock:
+            conn = self._connect_meta()
+            conn.executemany("INSERT OR REPLACE INTO info VALUES (?, ?)", [
+                ('index_factory', self.index_factory),
+                ('metric', self.metric),
+                ('dim', str(self.index.d)),
+            ])
+            conn.commit()
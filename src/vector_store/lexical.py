@@ -0,0 +1,154 @@
+import re
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+def normalize_name(text: str) -> str:
+    """Lower-cases and joins words with '_': 'Ship City', 'ship-city' and 'ShipCity' all become 'ship_city'."""
+    text = re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', text.strip())
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in normalize_name(text).split('_') if t]
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text.replace('_', '')} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class LexicalIndex:
+    """
+    In-process lexical index over the documents of a FaissStore (table or column descriptions).
+
+    Two signals, no embedding call:
+    - name confidence in [0, 1]: 1.0 when the normalized term equals a table/column name,
+      0.9 when its words pick out exactly one name (e.g. 'Amazon' -> 'Amazon Sale Report'),
+      otherwise character-trigram similarity of the term and the name.
+    - BM25 over the name and description, used to rank candidates and for hybrid fusion.
+
+    Results have the same shape as FaissStore results ('id', 'payload', 'content', 'score'),
+    where 'score' is the lexical confidence.
+    """
+
+    def __init__(self, documents: Iterable[Tuple[int, str, Dict[str, Any]]], k1: float = 1.5, b: float = 0.75):
+        """
+        :param documents: (id, content, metadata) rows; the name is metadata['column_name'] or metadata['table_name'].
+        """
+        self.k1 = k1
+        self.b = b
+        self.docs: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        self.names: Dict[int, str] = {}
+        self._name_tokens: Dict[int, Set[str]] = {}
+        self._name_trigrams: Dict[int, Set[str]] = {}
+        self._by_name: Dict[str, List[int]] = {}
+        self._term_freqs: Dict[int, Counter] = {}
+        self._doc_freq: Counter = Counter()
+
+        for doc_id, content, metadata in documents:
+            name = normalize_name(metadata.get('column_name') or metadata.get('table_name') or '')
+            tokens = tokenize(name) + tokenize(content)
+            self.docs[doc_id] = (content, metadata)
+            self.names[doc_id] = name
+            self._name_tokens[doc_id] = set(tokenize(name))
+            self._name_trigrams[doc_id] = _trigrams(name)
+            self._by_name.setdefault(name.replace('_', ''), []).append(doc_id)
+            self._term_freqs[doc_id] = Counter(tokens)
+            self._doc_freq.update(set(tokens))
+
+        lengths = [sum(tf.values()) for tf in self._term_freqs.values()]
+        self._avg_len = sum(lengths) / len(lengths) if lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _candidates(self, table_names: Optional[Iterable[str]]) -> List[int]:
+        if table_names is None:
+            return list(self.docs)
+        allowed = set(table_names)
+        return [doc_id for doc_id, (_, metadata) in self.docs.items() if metadata.get('table_name') in allowed]
+
+    def _format(self, doc_id: int, score: float) -> Dict[str, Any]:
+        content, metadata = self.docs[doc_id]
+        return {'id': doc_id, 'payload': metadata, 'content': content, 'score': score}
+
+    def name_scores(self, term: str, table_names: Optional[Iterable[str]] = None) -> Dict[int, float]:
+        """Name confidence of every candidate document for the term."""
+        candidates = self._candidates(table_names)
+        normalized = normalize_name(term)
+        if not normalized:
+            return {}
+        term_tokens = set(tokenize(normalized))
+        term_trigrams = _trigrams(normalized)
+
+        exact = set(self._by_name.get(normalized.replace('_', ''), []))
+        covering = [d for d in candidates if term_tokens and term_tokens <= self._name_tokens[d]]
+        covering_names = {self.names[d] for d in covering}
+
+        scores = {}
+        for doc_id in candidates:
+            if doc_id in exact:
+                scores[doc_id] = 1.0
+            elif doc_id in covering and len(covering_names) == 1:
+                scores[doc_id] = 0.9
+            else:
+                grams = self._name_trigrams[doc_id]
+                scores[doc_id] = 2 * len(term_trigrams & grams) / (len(term_trigrams) + len(grams)) if grams else 0.0
+        return scores
+
+    def match(self, term: str, threshold: float = 0.9, table_names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        High-confidence name matches for a term (best first), or [] if the vector path is needed.
+        :param table_names: Only consider documents of these tables (metadata['table_name']).
+        """
+        scores = self.name_scores(term, table_names)
+        hits = sorted((d for d, s in scores.items() if s >= threshold), key=lambda d: (-scores[d], d))
+        return [self._format(d, scores[d]) for d in hits]
+
+    def bm25(self, term: str, k: int = 10, table_names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """BM25 ranking of names + descriptions for a term (score = raw BM25)."""
+        query = tokenize(term)
+        n_docs = len(self.docs)
+        scores = {}
+        for doc_id in self._candidates(table_names):
+            tf = self._term_freqs[doc_id]
+            length = sum(tf.values())
+            score = 0.0
+            for token in query:
+                if not tf[token]:
+                    continue
+                idf = math.log(1 + (n_docs - self._doc_freq[token] + 0.5) / (self._doc_freq[token] + 0.5))
+                norm = tf[token] + self.k1 * (1 - self.b + self.b * length / (self._avg_len or 1.0))
+                score += idf * tf[token] * (self.k1 + 1) / norm
+            if score > 0:
+                scores[doc_id] = score
+        ranked = sorted(scores, key=lambda d: (-scores[d], d))[:k]
+        return [self._format(d, scores[d]) for d in ranked]
+
+    def hybrid(self, term: str, vector_results: List[Dict[str, Any]], k: int = 10,
+               table_names: Optional[Iterable[str]] = None, rrf_k: int = 60) -> List[Dict[str, Any]]:
+        """
+        Fuses lexical (name confidence + BM25) and vector rankings with reciprocal rank fusion.
+        Each result keeps its vector 'score' (None if only found lexically) and gains
+        'lexical_score' (name confidence) and 'fused_score'.
+        """
+        names = self.name_scores(term, table_names)
+        by_name = sorted((d for d, s in names.items() if s > 0), key=lambda d: (-names[d], d))
+        rankings = [
+            [r['id'] for r in vector_results],
+            by_name[:max(k, len(vector_results))],
+            [r['id'] for r in self.bm25(term, k=max(k, len(vector_results)), table_names=table_names)],
+        ]
+        fused: Dict[int, float] = {}
+        for ranking in rankings:
+            for rank, doc_id in enumerate(ranking):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+
+        vector_scores = {r['id']: r['score'] for r in vector_results}
+        results = []
+        for doc_id in sorted(fused, key=lambda d: (-fused[d], d))[:k]:
+            if doc_id not in self.docs:
+                continue
+            result = self._format(doc_id, vector_scores.get(doc_id))
+            result['lexical_score'] = names.get(doc_id, 0.0)
+            result['fused_score'] = fused[doc_id]
+            results.append(result)
+        return results
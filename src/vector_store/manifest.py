@@ -0,0 +1,99 @@
+import os
+import json
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+from .faiss_store import FaissStore
+
+MANIFEST_FILENAME = "manifest.json"
+
+class IngestionManifest:
+    """
+    Records what has been ingested: for every description file, its content hash,
+    the index it lives in and its stable vector id.
+
+    Comparing the manifest with the files on disk tells ingestion exactly which
+    descriptions are new or changed (embed + upsert) and which were deleted (remove).
+    """
+
+    def __init__(self, path: str, files: Optional[Dict[str, Dict[str, Any]]] = None, next_ids: Optional[Dict[str, int]] = None,
+                 embedding: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.files = files or {}
+        # Per-counter next id, so ids of deleted documents are never reused
+        self.next_ids = next_ids or {}
+        # Embedding model/width the stored vectors were produced with
+        self.embedding = embedding or {}
+
+    @classmethod
+    def load(cls, folder_path: str = "faiss_db") -> "IngestionManifest":
+        path = os.path.join(FaissStore.resolve_folder(folder_path), MANIFEST_FILENAME)
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(path, data.get('files', {}), data.get('next_ids', {}), data.get('embedding', {}))
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def embedding_dim(self, default: Optional[int] = None) -> Optional[int]:
+        """Width the stored vectors were embedded with (`dim` recorded at ingestion), else `default`."""
+        return self.embedding['dim'] if 'dim' in self.embedding else default
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'files': self.files, 'next_ids': self.next_ids, 'embedding': self.embedding}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def allocate_id(self, counter: str) -> int:
+        """Returns the next unused id for a counter (e.g. an index name)."""
+        next_id = self.next_ids.get(counter, 0)
+        self.next_ids[counter] = next_id + 1
+        return next_id
+
+    def plan(self, targets: Dict[str, Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        Compares the current files with the manifest.
+
+        Args:
+            targets: Mapping of source path -> (index name, content).
+
+        Returns:
+            Dict with 'upsert' (sources to embed and write), 'unchanged' (sources to skip),
+            'removed' (sources whose files are gone) and 'delete' (index name -> vector ids to remove).
+        """
+        upsert, unchanged, removed = [], [], []
+        delete: Dict[str, List[int]] = {}
+
+        for source, (index_name, content) in targets.items():
+            entry = self.files.get(source)
+            if entry is None:
+                upsert.append(source)
+            elif entry['index'] != index_name:
+                # Moved to another index (e.g. switched to the unified column index)
+                delete.setdefault(entry['index'], []).append(entry['id'])
+                upsert.append(source)
+            elif entry['hash'] != self.content_hash(content):
+                upsert.append(source)
+            else:
+                unchanged.append(source)
+
+        for source, entry in self.files.items():
+            if source not in targets:
+                delete.setdefault(entry['index'], []).append(entry['id'])
+                removed.append(source)
+
+        return {'upsert': upsert, 'unchanged': unchanged, 'removed': removed, 'delete': delete}
+
+    def record(self, source: str, index_name: str, vector_id: int, content: str):
+        self.files[source] = {'index': index_name, 'id': vector_id, 'hash': self.content_hash(content)}
+
+    def forget(self, sources: List[str]):
+        for source in sources:
+            self.files.pop(source, None)
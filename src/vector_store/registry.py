@@ -0,0 +1,141 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from .faiss_store import FaissStore
+
+class FaissStoreRegistry:
+    """
+    Process-wide cache of loaded FaissStore instances.
+
+    Each index is loaded from disk once and shared across requests and agents.
+    The backing files are re-checked (mtime/size) at most every `check_interval`
+    seconds and the store is reloaded only when they changed. When the estimated
+    memory of all loaded indices exceeds `max_memory_bytes`, the least recently
+    used ones are evicted.
+    """
+
+    def __init__(self, max_memory_bytes: int = 512 * 1024 * 1024, check_interval: float = 5.0):
+        self.max_memory_bytes = max_memory_bytes
+        self.check_interval = check_interval
+        self._entries: "OrderedDict[Tuple[str, str, Tuple], Dict[str, Any]]" = OrderedDict()
+        self._key_locks: Dict[Tuple[str, str, Tuple], threading.Lock] = {}
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "loads": 0, "reloads": 0, "evictions": 0}
+
+    @staticmethod
+    def _signature(folder_path: str, index_name: str) -> Optional[Tuple]:
+        """Returns (mtime, size) of every backing file, or None if the index does not exist yet."""
+        signature = []
+        for path in FaissStore.index_files(folder_path, index_name):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                return None
+            signature.append((st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    @staticmethod
+    def _size_of(signature: Optional[Tuple]) -> int:
+        # On-disk size is a good proxy for the footprint of index + metadata
+        return sum(size for _, size in signature) if signature else 0
+
+    @staticmethod
+    def _embedder_key(embedding_function: Any) -> Tuple:
+        """
+        Identity of the embedder a store is bound to: its model and vector width, so agents
+        using the same model share a store while a different model or dimension gets its own.
+        """
+        model = getattr(embedding_function, 'model_name', None)
+        if model is None:
+            # Unknown embedder: never share its store with another instance
+            return (type(embedding_function).__name__, id(embedding_function))
+        dim = getattr(embedding_function, 'output_dimensionality', None) or getattr(embedding_function, 'dim', None)
+        return (model, dim)
+
+    def _cached(self, key: Tuple, folder: str, index_name: str, now: float) -> Optional[FaissStore]:
+        """Returns the loaded store if it is still current on disk, otherwise None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            if now - entry["checked_at"] >= self.check_interval:
+                if self._signature(folder, index_name) != entry["signature"]:
+                    return None
+                entry["checked_at"] = now
+            self._stats["hits"] += 1
+            return entry["store"]
+
+    def get(self, index_name: str, embedding_function: Any, folder_path: str = "faiss_db") -> FaissStore:
+        """
+        Returns a shared FaissStore for the index, loading or reloading it only when needed.
+        The load runs under a lock of its own key, so other indices stay available meanwhile
+        and concurrent callers of the same index wait for a single load.
+        """
+        folder = FaissStore.resolve_folder(folder_path)
+        key = (folder, index_name, self._embedder_key(embedding_function))
+
+        store = self._cached(key, folder, index_name, time.monotonic())
+        if store is not None:
+            return store
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another caller may have loaded it while this one waited
+            now = time.monotonic()
+            store = self._cached(key, folder, index_name, now)
+            if store is not None:
+                return store
+
+            signature = self._signature(folder, index_name)
+            # Read-only mmap: worker processes share the index pages via the page cache
+            store = FaissStore(index_name=index_name, embedding_function=embedding_function, folder_path=folder_path, mmap=True)
+            with self._lock:
+                self._stats["reloads" if key in self._entries else "loads"] += 1
+                self._entries[key] = {
+                    "store": store,
+                    "signature": signature,
+                    "size": self._size_of(signature),
+                    "checked_at": now,
+                }
+                self._entries.move_to_end(key)
+                self._evict(keep=key)
+            return store
+
+    def _evict(self, keep: Tuple[str, str, Tuple]):
+        """Drops least recently used indices until the memory cap is respected."""
+        total = sum(e["size"] for e in self._entries.values())
+        for key in list(self._entries.keys()):
+            if total <= self.max_memory_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._entries.pop(key)["size"]
+            self._stats["evictions"] += 1
+            print(f"FaissStoreRegistry: Evicted index '{key[1]}'")
+
+    def invalidate(self, index_name: Optional[str] = None):
+        """Forgets one index (or all of them) so the next `get` reloads from disk."""
+        with self._lock:
+            if index_name is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[1] == index_name]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["loaded"] = [k[1] for k in self._entries]
+            stats["memory_bytes"] = sum(e["size"] for e in self._entries.values())
+        return stats
+
+# Shared by all agents in the process
+default_registry = FaissStoreRegistry()
+
+def get_store(index_name: str, embedding_function: Any, folder_path: str = "faiss_db") -> FaissStore:
+    """Returns the process-wide shared store for an index."""
+    return default_registry.get(index_name, embedding_function, folder_path)
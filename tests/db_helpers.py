@@ -0,0 +1,26 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+@contextmanager
+def temp_folder() -> Iterator[str]:
+    """Yields a fresh temporary folder, removed with everything in it afterwards."""
+    folder = tempfile.mkdtemp(prefix="iris_test_")
+    try:
+        yield folder
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+@contextmanager
+def temp_db(fill: Callable[[sqlite3.Connection], None], name: str = "test.db") -> Iterator[str]:
+    """Yields the path of a SQLite database created by `fill(conn)` in a temporary folder."""
+    with temp_folder() as folder:
+        db_path = os.path.join(folder, name)
+        conn = sqlite3.connect(db_path)
+        fill(conn)
+        conn.commit()
+        conn.close()
+        yield db_path
@@ -0,0 +1,95 @@
+import sys
+import os
+import asyncio
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.embeddings.batching import BatchEmbedder, CoalescingEmbedder, TokenBucket
+from src.embeddings.fake import FakeEmbedding
+
+class FlakyEmbedding(FakeEmbedding):
+    """Fake backend that fails the first call of every batch (e.g. a 429)."""
+    def __init__(self):
+        super().__init__(dim=8)
+        self.failed = set()
+
+    def generate_embeddings(self, texts):
+        key = texts[0]
+        if key not in self.failed:
+            self.failed.add(key)
+            raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        return super().generate_embeddings(texts)
+
+class CountingEmbedding(FakeEmbedding):
+    """FakeEmbedding that counts async service calls."""
+
+    def __init__(self):
+        super().__init__(dim=8)
+        self.calls = 0
+
+    async def agenerate_embeddings(self, texts):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return self.generate_embeddings(texts)
+
+def test_batch_embedder_order_and_retry():
+    texts = [f"column {i}" for i in range(25)]
+    service = FlakyEmbedding()
+    embedder = BatchEmbedder(service, batch_size=4, max_workers=3, backoff_seconds=0.01)
+
+    vectors = embedder.embed(texts)
+    print(f"Embedded {len(vectors)} texts in {len(service.failed)} batches")
+
+    assert len(vectors) == len(texts)
+    assert vectors == FakeEmbedding(dim=8).generate_embeddings(texts)
+    print("Test passed!")
+
+def test_token_bucket_paces_requests():
+    # Fake clock: sleeping advances it, so the pacing is checked without wall-clock timing
+    now = [0.0]
+    def sleep(seconds):
+        now[0] += seconds
+    bucket = TokenBucket(rate=4.0, capacity=1.0, clock=lambda: now[0], sleep=sleep)
+    for _ in range(6):
+        bucket.acquire()
+    print(f"6 acquisitions at 4/s took {now[0]:.3f}s (fake clock)")
+    # The first token is already there, the other 5 take 1/4 s each
+    assert now[0] == 1.25
+
+def test_coalescing_embedder():
+    service = CountingEmbedding()
+
+    async def embed_concurrently():
+        coalescer = CoalescingEmbedder(service, max_batch=100, window_seconds=0.02)
+        batches = await asyncio.gather(*[coalescer.embed(["sales", f"city {i % 5}"]) for i in range(30)])
+        return coalescer, batches
+
+    coalescer, batches = asyncio.run(embed_concurrently())
+    stats = coalescer.stats()
+    print(f"Stats: {stats}")
+
+    # 30 requests, 60 texts -> one call embedding the 6 distinct texts
+    assert service.calls == 1
+    assert stats["requests"] == 30 and stats["texts"] == 60 and stats["embedded"] == 6
+    assert batches[7] == service.generate_embeddings(["sales", "city 2"])
+    print("Test passed!")
+
+def test_coalescing_embedder_max_batch():
+    service = CountingEmbedding()
+
+    async def embed_concurrently():
+        coalescer = CoalescingEmbedder(service, max_batch=4, window_seconds=1.0)
+        return await asyncio.gather(*[coalescer.embed([f"term {i}", f"other {i}"]) for i in range(6)])
+
+    batches = asyncio.run(embed_concurrently())
+    # Full batches are sent without waiting for the window
+    assert service.calls == 3
+    assert batches[5][1] == service.generate_embedding("other 5")
+    print("Test passed!")
+
+if __name__ == "__main__":
+    test_batch_embedder_order_and_retry()
+    test_token_bucket_paces_requests()
+    test_coalescing_embedder()
+    test_coalescing_embedder_max_batch()
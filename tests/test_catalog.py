@@ -0,0 +1,56 @@
+import sys
+import os
+import shutil
+import sqlite3
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.catalog import SchemaCatalog
+from src.database.sqlite_client import SQLiteClient
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def test_schema_catalog():
+    folder = os.path.join(os.path.dirname(__file__), "_catalog_tmp")
+    os.makedirs(folder, exist_ok=True)
+    db_path = os.path.join(folder, "catalog.db")
+    try:
+        conn = sqlite3.connect(db_path)
+        with open(os.path.join(PROJECT_ROOT, 'Database', 'schema.sql')) as f:
+            conn.executescript(f.read())
+        conn.close()
+
+        client = SQLiteClient(db_path)
+        catalog = SchemaCatalog(client)
+        compact = catalog.compact_schema()
+        print(compact)
+        print(f"~{catalog.token_estimate()} tokens")
+
+        assert sorted(catalog.tables()) == ['amazon_sales', 'international_sales', 'inventory', 'product_master']
+        assert "inventory(sku_code TEXT, design_no TEXT, stock INTEGER" in compact
+        # The four-table catalog fits the default fused budget
+        assert catalog.token_estimate() <= 2000
+        assert catalog.schema_info()['amazon_sales'][0] == {'name': 'order_id', 'description': 'TEXT'}
+
+        # A schema change is picked up
+        client.execute_query("CREATE TABLE returns (order_id TEXT, reason TEXT)")
+        assert "returns(order_id TEXT, reason TEXT)" in catalog.compact_schema()
+        client.disconnect()
+
+        # In WAL mode the change sits in the -wal file until a checkpoint: still picked up
+        writer = sqlite3.connect(db_path)
+        writer.execute("PRAGMA journal_mode=WAL")
+        writer.execute("PRAGMA wal_autocheckpoint=0")
+        catalog.compact_schema()
+        writer.execute("CREATE TABLE refunds (order_id TEXT, amount REAL)")
+        writer.commit()
+        assert "refunds(order_id TEXT, amount REAL)" in catalog.compact_schema()
+        writer.close()
+        client.disconnect()
+        print("Test passed!")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_schema_catalog()
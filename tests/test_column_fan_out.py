@@ -0,0 +1,115 @@
+import sys
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.base_agent import CustomBaseAgent
+from src.agents.column_selection import agent as column_agent
+from src.agents.column_selection.agent import ColumnSelectionAgent
+
+class StubColumnAgent(ColumnSelectionAgent):
+    """ColumnSelectionAgent without an embedding service: only the fan-out is exercised."""
+    def __init__(self, config):
+        CustomBaseAgent.__init__(self, agent_name="column_selection")
+        self._config = config
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="column-selection")
+        self.embedding_service = None
+        self._unified_store = None
+        self._table_map = None
+        self._unified_lock = threading.Lock()
+
+def test_fan_out_parallel():
+    agent = StubColumnAgent({'parallel': True, 'table_timeout_seconds': 5.0})
+    threads = set()
+    barrier = threading.Barrier(3, timeout=2.0)
+
+    def search(table):
+        # Returns only once all three tables run at the same time
+        barrier.wait()
+        threads.add(threading.current_thread().name)
+        return f"columns of {table}"
+
+    results = agent._fan_out(["a", "b", "c"], search)
+    print(f"Results: {results}")
+    assert results == {"a": "columns of a", "b": "columns of b", "c": "columns of c"}
+    assert len(threads) == 3
+    print("Test passed!")
+
+def test_fan_out_timeout_and_exception():
+    agent = StubColumnAgent({'parallel': True, 'table_timeout_seconds': 0.2})
+    release = threading.Event()
+
+    def search(table):
+        if table == "slow":
+            release.wait(2.0)
+        if table == "broken":
+            raise RuntimeError("index missing")
+        return table
+
+    start = time.monotonic()
+    results = agent._fan_out(["fast", "slow", "broken"], search)
+    elapsed = time.monotonic() - start
+    release.set()
+    print(f"Results: {results} in {elapsed:.2f}s")
+    # The slow table is dropped at the deadline, the failing one right away
+    assert results == {"fast": "fast"}
+    assert elapsed < 1.0
+
+    # Sequential path: same results without the pool
+    agent._config = {'parallel': False}
+    assert agent._fan_out(["fast", "broken"], search) == {"fast": "fast"}
+    print("Test passed!")
+
+def test_unified_snapshot_survives_reload():
+    agent = StubColumnAgent({'parallel': False, 'unified_index': True})
+    generation = [0]
+    searched = []
+
+    class StubMap:
+        def __init__(self, version):
+            self.version = version
+            self.tables = {"orders", "customers"}
+
+        @classmethod
+        def load(cls, folder_path):
+            return cls(generation[0])
+
+        def id_ranges(self, tables):
+            return [(self.version, tables[0])]
+
+    class StubStore:
+        def set_search_params(self, **params):
+            pass
+
+        def search_by_vectors(self, vectors, k, id_ranges):
+            searched.append(id_ranges[0])
+            if len(searched) == 1:
+                # The index is reloaded while the first table is searched
+                generation[0] += 1
+                agent._unified_snapshot()
+            return [[] for _ in vectors]
+
+    stores = [StubStore(), StubStore()]
+    original = (column_agent.get_store, column_agent.ColumnTableMap)
+    column_agent.get_store = lambda *args, **kwargs: stores[generation[0]]
+    column_agent.ColumnTableMap = StubMap
+    try:
+        agent._execute_unified(["orders", "customers"], ["amount"], [[0.0]], 5, {})
+        reloaded = agent._unified_snapshot()[1]
+    finally:
+        column_agent.get_store, column_agent.ColumnTableMap = original
+
+    print(f"Searched id ranges: {searched}")
+    # Both tables were searched with the map of the store they were searched in
+    assert searched == [(0, "orders"), (0, "customers")]
+    assert reloaded.version == 1
+    print("Test passed!")
+
+if __name__ == "__main__":
+    test_fan_out_parallel()
+    test_fan_out_timeout_and_exception()
+    test_unified_snapshot_survives_reload()
@@ -0,0 +1,52 @@
+import sys
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.db_helpers import temp_db
+from src.database.sqlite_client import SQLiteClient
+
+def _fill_sales(conn: sqlite3.Connection):
+    conn.execute("CREATE TABLE sales (id INTEGER, city TEXT, amount REAL)")
+    conn.executemany("INSERT INTO sales VALUES (?, ?, ?)", [(i, f"City {i % 7}", i * 1.5) for i in range(20000)])
+
+def test_read_only_pool():
+    with temp_db(_fill_sales, "pool.db") as db_path:
+        client = SQLiteClient(db_path, read_only=True, pool_options={"max_connections": 4, "max_uses": 5})
+        client.connect()
+
+        query = "SELECT city, SUM(amount) AS total FROM sales GROUP BY city ORDER BY city"
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: client.execute_query(query), range(40)))
+        assert all(r == results[0] for r in results) and len(results[0]) == 7
+
+        stats = client.pool.stats()
+        print(f"Pool stats: {stats}")
+        assert stats["open"] <= 4
+        # 40 checkouts with max_uses=5: connections were recycled
+        assert stats["recycled"] > 0
+
+        # Nothing borrowed from the pool can write
+        for statement in ["INSERT INTO sales VALUES (1, 'x', 1.0)", "DROP TABLE sales"]:
+            try:
+                client.execute_query(statement)
+                assert False, "write should fail"
+            except sqlite3.Error as e:
+                print(f"Rejected: {e}")
+        assert client.execute_query("SELECT COUNT(*) AS n FROM sales") == [{"n": 20000}]
+
+        # Streaming and EXPLAIN use the pool too
+        assert sum(len(c) for c in client.iter_query("SELECT * FROM sales", chunk_size=5000)) == 20000
+        assert client.explain("SELECT nope FROM sales") == "no such column: nope"
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+        client.disconnect()
+        print("Test passed!")
+
+if __name__ == "__main__":
+    test_read_only_pool()
@@ -0,0 +1,92 @@
+import sys
+import os
+import shutil
+import asyncio
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.embeddings.cache import CachedEmbedding
+from src.embeddings.fake import FakeEmbedding
+
+class CountingEmbedding:
+    """Offline stand-in for GeminiEmbedding that counts service calls."""
+    model_name = "test-model"
+    task_type = "RETRIEVAL_DOCUMENT"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_embeddings(self, texts):
+        self.calls += 1
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+
+def test_embedding_cache():
+    cache_dir = "tests/_embedding_cache_tmp"
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    try:
+        service = CountingEmbedding()
+        cache = CachedEmbedding(service, cache_dir=cache_dir, max_memory_items=2)
+
+        vectors = cache.generate_embeddings(["sales", "amount", "sales"])
+        assert service.calls == 1
+        assert vectors[0] == vectors[2] == [5.0, 1.0, 0.5]
+
+        cache.embed_query("amount")
+        assert service.calls == 1
+        print(f"Stats after warm-up: {cache.stats()}")
+
+        # A new instance over the same folder must be served from disk
+        service2 = CountingEmbedding()
+        cache2 = CachedEmbedding(service2, cache_dir=cache_dir)
+        assert cache2.generate_embedding("sales") == [5.0, 1.0, 0.5]
+        assert service2.calls == 0
+        assert cache2.stats()["disk_hits"] == 1
+        print("Test passed!")
+    finally:
+        shutil.rmtree(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', cache_dir)), ignore_errors=True)
+
+def test_async_embedding_cache():
+    cache_dir = "tests/_embedding_cache_tmp"
+    try:
+        service = FakeEmbedding(dim=8)
+        cache = CachedEmbedding(service, cache_dir=cache_dir)
+
+        async def embed_concurrently():
+            return await asyncio.gather(*[cache.agenerate_embeddings(["sales", f"term {i}"]) for i in range(20)])
+
+        batches = asyncio.run(embed_concurrently())
+        assert all(batch[0] == service.generate_embedding("sales") for batch in batches)
+        assert batches[3][1] == service.generate_embedding("term 3")
+        print(f"Stats: {cache.stats()}")
+        print("Test passed!")
+    finally:
+        shutil.rmtree(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', cache_dir)), ignore_errors=True)
+
+def test_short_batch_is_rejected():
+    cache_dir = "tests/_embedding_cache_tmp"
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    class ShortEmbedding(CountingEmbedding):
+        def generate_embeddings(self, texts):
+            return super().generate_embeddings(texts)[:-1]
+
+    try:
+        cache = CachedEmbedding(ShortEmbedding(), cache_dir=cache_dir)
+        try:
+            cache.generate_embeddings(["sales", "amount"])
+            raise AssertionError("expected ValueError")
+        except ValueError as e:
+            print(f"Rejected short batch: {e}")
+        # Nothing from the mismatched batch was persisted
+        assert cache.stats()["memory_items"] == 0
+        assert cache._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] == 0
+        print("Test passed!")
+    finally:
+        shutil.rmtree(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', cache_dir)), ignore_errors=True)
+
+if __name__ == "__main__":
+    test_embedding_cache()
+    test_async_embedding_cache()
+    test_short_batch_is_rejected()
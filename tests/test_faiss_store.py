@@ -0,0 +1,172 @@
+import sys
+import os
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.vector_store.faiss_store import FaissStore
+from src.vector_store.registry import FaissStoreRegistry
+from src.vector_store.compression import evaluate_layout
+
+FOLDER = "tests/_faiss_tmp"
+
+class HashEmbedding:
+    """Offline deterministic embedding: same text -> same vector."""
+    def embed_query(self, text):
+        digest = hashlib.sha256(text.encode('utf-8')).digest()
+        return [b / 255.0 for b in digest[:16]]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+def test_native_store_roundtrip():
+    shutil.rmtree(FaissStore.resolve_folder(FOLDER), ignore_errors=True)
+    try:
+        embedding = HashEmbedding()
+        store = FaissStore(index_name="columns_test", embedding_function=embedding, folder_path=FOLDER)
+        store.add_documents([
+            {'content': 'amount', 'metadata': {'column_name': 'amount'}},
+            {'content': 'ship_city', 'metadata': {'column_name': 'ship_city'}},
+            {'content': 'sku', 'metadata': {'column_name': 'sku'}},
+        ])
+
+        # Reopen memory-mapped from the native files (no pickle involved)
+        reader = FaissStore(index_name="columns_test", embedding_function=embedding, folder_path=FOLDER, mmap=True)
+        results = reader.search_similarity("ship_city", k=1)
+        print(f"Search result: {results}")
+        assert results[0]['payload']['column_name'] == 'ship_city'
+        assert results[0]['score'] == 0.0
+
+        # One matrix search for several terms
+        vectors = embedding.embed_documents(["amount", "sku"])
+        batched = reader.search_by_vectors(vectors, k=1)
+        assert [r[0]['payload']['column_name'] for r in batched] == ['amount', 'sku']
+
+        # Id ranges restrict the search to a subset of vectors
+        restricted = reader.search_by_vectors(vectors[:1], k=3, id_ranges=[(1, 3)])
+        assert 'amount' not in [r['payload']['column_name'] for r in restricted[0]]
+
+        # Queries of another width are rejected instead of being cut down
+        try:
+            reader.search_by_vectors([vectors[0] + [0.0] * 16], k=1)
+            assert False, "expected a dimension mismatch"
+        except ValueError as e:
+            print(f"Mismatch: {e}")
+        print("Test passed!")
+    finally:
+        shutil.rmtree(FaissStore.resolve_folder(FOLDER), ignore_errors=True)
+
+def test_upsert_is_idempotent():
+    shutil.rmtree(FaissStore.resolve_folder(FOLDER), ignore_errors=True)
+    try:
+        embedding = HashEmbedding()
+        store = FaissStore(index_name="columns_upsert", embedding_function=embedding, folder_path=FOLDER)
+        vectors = embedding.embed_documents(["amount", "qty"])
+        metadata = [{'column_name': 'amount'}, {'column_name': 'qty'}]
+
+        store.upsert_vectors(vectors, metadata, ids=["10", "11"], contents=["amount", "qty"])
+        store.upsert_vectors(vectors, metadata, ids=["10", "11"], contents=["amount", "qty"])
+        assert store.index.ntotal == 2
+
+        # Replacing id 10 with a new description keeps the id stable
+        store.upsert_vectors(embedding.embed_documents(["gross amount"]), [{'column_name': 'amount'}], ids=[10], contents=["gross amount"])
+        result = store.search_vectors(embedding.embed_query("gross amount"), limit=1)[0]
+        assert result['id'] == 10 and result['content'] == "gross amount"
+
+        store.delete_vectors([11])
+        reopened = FaissStore(index_name="columns_upsert", embedding_function=embedding, folder_path=FOLDER)
+        assert reopened.index.ntotal == 1
+        assert reopened.next_id() == 11
+        print("Test passed!")
+    finally:
+        shutil.rmtree(FaissStore.resolve_folder(FOLDER), ignore_errors=True)
+
+def test_index_layouts():
+    embedding = HashEmbedding()
+    texts = [f"column_{i}" for i in range(64)]
+    vectors = embedding.embed_documents(texts)
+
+    for index_factory, metric in [("HNSW16", "l2"), ("IVF4,Flat", "cosine")]:
+        shutil.rmtree(FaissStore.resolve_folder(FOLDER), ignore_errors=True)
+        try:
+            store = FaissStore(index_name="layout", embedding_function=embedding, folder_path=FOLDER,
+                               index_factory=index_factory, metric=metric)
+            store.upsert_vectors(vectors, [{'column_name': t} for t in texts], ids=list(range(64)), contents=texts)
+            store.delete_vectors([1])
+
+            # Layout and metric are read back from the store itself
+            reader = FaissStore(index_name="layout", embedding_function=embedding, folder_path=FOLDER, mmap=True)
+            reader.set_search_params(ef_search=32, nprobe=4)
+            assert (reader.index_factory, reader.metric) == (index_factory, metric)
+            assert reader.index.ntotal == 63
+
+            best = reader.search_vectors(embedding.embed_query("column_7"), limit=1)[0]
+            print(f"{index_factory}/{metric}: {best['id']} ({best['score']:.3f})")
+            assert best['id'] == 7
+            assert reader.is_match(best['score'], distance_threshold=0.1, similarity_threshold=0.99)
+        finally:
+            shutil.rmtree(FaissStore.resolve_folder(FOLDER), ignore_errors=True)
+    print("Test passed!")
+
+def test_compact_layouts():
+    embedding = HashEmbedding()
+    texts = [f"column_{i}" for i in range(300)]
+    vectors = embedding.embed_documents(texts)
+
+    # Quantized codes take less memory than the flat float32 index
+    report = evaluate_layout(vectors, "SQ8", k=5)
+    print(f"SQ8: saved {report['saved']:.1%}, recall@5 {report['recall@5']:.3f}")
+    assert report['bytes_compressed'] < report['bytes_flat']
+    assert report['recall@5'] > 0.8
+
+    # PQ with exact re-ranking still answers filtered searches
+    shutil.rmtree(FaissStore.resolve_folder(FOLDER), ignore_errors=True)
+    try:
+        store = FaissStore(index_name="compact", embedding_function=embedding, folder_path=FOLDER, index_factory="PQ4,RFlat")
+        store.upsert_vectors(vectors, [{'column_name': t} for t in texts], ids=list(range(300)), contents=texts)
+        store.set_search_params(rerank_k_factor=8)
+        query = embedding.embed_documents(["column_7"])
+        assert store.search_by_vectors(query, k=1)[0][0]['id'] == 7
+        restricted = store.search_by_vectors(query, k=3, id_ranges=[(100, 200)])[0]
+        assert restricted and all(100 <= r['id'] < 200 for r in restricted)
+        print("Test passed!")
+    finally:
+        shutil.rmtree(FaissStore.resolve_folder(FOLDER), ignore_errors=True)
+
+def test_registry_keys_on_embedder():
+    shutil.rmtree(FaissStore.resolve_folder(FOLDER), ignore_errors=True)
+    try:
+        store = FaissStore(index_name="columns_registry", embedding_function=HashEmbedding(), folder_path=FOLDER)
+        store.add_documents([{'content': 'amount', 'metadata': {'column_name': 'amount'}}])
+
+        class ModelA(HashEmbedding):
+            model_name = "model-a"
+
+        class ModelB(HashEmbedding):
+            model_name = "model-b"
+
+        registry = FaissStoreRegistry()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            stores = list(pool.map(lambda _: registry.get("columns_registry", ModelA(), folder_path=FOLDER), range(8)))
+        # Concurrent callers of one index wait for a single load and share it
+        assert all(s is stores[0] for s in stores)
+        assert registry.stats()["loads"] == 1
+
+        # Another embedding model gets its own store instead of the first caller's
+        other = registry.get("columns_registry", ModelB(), folder_path=FOLDER)
+        assert other is not stores[0]
+        assert registry.stats()["loads"] == 2
+        print(f"Stats: {registry.stats()}")
+        print("Test passed!")
+    finally:
+        shutil.rmtree(FaissStore.resolve_folder(FOLDER), ignore_errors=True)
+
+if __name__ == "__main__":
+    test_native_store_roundtrip()
+    test_upsert_is_idempotent()
+    test_index_layouts()
+    test_compact_layouts()
+    test_registry_keys_on_embedder()
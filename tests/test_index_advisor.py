@@ -0,0 +1,76 @@
+import sys
+import os
+import sqlite3
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.db_helpers import temp_db, temp_folder
+from src.database.index_advisor import IndexAdvisor, QueryLog, format_report
+
+def _fill_sales(conn: sqlite3.Connection):
+    # No keys, like the tables written by import_data.py
+    conn.execute("CREATE TABLE amazon_sales (order_id TEXT, date TEXT, status TEXT, sku TEXT, category TEXT, "
+                 "qty INTEGER, amount REAL, ship_city TEXT, ship_state TEXT, currency TEXT, size TEXT, asin TEXT)")
+    conn.execute("CREATE TABLE product_master (sku TEXT, category TEXT, weight REAL)")
+    conn.executemany("INSERT INTO amazon_sales VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'INR', 'M', 'A')", [
+        (f"O{i}", f"2022-04-{i % 28 + 1:02d}", ["Shipped", "Cancelled", "Pending"][i % 3], f"SKU{i % 2000}",
+         ["kurta", "Set", "Top"][i % 3], 1, i * 0.5, f"City {i % 300}", f"State {i % 30}")
+        for i in range(30000)
+    ])
+    conn.executemany("INSERT INTO product_master VALUES (?, ?, 1.0)", [(f"SKU{i}", ["kurta", "Set"][i % 2]) for i in range(2000)])
+
+def test_index_advisor():
+    with temp_db(_fill_sales, "advisor.db") as db_path:
+        workload = [
+            "SELECT SUM(amount) FROM amazon_sales WHERE ship_state = 'State 3' AND status = 'Shipped'",
+            "SELECT category, SUM(qty) FROM amazon_sales WHERE date BETWEEN '2022-04-01' AND '2022-04-07' GROUP BY category",
+            "SELECT p.category, SUM(a.amount) FROM amazon_sales a JOIN product_master p ON a.sku = p.sku GROUP BY p.category",
+            "SELECT * FROM nope",
+        ]
+        advisor = IndexAdvisor(db_path, repeats=1)
+        columns = [(rec["table"], rec["columns"]) for rec in advisor.recommend(workload)]
+        print(f"Recommended: {columns}")
+        # Equality columns first, then the range column, then columns that make the index covering
+        assert ("amazon_sales", ["ship_state", "status", "amount"]) in columns
+        assert ("amazon_sales", ["date", "category", "qty"]) in columns
+        # Join key on both sides
+        assert ("amazon_sales", ["sku", "amount"]) in columns and ("product_master", ["sku", "category"]) in columns
+
+        # Report only: nothing is kept
+        report = advisor.advise(workload, apply=False)
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='index'").fetchone()[0] == 0
+        conn.close()
+
+        report = advisor.advise(workload)
+        print(format_report(report))
+        assert len(report["queries"]) == 3
+        for entry in report["queries"]:
+            assert any(d.startswith("SCAN") and "INDEX" not in d for d in entry["plan_before"])
+            assert any("INDEX idx_" in d for d in entry["plan_after"])
+        assert "(ship_state=? AND status=?)" in " ".join(report["queries"][0]["plan_after"])
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='index'").fetchone()[0] == len(report["indexes"])
+        conn.close()
+        # Nothing left to recommend once the indexes exist
+        assert advisor.recommend(workload) == []
+        print("Test passed!")
+
+def test_query_log():
+    with temp_folder() as folder:
+        log = QueryLog(os.path.join(folder, "query_log.jsonl"), max_bytes=2000)
+        log.record("SELECT 1", 0.001, 1)
+        for _ in range(3):
+            log.record("select  2", 0.5, 1)
+        log.record("SELECT 2;", 0.5, 1)
+        assert log.workload() == ["SELECT 2;", "SELECT 1"]
+        for i in range(50):
+            log.record(f"SELECT {i}", 0.001, 1)
+        assert os.path.getsize(log.path) <= 2000
+        print(f"Workload: {log.workload(max_queries=3)}")
+        print("Test passed!")
+
+if __name__ == "__main__":
+    test_index_advisor()
+    test_query_log()
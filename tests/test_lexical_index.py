@@ -0,0 +1,53 @@
+import sys
+import os
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.vector_store.lexical import LexicalIndex, normalize_name
+
+DOCS = [
+    (0, "Amazon orders with fulfilment and shipping details", {'type': 'table', 'table_name': 'Amazon Sale Report'}),
+    (1, "International sales by customer", {'type': 'table', 'table_name': 'International Sale Report'}),
+    (2, "Stock levels per SKU", {'type': 'table', 'table_name': 'Sale Report'}),
+    (10, "Order amount in INR", {'type': 'column', 'table_name': 'Amazon Sale Report', 'column_name': 'Amount'}),
+    (11, "City the order ships to", {'type': 'column', 'table_name': 'Amazon Sale Report', 'column_name': 'ship-city'}),
+    (12, "Stock keeping unit", {'type': 'column', 'table_name': 'Sale Report', 'column_name': 'SKU Code'}),
+]
+
+def test_name_normalization():
+    assert normalize_name("Ship City") == normalize_name("ship-city") == normalize_name("ShipCity") == "ship_city"
+
+def test_high_confidence_matches():
+    index = LexicalIndex(DOCS)
+
+    # Exact names (modulo case/separators) and words unique to one name are answered directly
+    assert [r['id'] for r in index.match("amount")] == [10]
+    assert [r['id'] for r in index.match("ship_city")] == [11]
+    assert [r['id'] for r in index.match("Amazon")] == [0]
+
+    # Ambiguous or misspelled terms are left to the vector path
+    assert index.match("Sale") == []
+    assert index.match("ammount") == []
+
+    # Matches can be restricted to some tables (unified column index)
+    assert index.match("amount", table_names=["Sale Report"]) == []
+    print("Test passed!")
+
+def test_hybrid_fusion():
+    index = LexicalIndex(DOCS)
+    vector_results = [{'id': 12, 'payload': DOCS[5][2], 'content': DOCS[5][1], 'score': 0.4}]
+
+    fused = index.hybrid("ammount", vector_results, k=3)
+    print(f"Fused: {[(r['id'], r['score'], round(r['lexical_score'], 2)) for r in fused]}")
+    ids = [r['id'] for r in fused]
+    # Near-miss name found lexically, vector hit kept with its score
+    assert 10 in ids and 12 in ids
+    assert next(r for r in fused if r['id'] == 12)['score'] == 0.4
+    assert next(r for r in fused if r['id'] == 10)['score'] is None
+    print("Test passed!")
+
+if __name__ == "__main__":
+    test_name_normalization()
+    test_high_confidence_matches()
+    test_hybrid_fusion()
@@ -0,0 +1,83 @@
+import sys
+import os
+import time
+import shutil
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.cache.llm_cache import LLMResponseCache
+from src.agents.sql_generation.agent import SQLGenerationAgent
+
+FOLDER = "tests/_llm_cache_tmp"
+
+def _folder():
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', FOLDER))
+
+def test_cache_roundtrip_and_ttl():
+    shutil.rmtree(_folder(), ignore_errors=True)
+    try:
+        cache = LLMResponseCache(cache_dir=FOLDER)
+        cache.put("gemini", 0.0, "prompt", "SELECT 1")
+
+        # Persistent: a new instance (e.g. after a restart) sees the response
+        reopened = LLMResponseCache(cache_dir=FOLDER)
+        assert reopened.get("gemini", 0.0, "prompt") == "SELECT 1"
+        # Model and temperature are part of the key
+        assert reopened.get("gemini", 0.5, "prompt") is None
+        assert reopened.get("other-model", 0.0, "prompt") is None
+
+        time.sleep(0.01)
+        assert reopened.get("gemini", 0.0, "prompt", ttl_seconds=0.001) is None
+        stats = reopened.stats()
+        print(f"Stats: {stats}")
+        assert stats['hits'] == 1 and stats['expired'] == 1 and stats['entries'] == 0
+        print("Test passed!")
+    finally:
+        shutil.rmtree(_folder(), ignore_errors=True)
+
+def test_size_bound_evicts_least_recently_used():
+    shutil.rmtree(_folder(), ignore_errors=True)
+    try:
+        cache = LLMResponseCache(cache_dir=FOLDER, max_bytes=20)
+        cache.put("m", 0.0, "a", "x" * 8)
+        time.sleep(0.01)
+        cache.put("m", 0.0, "b", "y" * 8)
+        time.sleep(0.01)
+        assert cache.get("m", 0.0, "a") is not None   # 'a' is now more recent than 'b'
+        time.sleep(0.01)
+        cache.put("m", 0.0, "c", "z" * 8)
+
+        assert cache.get("m", 0.0, "b") is None
+        assert cache.get("m", 0.0, "a") is not None and cache.get("m", 0.0, "c") is not None
+        assert cache.stats()['bytes'] <= 20
+        print("Test passed!")
+    finally:
+        shutil.rmtree(_folder(), ignore_errors=True)
+
+def test_invalidate_generated_sql():
+    shutil.rmtree(_folder(), ignore_errors=True)
+    try:
+        agent = SQLGenerationAgent()
+        agent._llm_cache = LLMResponseCache(cache_dir=FOLDER)
+        agent._model_name = "gemini"
+        schema = {"orders": [{"name": "amount", "description": "Order amount"}]}
+        agent._llm_cache.put("gemini", 0.0, agent._build_prompt("total sales", schema), "SELECT amt FROM orders")
+        agent._llm_cache.put("gemini", 0.0, agent._build_fused_prompt("total sales", "orders(amount REAL)"), "SELECT amt FROM orders")
+
+        # The failed SQL is dropped for exactly the prompt that produced it
+        assert agent.invalidate("total sales", schema)
+        assert agent._llm_cache.get("gemini", 0.0, agent._build_prompt("total sales", schema)) is None
+        assert not agent.invalidate("total sales", schema)
+        assert agent.invalidate_fused("total sales", "orders(amount REAL)")
+        stats = agent._llm_cache.stats()
+        print(f"Stats: {stats}")
+        assert stats['invalidations'] == 2 and stats['entries'] == 0
+        print("Test passed!")
+    finally:
+        shutil.rmtree(_folder(), ignore_errors=True)
+
+if __name__ == "__main__":
+    test_cache_roundtrip_and_ttl()
+    test_size_bound_evicts_least_recently_used()
+    test_invalidate_generated_sql()
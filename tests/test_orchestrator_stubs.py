@@ -0,0 +1,279 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.base_agent import CustomBaseAgent
+from src.orchestrator import Orchestrator
+
+class StubOrchestrator(Orchestrator):
+    """Orchestrator without agents or API keys: tests plug in the stubs they need."""
+    def __init__(self, config=None):
+        CustomBaseAgent.__init__(self, agent_name="orchestrator")
+        self._config = config or {}
+        self.query_cache = None
+        self.sql_validator = None
+        self.rollup_rewriter = None
+        self.speculation_stats = {"queries": 0, "skipped_extraction": 0, "reused": 0, "refined": 0, "unused": 0}
+
+class ThreadReportingOrchestrator(StubOrchestrator):
+    async def arun(self, user_query):
+        return {"query": user_query, "thread": threading.current_thread().name}
+
+class StubEntityAgent:
+    def __init__(self, delay=0.0, error=None):
+        self.delay, self.error, self.calls = delay, error, 0
+
+    async def aexecute(self, user_query):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {"entities": ["sales"], "attributes": ["amount"]}
+
+CONFIDENT = [{"score": None, "lexical_score": 1.0, "payload": {"table_name": "Amazon Sale Report"}}]
+
+class SpeculatingOrchestrator(StubOrchestrator):
+    """Speculative table search replaced by a stub returning `tables` after `delay`."""
+    def __init__(self, mode, entity_agent, tables=CONFIDENT, delay=0.0):
+        super().__init__({'speculation': {'mode': mode, 'confident_lexical': 1.0, 'max_wait_seconds': 0.5}})
+        self.entity_agent = entity_agent
+        self.spec_tables = tables
+        self.spec_delay = delay
+        self.spec_calls = 0
+        self.spec_cancelled = False
+
+    async def _speculate(self, user_query):
+        self.spec_calls += 1
+        try:
+            await asyncio.sleep(self.spec_delay)
+        except asyncio.CancelledError:
+            self.spec_cancelled = True
+            raise
+        return self.spec_tables
+
+def test_speculation_outcomes():
+    # off: extraction only, no speculative search
+    orchestrator = SpeculatingOrchestrator("off", StubEntityAgent())
+    extraction, speculative, confident = asyncio.run(orchestrator._extract("total sales"))
+    assert extraction["entities"] == ["sales"] and speculative == [] and not confident
+    assert orchestrator.spec_calls == 0
+
+    # overlap: both run; the confident match is returned alongside the extraction
+    orchestrator = SpeculatingOrchestrator("overlap", StubEntityAgent(delay=0.05))
+    extraction, speculative, confident = asyncio.run(orchestrator._extract("total sales"))
+    assert extraction is not None and speculative == CONFIDENT and confident
+
+    # skip: a confident match arriving before the LLM answers skips extraction
+    entity_agent = StubEntityAgent(delay=1.0)
+    orchestrator = SpeculatingOrchestrator("skip", entity_agent)
+    start = time.monotonic()
+    extraction, speculative, confident = asyncio.run(orchestrator._extract("total sales"))
+    assert extraction is None and speculative == CONFIDENT and confident
+    assert time.monotonic() - start < 0.5
+
+    # skip without a confident match: waits for extraction as in overlap
+    orchestrator = SpeculatingOrchestrator("skip", StubEntityAgent(delay=0.05), tables=[])
+    extraction, speculative, confident = asyncio.run(orchestrator._extract("total sales"))
+    assert extraction is not None and speculative == [] and not confident
+    print("Test passed!")
+
+def test_failed_extraction_cancels_speculation():
+    orchestrator = SpeculatingOrchestrator("overlap", StubEntityAgent(error=RuntimeError("LLM down")), delay=5.0)
+
+    async def extract():
+        try:
+            await orchestrator._extract("total sales")
+        except RuntimeError as e:
+            print(f"Extraction failed: {e}")
+        # Let the cancellation reach the speculative task
+        await asyncio.sleep(0)
+        return orchestrator.spec_cancelled
+
+    assert asyncio.run(extract())
+    print("Test passed!")
+
+class StubExecAgent:
+    """Answers SQL from a script: {sql: "Error: ..." | rows}; `slow` SQL runs until cancelled."""
+    def __init__(self, script, slow=()):
+        self.script, self.slow, self.executed, self.cancelled = script, set(slow), [], []
+
+    async def aexecute_bounded(self, sql_query):
+        self.executed.append(sql_query)
+        if sql_query in self.slow:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.cancelled.append(sql_query)
+                raise
+        result = self.script[sql_query]
+        return result if isinstance(result, str) else {"rows": result, "row_count": len(result)}
+
+class StubRegenAgent:
+    """Returns the next SQL of `answers` for every regeneration call."""
+    def __init__(self, answers):
+        self.answers, self.calls = list(answers), []
+
+    async def aexecute(self, user_query, old_sql, error_message, schema_info, error_history):
+        self.calls.append((old_sql, error_message, len(error_history)))
+        return self.answers.pop(0)
+
+def _regenerate(script, answers, slow=(), retry=None):
+    orchestrator = StubOrchestrator({'retry': retry or {'max_attempts': 5, 'deadline_seconds': 30.0, 'min_attempt_seconds': 0.0}})
+    orchestrator.sql_exec_agent = StubExecAgent(script, slow)
+    orchestrator.sql_regen_agent = StubRegenAgent(answers)
+
+    async def run():
+        start_time = time.time()
+        first, execution = await orchestrator._execute("q0", orchestrator._deadline(start_time))
+        return await orchestrator._regenerate("question", "q0", first, execution, {}, start_time, [])
+
+    sql, result, execution, diagnostics = asyncio.run(run())
+    print(f"Stopped: {diagnostics['stop_reason']} after {len(diagnostics['attempts'])} attempts")
+    return orchestrator, sql, result, diagnostics
+
+def test_retry_loop():
+    # Succeeds on the second attempt, the regeneration agent sees the failed attempt
+    orchestrator, sql, result, diagnostics = _regenerate(
+        {"q0": "Error: no such column: amt", "q1": [{"n": 1}]}, ["q1"])
+    assert diagnostics['stop_reason'] == "succeeded" and sql == "q1" and result == [{"n": 1}]
+    assert orchestrator.sql_regen_agent.calls == [("q0", "Error: no such column: amt", 0)]
+
+    # The same error twice: regenerating again would not help
+    _, sql, result, diagnostics = _regenerate(
+        {"q0": "Error: no such table: t", "q1": "Error: no such table: t"}, ["q1", "q2"])
+    assert diagnostics['stop_reason'] == "repeated_error" and len(diagnostics['attempts']) == 2
+
+    # The agent answers with SQL that already failed: not executed again
+    orchestrator, _, _, diagnostics = _regenerate(
+        {"q0": "Error: a", "q1": "Error: b"}, ["q1", "q0"])
+    assert diagnostics['stop_reason'] == "repeated_sql"
+    assert orchestrator.sql_exec_agent.executed == ["q0", "q1"]
+    print("Test passed!")
+
+def test_retry_deadline():
+    # The regenerated SQL would run for 10s: it is cancelled at the 0.5s end-to-end deadline
+    start = time.monotonic()
+    orchestrator, _, result, diagnostics = _regenerate(
+        {"q0": "Error: a", "q1": [{"n": 1}]}, ["q1", "q2"], slow=["q1"],
+        retry={'max_attempts': 5, 'deadline_seconds': 0.5, 'min_attempt_seconds': 0.1})
+    elapsed = time.monotonic() - start
+    print(f"Result: {result} after {elapsed:.2f}s")
+    assert diagnostics['stop_reason'] == "deadline" and result.startswith("Error: [deadline]")
+    assert orchestrator.sql_exec_agent.cancelled == ["q1"]
+    assert elapsed < 2.0
+    print("Test passed!")
+
+def test_run_inside_event_loop():
+    orchestrator = ThreadReportingOrchestrator()
+    # No running loop: arun runs on a fresh loop in the calling thread
+    assert orchestrator.run("q1")["thread"] == threading.current_thread().name
+
+    async def called_from_async_code():
+        return orchestrator.run("q2")
+
+    # Inside a running loop asyncio.run would raise: arun moves to a worker thread instead
+    result = asyncio.run(called_from_async_code())
+    print(f"Result: {result}")
+    assert result["query"] == "q2" and result["thread"].startswith("orchestrator-run")
+    print("Test passed!")
+
+def test_run_batch_inside_event_loop():
+    orchestrator = ThreadReportingOrchestrator()
+    orchestrator.embedding_service = None
+    seen = []
+
+    async def called_from_async_code():
+        return orchestrator.run_batch(["q1", "q2", "q1"], on_result=seen.append)
+
+    batch = asyncio.run(called_from_async_code())
+    print(f"Summary: {batch['summary']}")
+    assert [r["query"] for r in batch["results"]] == ["q1", "q2", "q1"]
+    assert all(r["thread"].startswith("orchestrator-run") for r in batch["results"])
+    assert len(seen) == 3 and batch["summary"]["unique"] == 2
+    print("Test passed!")
+
+class StubQueryCache:
+    """Always hits with `sql`; records invalidated questions."""
+    def __init__(self, sql):
+        self.sql, self.invalidated = sql, []
+
+    def lookup(self, user_query):
+        return {"query": user_query, "sql": self.sql, "match": "exact", "similarity": 1.0}
+
+    def invalidate(self, user_query):
+        self.invalidated.append(user_query)
+
+def test_cached_sql_deadline():
+    # Cached SQL that runs for 10s is cancelled at the 0.5s deadline and kept in the cache
+    orchestrator = StubOrchestrator({'retry': {'deadline_seconds': 0.5}})
+    orchestrator.query_cache = StubQueryCache("q0")
+    orchestrator.sql_exec_agent = StubExecAgent({"q0": [{"n": 1}]}, slow=["q0"])
+
+    start = time.monotonic()
+    result = asyncio.run(orchestrator._run_cached("question", time.time()))
+    elapsed = time.monotonic() - start
+    print(f"Result: {result['result']} after {elapsed:.2f}s")
+    assert result["error"].startswith("Error: [deadline]") and result["mode"] == "cache"
+    assert orchestrator.sql_exec_agent.cancelled == ["q0"]
+    assert orchestrator.query_cache.invalidated == []
+    assert elapsed < 2.0
+
+    # Broken cached SQL is dropped and the full pipeline takes over
+    orchestrator.sql_exec_agent = StubExecAgent({"q0": "Error: no such table: t"})
+    assert asyncio.run(orchestrator._run_cached("question", time.time())) is None
+    assert orchestrator.query_cache.invalidated == ["question"]
+    print("Test passed!")
+
+class StubCatalog:
+    def compact_schema(self):
+        return "orders(amount REAL)"
+
+    def schema_info(self):
+        return {"orders": [{"name": "amount"}]}
+
+class StubGenAgent:
+    """Fused generation answering `sql`; records the cached responses it was asked to drop."""
+    def __init__(self, sql):
+        self.sql, self.invalidated = sql, []
+
+    async def agenerate_fused(self, user_query, compact_schema):
+        return self.sql
+
+    def invalidate_fused(self, user_query, compact_schema):
+        self.invalidated.append((user_query, compact_schema))
+        return True
+
+def test_failed_sql_leaves_llm_cache():
+    orchestrator = StubOrchestrator({'fused_mode': 'always', 'retry': {'max_attempts': 2, 'deadline_seconds': 30.0}})
+    orchestrator.mode_stats = {"fused": 0, "multi_agent": 0}
+    orchestrator.catalog = StubCatalog()
+    orchestrator.sql_gen_agent = StubGenAgent("q0")
+    orchestrator.sql_exec_agent = StubExecAgent({"q0": "Error: no such column: amt", "q1": [{"n": 1}]})
+    orchestrator.sql_regen_agent = StubRegenAgent(["q1"])
+
+    result = asyncio.run(orchestrator.arun("total sales"))
+    print(f"Result: {result['result']} from {result['sql']}")
+    assert result["sql"] == "q1"
+    # The generated SQL failed: its cached LLM response is dropped, even though regeneration fixed it
+    assert orchestrator.sql_gen_agent.invalidated == [("total sales", "orders(amount REAL)")]
+
+    # Working SQL keeps its cached response
+    orchestrator.sql_gen_agent = StubGenAgent("q1")
+    asyncio.run(orchestrator.arun("total sales"))
+    assert orchestrator.sql_gen_agent.invalidated == []
+    print("Test passed!")
+
+if __name__ == "__main__":
+    test_speculation_outcomes()
+    test_failed_extraction_cancels_speculation()
+    test_retry_loop()
+    test_retry_deadline()
+    test_run_inside_event_loop()
+    test_run_batch_inside_event_loop()
+    test_cached_sql_deadline()
+    test_failed_sql_leaves_llm_cache()
@@ -0,0 +1,103 @@
+import sys
+import os
+import time
+import shutil
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.cache.query_cache import SemanticQueryCache
+from src.embeddings.fake import FakeEmbedding
+
+FOLDER = os.path.join(os.path.dirname(__file__), "_query_cache_tmp")
+
+class SynonymEmbedding(FakeEmbedding):
+    """Fake embedding where a few phrasings share a vector."""
+    SYNONYMS = {"count amazon orders": "how many amazon orders are there"}
+
+    def generate_embedding(self, text):
+        text = SemanticQueryCache.normalize(text)
+        return super().generate_embedding(self.SYNONYMS.get(text, text))
+
+def _make_cache(**kwargs):
+    shutil.rmtree(FOLDER, ignore_errors=True)
+    os.makedirs(os.path.join(FOLDER, "faiss_db"))
+    db_path = os.path.join(FOLDER, "iris.db")
+    with open(db_path, "w") as f:
+        f.write("v1")
+    return SemanticQueryCache(SynonymEmbedding(dim=32), db_path, os.path.join(FOLDER, "faiss_db"), **kwargs), db_path
+
+def test_exact_and_semantic_hits():
+    cache, _ = _make_cache()
+    try:
+        sql = "SELECT COUNT(*) FROM amazon_sales"
+        cache.store("How many Amazon orders are there?", sql, latency=2.5)
+
+        exact = cache.lookup("  how many amazon orders are there ")
+        assert exact['match'] == "exact" and exact['sql'] == sql
+
+        semantic = cache.lookup("Count Amazon orders")
+        assert semantic['match'] == "semantic" and semantic['sql'] == sql
+
+        assert cache.lookup("Top 5 cities by revenue") is None
+        stats = cache.stats()
+        print(f"Stats: {stats}")
+        assert stats['exact_hits'] == 1 and stats['semantic_hits'] == 1 and stats['misses'] == 1
+        assert stats['latency_saved'] == 5.0
+        print("Test passed!")
+    finally:
+        shutil.rmtree(FOLDER, ignore_errors=True)
+
+def test_numbers_must_match():
+    cache, _ = _make_cache(similarity_threshold=-1.0)
+    try:
+        cache.store("top 5 cities by revenue", "SELECT ... LIMIT 5", latency=1.0)
+        # Any similarity is accepted here, but different numbers never share SQL
+        assert cache.lookup("top 10 cities by revenue") is None
+        assert cache.lookup("top 5 cities by sales")['sql'] == "SELECT ... LIMIT 5"
+        print("Test passed!")
+    finally:
+        shutil.rmtree(FOLDER, ignore_errors=True)
+
+def test_literals_must_match():
+    cache, _ = _make_cache(similarity_threshold=-1.0)
+    try:
+        sql = "SELECT SUM(amount) FROM amazon_sales WHERE ship_city LIKE '%Mumbai%'"
+        cache.store("Total sales in Mumbai", sql, latency=1.0)
+        # Same numbers (none) and any similarity accepted, but the city in the SQL is not in the query
+        assert cache.lookup("Total sales in Delhi") is None
+        assert cache.lookup("What were the total sales in Mumbai?")['sql'] == sql
+        print("Test passed!")
+    finally:
+        shutil.rmtree(FOLDER, ignore_errors=True)
+
+def test_invalidation_and_eviction():
+    cache, db_path = _make_cache(max_entries=2, ttl_seconds=60)
+    try:
+        cache.store("q1", "SELECT 1", latency=1.0)
+        cache.store("q2", "SELECT 2", latency=1.0)
+        cache.store("q3", "SELECT 3", latency=1.0)
+        # LRU bound
+        assert cache.stats()['entries'] == 2
+
+        # Database rewritten: everything is dropped
+        time.sleep(0.01)
+        with open(db_path, "w") as f:
+            f.write("v2, new data")
+        assert cache.lookup("q3") is None
+        assert cache.stats()['invalidations'] == 1
+
+        # TTL
+        cache.ttl_seconds = 0.0
+        cache.store("q4", "SELECT 4", latency=1.0)
+        time.sleep(0.01)
+        assert cache.lookup("q4") is None
+        print("Test passed!")
+    finally:
+        shutil.rmtree(FOLDER, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_exact_and_semantic_hits()
+    test_numbers_must_match()
+    test_literals_must_match()
+    test_invalidation_and_eviction()
@@ -0,0 +1,92 @@
+import sys
+import os
+import sqlite3
+import threading
+import time
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.db_helpers import temp_db
+from src.database.sqlite_client import SQLiteClient
+from src.database.query_guard import QueryAbortedError, QueryGuard, QueryLimits
+
+ENDLESS = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT COUNT(*) FROM c"
+
+def _fill_sales(conn: sqlite3.Connection):
+    conn.execute("CREATE TABLE amazon_sales (order_id TEXT, sku TEXT, amount REAL)")
+    conn.execute("CREATE TABLE product_master (sku TEXT, tp REAL)")
+    conn.executemany("INSERT INTO amazon_sales VALUES (?, ?, ?)", [(f"o{i}", f"s{i % 500}", i * 1.5) for i in range(5000)])
+    conn.executemany("INSERT INTO product_master VALUES (?, ?)", [(f"s{i}", i * 2.0) for i in range(500)])
+
+def _aborted(client: SQLiteClient, query: str, guard=None) -> QueryAbortedError:
+    try:
+        client.execute_query(query, guard=guard)
+    except QueryAbortedError as e:
+        print(f"Aborted: {e}")
+        return e
+    raise AssertionError("query should have been aborted")
+
+def test_cost_guard():
+    with temp_db(_fill_sales, "guard.db") as db_path:
+        client = SQLiteClient(db_path, read_only=True, limits=QueryLimits(max_join_scan_rows=1000000))
+
+        # 5000 x 500 full-scan cross product is rejected before it runs
+        error = _aborted(client, "SELECT COUNT(*) FROM amazon_sales a, product_master p WHERE a.amount > p.tp")
+        assert error.code == "cost" and "amazon_sales (5000 rows)" in str(error) and error.hint
+
+        # Correlated subqueries scanning a table per outer row count as well
+        error = _aborted(client, "SELECT (SELECT MAX(tp) FROM product_master p WHERE p.tp < a.amount) FROM amazon_sales a")
+        assert error.code == "cost"
+
+        # Key joins use an index lookup (automatic index) and run
+        rows = client.execute_query("SELECT COUNT(*) AS n FROM amazon_sales a JOIN product_master p ON a.sku = p.sku")
+        assert rows == [{"n": 5000}]
+        client.disconnect()
+
+        # Row estimates follow writes that are still in the WAL (not checkpointed)
+        client = SQLiteClient(db_path, read_only=True, limits=QueryLimits(max_join_scan_rows=3000000))
+        cross = "SELECT COUNT(*) AS n FROM amazon_sales a, product_master p WHERE a.amount > p.tp"
+        assert client.execute_query(cross)
+        writer = sqlite3.connect(db_path)
+        writer.execute("PRAGMA wal_autocheckpoint=0")
+        writer.executemany("INSERT INTO product_master VALUES (?, ?)", [(f"n{i}", 1.0) for i in range(1000)])
+        writer.commit()
+        assert "product_master (1500 rows)" in str(_aborted(client, cross))
+        writer.close()
+        client.disconnect()
+        print("Test passed!")
+
+def test_time_and_step_limits():
+    with temp_db(_fill_sales, "guard.db") as db_path:
+        client = SQLiteClient(db_path, read_only=True, pool_options={"max_connections": 1},
+                              limits=QueryLimits(timeout_seconds=0.2))
+        start = time.time()
+        assert _aborted(client, ENDLESS).code == "timeout"
+        assert time.time() - start < 2.0
+        # The connection goes back to the pool without the handler
+        assert client.execute_query("SELECT COUNT(*) AS n FROM product_master") == [{"n": 500}]
+
+        # Streaming is bounded by the same deadline
+        try:
+            list(client.iter_query("SELECT a.order_id FROM amazon_sales a, amazon_sales b, amazon_sales c"))
+            assert False, "stream should have been aborted"
+        except QueryAbortedError as e:
+            assert e.code == "timeout"
+        client.disconnect()
+
+        client = SQLiteClient(db_path, read_only=True, limits=QueryLimits(max_vm_steps=1000000, progress_interval=1000))
+        assert _aborted(client, ENDLESS).code == "step_budget"
+
+        # Cancellation from another thread
+        guard = QueryGuard()
+        threading.Timer(0.1, guard.cancel).start()
+        unlimited = SQLiteClient(db_path, read_only=True)
+        assert _aborted(unlimited, ENDLESS, guard=guard).code == "cancelled"
+        client.disconnect()
+        unlimited.disconnect()
+        print("Test passed!")
+
+if __name__ == "__main__":
+    test_cost_guard()
+    test_time_and_step_limits()
@@ -0,0 +1,127 @@
+import sys
+import os
+import shutil
+import sqlite3
+import time
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.sqlite_client import SQLiteClient
+from src.database.result_cache import ResultCache, normalize_sql
+from src.database.index_advisor import QueryLog
+from src.agents.base_agent import CustomBaseAgent
+from src.agents.sql_execution.agent import SQLExecutionAgent
+
+class StubExecutionAgent(SQLExecutionAgent):
+    """SQLExecutionAgent over a given database, result cache and query log."""
+    def __init__(self, db_path, log_path):
+        CustomBaseAgent.__init__(self, agent_name="sql_execution")
+        self.db_client = SQLiteClient(db_path, read_only=True)
+        self.db_client.connect()
+        self.result_cache = ResultCache(db_path)
+        self.query_log = QueryLog(log_path)
+
+def test_normalize_sql():
+    a = "SELECT SUM(amount) FROM amazon_sales WHERE ship_city LIKE '%Mumbai%';"
+    b = "select sum( amount )\n  from   Amazon_Sales\twhere ship_city like '%Mumbai%'"
+    assert normalize_sql(a) == normalize_sql(b)
+    print(f"Normalized: {normalize_sql(a)}")
+    # String literals keep their case and spacing
+    assert normalize_sql("SELECT 1 WHERE c = 'Mumbai'") != normalize_sql("SELECT 1 WHERE c = 'MUMBAI'")
+    assert normalize_sql("SELECT 1 WHERE c = 'a  b'") != normalize_sql("SELECT 1 WHERE c = 'a b'")
+    # So does double-quoted text: SQLite may read "Mumbai" as a string when no column has that name
+    assert normalize_sql('SELECT 1 WHERE c = "Mumbai"') != normalize_sql('SELECT 1 WHERE c = "MUMBAI"')
+    assert normalize_sql('SELECT "Ship City"  FROM t') == 'select "Ship City" from t'
+    print("Test passed!")
+
+def test_result_cache():
+    folder = os.path.join(os.path.dirname(__file__), "_result_cache_tmp")
+    try:
+        os.makedirs(folder, exist_ok=True)
+        db_path = os.path.join(folder, "results.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE sales (city TEXT, amount REAL)")
+        conn.executemany("INSERT INTO sales VALUES (?, ?)", [(f"City {i % 5}", 1.0) for i in range(1000)])
+        conn.commit()
+        conn.close()
+        client = SQLiteClient(db_path, read_only=True)
+        client.connect()
+        cache = ResultCache(db_path, max_bytes=300, max_entry_bytes=200)
+
+        # The first read creates an empty WAL: the data, and so the version, is unchanged
+        version = cache.version()
+        client.execute_bounded("SELECT COUNT(*) AS n FROM sales")
+        assert os.path.exists(f"{db_path}-wal") and cache.version() == version
+
+        query = "SELECT COUNT(*) AS n FROM sales"
+        assert cache.get(query) is None
+        cache.put(query, client.execute_bounded(query), version=cache.version())
+        hit = cache.get("select count(*) as n from sales;")
+        assert hit is not None and hit["rows"] == [{"n": 1000}]
+
+        # Too large for one entry / non-deterministic: not cached
+        assert not cache.put("SELECT * FROM sales", client.execute_bounded("SELECT * FROM sales"))
+        assert not cache.put("SELECT random() AS r", client.execute_bounded("SELECT random() AS r"))
+
+        # LRU eviction within max_bytes
+        for city in range(5):
+            q = f"SELECT COUNT(*) AS n FROM sales WHERE city = 'City {city}'"
+            assert cache.put(q, client.execute_bounded(q))
+        stats = cache.stats()
+        print(f"Stats: {stats}")
+        assert stats["bytes"] <= 300 and stats["evictions"] > 0 and stats["too_large"] == 1
+        assert cache.get(query) is None
+        assert cache.get("SELECT COUNT(*) AS n FROM sales WHERE city = 'City 4'")["rows"] == [{"n": 200}]
+
+        # A write changes the version: cached results are dropped
+        time.sleep(0.01)
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO sales VALUES ('City 4', 1.0)")
+        conn.commit()
+        conn.close()
+        assert cache.get("SELECT COUNT(*) AS n FROM sales WHERE city = 'City 4'") is None
+        assert cache.stats()["invalidations"] == 1
+        # A result taken before the write is not stored under the new version
+        stale = cache.version()
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO sales VALUES ('City 4', 1.0)")
+        conn.commit()
+        conn.close()
+        assert not cache.put(query, {"rows": [{"n": 1001}], "bytes": 9}, version=stale)
+        client.disconnect()
+        print("Test passed!")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+def test_cache_hits_are_logged():
+    folder = os.path.join(os.path.dirname(__file__), "_result_cache_tmp")
+    try:
+        os.makedirs(folder, exist_ok=True)
+        db_path = os.path.join(folder, "results.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE sales (city TEXT, amount REAL)")
+        conn.executemany("INSERT INTO sales VALUES (?, ?)", [(f"City {i % 5}", 1.0) for i in range(1000)])
+        conn.commit()
+        conn.close()
+        agent = StubExecutionAgent(db_path, os.path.join(folder, "query_log.jsonl"))
+
+        query = "SELECT city, SUM(amount) AS total FROM sales GROUP BY city"
+        first = agent.execute_bounded(query)
+        second = agent.execute_bounded(query)
+        assert not first["cached"] and second["cached"]
+
+        # The hit is part of the index advisor workload, with the time of the run it reused
+        entries = agent.query_log.entries()
+        print(f"Logged: {entries}")
+        assert [e["cached"] for e in entries] == [False, True]
+        assert entries[1]["elapsed"] == entries[0]["elapsed"] and entries[1]["rows"] == 5
+        agent.db_client.disconnect()
+        print("Test passed!")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_normalize_sql()
+    test_result_cache()
+    test_cache_hits_are_logged()
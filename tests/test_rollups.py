@@ -0,0 +1,155 @@
+import sys
+import os
+import csv
+import shutil
+import sqlite3
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.sqlite_client import SQLiteClient
+from src.database.rollups import RollupManager, RollupRewriter, built_rollups, rollup_documents
+import import_data
+
+AMAZON_COLUMNS = ["order_id", "date", "status", "fulfilment", "sales_channel", "sku", "style", "category", "size",
+                  "qty", "amount", "ship_city", "ship_state", "ship_country", "b2b"]
+
+def _rows(start: int, count: int):
+    return [(f"O{i}", f"2022-0{4 + i % 3}-{i % 28 + 1:02d}" if i % 50 else None, ["Shipped", "Cancelled"][i % 2],
+             "Amazon", "Amazon.in", f"SKU{i % 40}", f"S{i % 40}", ["kurta", "Set", "Top"][i % 3], "M",
+             i % 4 if i % 7 else None, i * 1.25 if i % 11 else None, [f"City {i % 9}", None][i % 13 == 0],
+             f"State {i % 5}", "IN", i % 2)
+            for i in range(start, start + count)]
+
+def _insert(db_path: str, rows):
+    conn = sqlite3.connect(db_path)
+    conn.executemany(f"INSERT INTO amazon_sales VALUES ({', '.join('?' * len(AMAZON_COLUMNS))})", rows)
+    conn.commit()
+    conn.close()
+
+def _same(db_path: str, a: str, b: str) -> bool:
+    """Same rows under the same column names (floats rounded)."""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        x, y = conn.execute(a).fetchall(), conn.execute(b).fetchall()
+    finally:
+        conn.close()
+    rounded = lambda rows: [{k: round(row[k], 6) if isinstance(row[k], float) else row[k] for k in row.keys()} for row in rows]
+    return rounded(x) == rounded(y)
+
+QUERIES = [
+    "SELECT SUM(amount) FROM amazon_sales WHERE ship_city LIKE '%City 1%'",
+    "SELECT COUNT(*) FROM amazon_sales WHERE status = 'Cancelled'",
+    "SELECT ship_state, SUM(amount) AS total FROM amazon_sales GROUP BY ship_state ORDER BY total DESC",
+    "SELECT category, SUM(qty), AVG(amount), COUNT(amount), MIN(amount), MAX(qty) FROM amazon_sales "
+    "WHERE date BETWEEN '2022-04-01' AND '2022-04-30' GROUP BY category ORDER BY category",
+    "select strftime('%Y-%m', date) as m, sum(amount) from amazon_sales a group by 1 order by 1",
+    "SELECT sku, SUM(qty) AS units FROM amazon_sales GROUP BY sku ORDER BY units DESC, sku LIMIT 5",
+    "SELECT COUNT(DISTINCT ship_city), COUNT(ship_city) FROM amazon_sales WHERE ship_state = 'State 2'",
+    # Unaliased expressions keep their column names ("strftime('%Y-%m', date)", "SUM(amount) / COUNT(*)")
+    "SELECT strftime('%Y-%m', date), SUM(amount) / COUNT(*), max( qty ) top FROM amazon_sales "
+    "GROUP BY strftime('%Y-%m', date) ORDER BY 1",
+]
+
+def test_rollups():
+    folder = os.path.join(os.path.dirname(__file__), "_rollups_tmp")
+    try:
+        os.makedirs(folder, exist_ok=True)
+        db_path = os.path.join(folder, "rollups.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute(f"CREATE TABLE amazon_sales ({', '.join(AMAZON_COLUMNS)})")
+        conn.close()
+        _insert(db_path, _rows(0, 3000))
+
+        manager = RollupManager(db_path)
+        report = manager.refresh()
+        print(f"Refresh: {report}")
+        assert report["rollup_amazon_daily"]["mode"] == "rebuilt" and report["rollup_amazon_daily"]["source_rows"] == 3000
+        assert report["rollup_international_monthly"]["mode"] == "skipped"
+        assert report["rollup_amazon_state"]["rows"] < 3000
+
+        client = SQLiteClient(db_path, read_only=True)
+        client.connect()
+        rewriter = RollupRewriter(client)
+        for query in QUERIES:
+            rewrite = rewriter.rewrite(query)
+            print(f"{rewrite['rollup']}: {rewrite['sql']}")
+            assert rewrite["rollup"] is not None
+            assert _same(db_path, query, rewrite["sql"])
+        # The smallest rollup with the needed columns is chosen
+        assert rewriter.rewrite(QUERIES[2])["rollup"] == "rollup_amazon_state"
+        assert rewriter.rewrite(QUERIES[3])["rollup"] == "rollup_amazon_daily"
+
+        # Not answerable from a rollup: unchanged
+        for query in ["SELECT * FROM amazon_sales WHERE ship_city = 'City 1'",
+                      "SELECT SUM(amount) FROM amazon_sales WHERE amount > 500",
+                      "SELECT SUM(amount * qty) FROM amazon_sales",
+                      "SELECT SUM(amount) FROM amazon_sales WHERE order_id IN (SELECT order_id FROM amazon_sales LIMIT 3)"]:
+            assert rewriter.rewrite(query) == {"sql": query, "rollup": None, "source": None}
+
+        # New rows: rollups are not used until refreshed, then refreshed incrementally
+        _insert(db_path, _rows(3000, 500))
+        assert rewriter.rewrite(QUERIES[0])["rollup"] is None
+        report = manager.refresh()
+        assert report["rollup_amazon_daily"]["mode"] == "incremental" and report["rollup_amazon_daily"]["source_rows"] == 500
+        for query in QUERIES:
+            rewrite = rewriter.rewrite(query)
+            assert rewrite["rollup"] is not None and _same(db_path, query, rewrite["sql"])
+        assert manager.refresh()["rollup_amazon_daily"]["mode"] == "fresh"
+
+        # A reloaded source table (other rows under the same rowids) is rebuilt
+        conn = sqlite3.connect(db_path)
+        conn.execute("DELETE FROM amazon_sales")
+        conn.commit()
+        conn.close()
+        _insert(db_path, _rows(10000, 4000))
+        assert manager.refresh()["rollup_amazon_daily"]["mode"] == "rebuilt"
+        assert _same(db_path, QUERIES[2], rewriter.rewrite(QUERIES[2])["sql"])
+
+        # Descriptions for the vector index
+        tables, columns = rollup_documents(built_rollups(db_path))
+        assert [doc['metadata']['table_name'] for doc in tables] == ["rollup_amazon_daily", "rollup_amazon_state",
+                                                                      "rollup_amazon_city", "rollup_amazon_sku"]
+        assert any(doc['metadata']['column_name'] == "sum_amount" for doc in columns["rollup_amazon_city"])
+        print(f"Rewriter: {rewriter.stats()}")
+        client.disconnect()
+        print("Test passed!")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+# Headers of the raw 'Amazon Sale Report.csv' for AMAZON_COLUMNS
+CSV_HEADERS = ["Order ID", "Date", "Status", "Fulfilment", "Sales Channel", "SKU", "Style", "Category", "Size",
+               "Qty", "Amount", "ship-city", "ship-state", "ship-country", "B2B"]
+
+def test_append_import():
+    folder = os.path.join(os.path.dirname(__file__), "_rollups_tmp")
+    try:
+        os.makedirs(folder, exist_ok=True)
+        db_path = os.path.join(folder, "rollups.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute(f"CREATE TABLE amazon_sales ({', '.join(AMAZON_COLUMNS)})")
+        conn.close()
+        _insert(db_path, _rows(0, 3000))
+        assert import_data.build_rollups(db_path)["rollup_amazon_state"]["mode"] == "rebuilt"
+
+        csv_path = os.path.join(folder, "new_orders.csv")
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADERS)
+            writer.writerows(_rows(3000, 250))
+
+        # The database and its rollups are kept: only the appended rows are aggregated
+        report = import_data.append_data("amazon_sales", csv_path, db_path=db_path)
+        print(f"Refresh: {report}")
+        for name in ["rollup_amazon_daily", "rollup_amazon_state", "rollup_amazon_city", "rollup_amazon_sku"]:
+            assert report[name]["mode"] == "incremental" and report[name]["source_rows"] == 250
+        assert _same(db_path, "SELECT COUNT(*) AS n, SUM(qty) AS q FROM amazon_sales",
+                     "SELECT SUM(row_count) AS n, SUM(sum_qty) AS q FROM rollup_amazon_state")
+        print("Test passed!")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_rollups()
+    test_append_import()
@@ -0,0 +1,79 @@
+import sys
+import os
+import sqlite3
+import asyncio
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.db_helpers import temp_db
+from src.database.sqlite_client import SQLiteClient
+
+def _fill_sales(conn: sqlite3.Connection):
+    conn.execute("CREATE TABLE sales (id INTEGER, city TEXT, amount REAL)")
+    conn.executemany("INSERT INTO sales VALUES (?, ?, ?)", [(i, f"City {i % 7}", i * 1.5) for i in range(2500)])
+
+def test_iter_query_chunks():
+    with temp_db(_fill_sales, "stream.db") as db_path:
+        client = SQLiteClient(db_path)
+        sizes = [len(chunk) for chunk in client.iter_query("SELECT * FROM sales", chunk_size=1000)]
+        print(f"Chunk sizes: {sizes}")
+        assert sizes == [1000, 1000, 500]
+
+        first = next(client.iter_query("SELECT * FROM sales ORDER BY id", chunk_size=3))
+        assert first[2] == {"id": 2, "city": "City 2", "amount": 3.0}
+        print("Test passed!")
+
+def test_execute_bounded():
+    with temp_db(_fill_sales, "stream.db") as db_path:
+        client = SQLiteClient(db_path)
+
+        result = client.execute_bounded("SELECT * FROM sales", max_rows=100, chunk_size=40)
+        print(f"Row budget: {result['row_count']} rows, truncated={result['truncated']}, "
+              f"first row after {result['time_to_first_row']:.4f}s")
+        assert result['row_count'] == 100 and result['truncated']
+        assert result['time_to_first_row'] is not None
+
+        result = client.execute_bounded("SELECT * FROM sales", max_rows=10000, max_bytes=5000)
+        assert result['truncated'] and result['bytes'] <= 5000
+
+        # A result exactly at the budget is complete, not truncated
+        result = client.execute_bounded("SELECT * FROM sales LIMIT 100", max_rows=100)
+        assert result['row_count'] == 100 and not result['truncated']
+
+        result = client.execute_bounded("WITH t AS (SELECT COUNT(*) AS n FROM sales) SELECT n FROM t")
+        assert result['rows'] == [{"n": 2500}]
+        print("Test passed!")
+
+def test_stream_bounded():
+    with temp_db(_fill_sales, "stream.db") as db_path:
+        client = SQLiteClient(db_path, read_only=True)
+
+        stream = client.stream_bounded("SELECT * FROM sales", max_rows=1200, chunk_size=500)
+        sizes = [len(chunk) for chunk in stream]
+        print(f"Chunk sizes: {sizes}, summary: {stream.summary()}")
+        # Stops at the row budget instead of streaming all 2500 rows
+        assert sizes == [500, 500, 200] and stream.truncated and stream.row_count == 1200
+        assert stream.time_to_first_row is not None and stream.elapsed >= stream.time_to_first_row
+
+        stream = client.stream_bounded("SELECT * FROM sales", max_rows=10000, max_bytes=5000)
+        assert sum(len(chunk) for chunk in stream) == stream.row_count
+        assert stream.truncated and stream.bytes <= 5000
+
+        async def consume():
+            stream = client.stream_bounded("SELECT * FROM sales LIMIT 300", max_rows=300, chunk_size=100)
+            rows = [row async for chunk in stream for row in chunk]
+            return rows, stream
+
+        rows, stream = asyncio.run(consume())
+        # Exactly at the budget: complete, not truncated
+        assert len(rows) == 300 and not stream.truncated
+        # Every pooled connection was handed back
+        stats = client.pool.stats()
+        assert stats["idle"] == stats["open"]
+        print("Test passed!")
+
+if __name__ == "__main__":
+    test_iter_query_chunks()
+    test_execute_bounded()
+    test_stream_bounded()
@@ -0,0 +1,70 @@
+import sys
+import os
+import shutil
+import sqlite3
+
+# Add project root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database.catalog import SchemaCatalog
+from src.database.sqlite_client import SQLiteClient
+from src.database.sql_validator import SQLValidator, replace_identifier
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def test_replace_identifier():
+    sql = "SELECT shipcity FROM t WHERE shipcity = 'shipcity' AND \"shipcity\" IS NOT NULL"
+    assert replace_identifier(sql, "shipcity", "ship_city") == \
+        "SELECT ship_city FROM t WHERE ship_city = 'shipcity' AND ship_city IS NOT NULL"
+    assert replace_identifier('SELECT * FROM "Amazon Sale Report"', "Amazon Sale Report", "amazon_sales") == \
+        "SELECT * FROM amazon_sales"
+    print("Test passed!")
+
+def test_sql_validator():
+    folder = os.path.join(os.path.dirname(__file__), "_validator_tmp")
+    os.makedirs(folder, exist_ok=True)
+    db_path = os.path.join(folder, "validator.db")
+    try:
+        conn = sqlite3.connect(db_path)
+        with open(os.path.join(PROJECT_ROOT, 'Database', 'schema.sql')) as f:
+            conn.executescript(f.read())
+        conn.close()
+
+        client = SQLiteClient(db_path)
+        validator = SQLValidator(client, SchemaCatalog(client))
+
+        check = validator.repair("SELECT SUM(amount) FROM amazon_sales WHERE ship_city = 'Mumbai'")
+        assert check['valid'] and not check['fixes']
+
+        # Typos and description names are repaired without an LLM call
+        check = validator.repair("SELECT a.ship_cty, SUM(a.Amount) FROM amazon_sale a WHERE shipcity = 'shipcity' GROUP BY 1")
+        print(f"Repaired: {check}")
+        assert check['valid']
+        assert check['sql'] == "SELECT a.ship_city, SUM(a.Amount) FROM amazon_sales a WHERE ship_city = 'shipcity' GROUP BY 1"
+
+        check = validator.repair('SELECT SUM(stock) FROM "Sale Report"')
+        assert check['valid'] and check['sql'] == "SELECT SUM(stock) FROM inventory"
+
+        check = validator.repair("SELECT SUM(gross_amount) FROM international_sales")
+        assert check['fixes'] == [('gross_amount', 'gross_amt')]
+
+        # A quoted column name would silently be read as a string literal
+        check = validator.repair('SELECT COUNT(*) FROM amazon_sales WHERE "Ship City" = \'MUMBAI\'')
+        assert check['sql'] == "SELECT COUNT(*) FROM amazon_sales WHERE ship_city = 'MUMBAI'"
+        check = validator.repair('SELECT SUM(amount) AS "Total Sales" FROM amazon_sales ORDER BY "Total Sales"')
+        assert check['valid'] and not check['fixes']
+
+        # Nothing close enough: left to SQLRegenerationAgent
+        check = validator.repair("SELECT profit_margin FROM amazon_sales")
+        assert not check['valid'] and check['error'] == "no such column: profit_margin"
+
+        print(f"Stats: {validator.stats()}")
+        assert validator.stats()['repaired'] == 4
+        client.disconnect()
+        print("Test passed!")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_replace_identifier()
+    test_sql_validator()